@@ -4,6 +4,18 @@ import mysql.connector
 import subprocess
 import os
 import datetime
+import live_top
+import system_stats
+
+# How often the live top panel polls for new plays (milliseconds)
+LIVE_REFRESH_MS = 5000
+
+# Activities shown at first, then added per "Load older" click
+ACTIVITY_FIRST_PAGE = 4
+ACTIVITY_PAGE = 10
+
+# Keyset (occurred_at, activity_id) of the oldest activity shown
+activity_state = {"before": None}
 
 # ------------------- Database Functions -------------------
 def connect_db():
@@ -65,128 +77,40 @@ def get_admin_info():
             connection.close()
 
 def get_system_stats():
-    """Get system statistics for the dashboard"""
-    try:
-        connection = connect_db()
-        if not connection:
-            return {
-                "total_users": 0,
-                "total_songs": 0,
-                "total_playlists": 0,
-                "total_downloads": 0
-            }
-            
-        cursor = connection.cursor()
-        
-        # Get user count
-        cursor.execute("SELECT COUNT(*) FROM Users")
-        total_users = cursor.fetchone()[0]
-        
-        # Get song count
-        cursor.execute("SELECT COUNT(*) FROM Songs")
-        total_songs = cursor.fetchone()[0]
-        
-        # Get playlist count
-        cursor.execute("SELECT COUNT(*) FROM Playlists")
-        total_playlists = cursor.fetchone()[0]
-        
-        # Approximate downloads (listening history entries)
-        cursor.execute("SELECT COUNT(*) FROM Listening_History")
-        total_downloads = cursor.fetchone()[0]
-        
-        return {
-            "total_users": total_users,
-            "total_songs": total_songs,
-            "total_playlists": total_playlists,
-            "total_downloads": total_downloads
-        }
-        
-    except mysql.connector.Error as e:
-        print(f"Error getting system stats: {e}")
-        return {
-            "total_users": 0,
-            "total_songs": 0,
-            "total_playlists": 0,
-            "total_downloads": 0
-        }
-    finally:
-        if 'connection' in locals() and connection and connection.is_connected():
-            cursor.close()
-            connection.close()
+    """Get system statistics for the dashboard (maintained counters, cached briefly)"""
+    return system_stats.get_system_stats()
 
-def get_recent_activities(limit=4):
-    """Get recent system activities"""
+def get_recent_activities(limit=4, before=None):
+    """Get recent system activities older than the keyset before, plus the keyset of the last one"""
     try:
         connection = connect_db()
         if not connection:
-            return []
+            return [], None
             
         cursor = connection.cursor(dictionary=True)
         
-        # Get recent user registrations
-        user_query = """
-        SELECT 'user_registered' as activity_type, 
-               CONCAT(first_name, ' ', last_name) as item,
-               created_at as timestamp
-        FROM Users
-        ORDER BY created_at DESC
-        LIMIT %s
-        """
-        
-        # Get recent song uploads
-        song_query = """
-        SELECT 'song_uploaded' as activity_type,
-               CONCAT(s.title, ' - ', a.name) as item,
-               s.upload_date as timestamp
-        FROM Songs s
-        JOIN Artists a ON s.artist_id = a.artist_id
-        ORDER BY s.upload_date DESC
-        LIMIT %s
-        """
-        
-        # Get recent playlist creations
-        playlist_query = """
-        SELECT 'playlist_created' as activity_type,
-               p.name as item,
-               p.created_at as timestamp
-        FROM Playlists p
-        ORDER BY p.created_at DESC
-        LIMIT %s
-        """
-        
-        # Get recent listening activity (downloads)
-        download_query = """
-        SELECT 'song_played' as activity_type,
-               CONCAT(s.title, ' - ', a.name) as item,
-               lh.played_at as timestamp
-        FROM Listening_History lh
-        JOIN Songs s ON lh.song_id = s.song_id
-        JOIN Artists a ON s.artist_id = a.artist_id
-        ORDER BY lh.played_at DESC
-        LIMIT %s
-        """
-        
-        # Execute all queries
-        cursor.execute(user_query, (limit,))
-        users = cursor.fetchall()
-        
-        cursor.execute(song_query, (limit,))
-        songs = cursor.fetchall()
-        
-        cursor.execute(playlist_query, (limit,))
-        playlists = cursor.fetchall()
+        # Activity_Log is written as things happen, so the feed is one range read
+        # on the (occurred_at, activity_id) index; "before" continues an older page
+        if before is None:
+            cursor.execute("""
+            SELECT activity_id, activity_type, item, occurred_at as timestamp
+            FROM Activity_Log
+            ORDER BY occurred_at DESC, activity_id DESC
+            LIMIT %s
+            """, (limit,))
+        else:
+            cursor.execute("""
+            SELECT activity_id, activity_type, item, occurred_at as timestamp
+            FROM Activity_Log
+            WHERE occurred_at < %s OR (occurred_at = %s AND activity_id < %s)
+            ORDER BY occurred_at DESC, activity_id DESC
+            LIMIT %s
+            """, (before[0], before[0], before[1], limit))
+        all_activities = cursor.fetchall()
         
-        cursor.execute(download_query, (limit,))
-        downloads = cursor.fetchall()
-        
-        # Combine all activities
-        all_activities = users + songs + playlists + downloads
-        
-        # Sort by timestamp (most recent first)
-        all_activities.sort(key=lambda x: x["timestamp"], reverse=True)
-        
-        # Limit to requested number
-        all_activities = all_activities[:limit]
+        next_before = None
+        if len(all_activities) == limit:
+            next_before = (all_activities[-1]["timestamp"], all_activities[-1]["activity_id"])
         
         # Format activities for display
         formatted_activities = []
@@ -223,11 +147,11 @@ def get_recent_activities(limit=4):
             
             formatted_activities.append((action, item, time_str))
         
-        return formatted_activities
+        return formatted_activities, next_before
         
     except mysql.connector.Error as e:
         print(f"Error getting recent activities: {e}")
-        return []
+        return [], None
     finally:
         if 'connection' in locals() and connection and connection.is_connected():
             cursor.close()
@@ -294,11 +218,25 @@ def refresh_dashboard():
     for widget in activity_list_frame.winfo_children():
         widget.destroy()
     
-    # Get fresh activities
-    activities = get_recent_activities()
+    # Start again from the newest activity
+    activity_state["before"] = None
+    load_older_activities()
+
+def load_older_activities():
+    """Append the next page of older activities to the feed"""
+    first_page = activity_state["before"] is None
+    activities, before = get_recent_activities(
+        ACTIVITY_FIRST_PAGE if first_page else ACTIVITY_PAGE, activity_state["before"]
+    )
+    activity_state["before"] = before
+    
+    # The button is re-added below the new rows
+    for widget in activity_list_frame.winfo_children():
+        if isinstance(widget, ctk.CTkButton):
+            widget.destroy()
     
     # Display activities
-    if not activities:
+    if not activities and first_page:
         no_activity_label = ctk.CTkLabel(
             activity_list_frame, 
             text="No recent activities found", 
@@ -319,6 +257,46 @@ def refresh_dashboard():
             
             time_label = ctk.CTkLabel(activity_item, text=time, font=("Arial", 12), text_color="#B146EC")
             time_label.pack(side="right", padx=10)
+    
+    if before:
+        load_older_btn = ctk.CTkButton(activity_list_frame, text="Load older", font=("Arial", 12),
+                                      fg_color="#1A1A2E", hover_color="#232342", text_color="#B146EC",
+                                      height=28, command=load_older_activities)
+        load_older_btn.pack(pady=(0, 5))
+
+def refresh_live_top():
+    """Redraw the live top songs and artists, then schedule the next poll"""
+    # The sketch only reads plays newer than its watermark, so polling stays cheap
+    top = live_top.get_live_top(5)
+
+    for widget in live_list_frame.winfo_children():
+        widget.destroy()
+
+    for heading, entries in (("Songs", top["songs"]), ("Artists", top["artists"])):
+        heading_label = ctk.CTkLabel(live_list_frame, text=heading, 
+                                    font=("Arial", 12, "bold"), text_color="white")
+        heading_label.pack(anchor="w", padx=10, pady=(8, 2))
+
+        if not entries:
+            empty_label = ctk.CTkLabel(live_list_frame, text="No plays yet", 
+                                      font=("Arial", 12), text_color="#A0A0A0")
+            empty_label.pack(anchor="w", padx=10)
+            continue
+
+        for rank, (name, count, error, guaranteed) in enumerate(entries, 1):
+            row = ctk.CTkFrame(live_list_frame, fg_color="#1A1A2E")
+            row.pack(fill="x", padx=10)
+
+            # "~" marks entries whose place in the list is not guaranteed by the error bound
+            name_label = ctk.CTkLabel(row, text=f"{rank}. {name[:24]}", 
+                                     font=("Arial", 12), text_color="#A0A0A0")
+            name_label.pack(side="left")
+
+            count_label = ctk.CTkLabel(row, text=f"{'' if guaranteed else '~'}{count:.0f}", 
+                                      font=("Arial", 12), text_color="#B146EC")
+            count_label.pack(side="right")
+
+    root.after(LIVE_REFRESH_MS, refresh_live_top)
 
 # ------------------- Initialize App -------------------
 try:
@@ -499,44 +477,40 @@ try:
                                           command=open_manage_playlists)
     manage_playlists_action.pack(side="left", padx=10, expand=True)
 
+    # Recent activity and the live top panel share the bottom row
+    bottom_frame = ctk.CTkFrame(content_frame, fg_color="#131B2E")
+    bottom_frame.pack(fill="both", expand=True, padx=20, pady=(20, 20))
+
+    # ---------------- Most Played Right Now Section ----------------
+    live_frame = ctk.CTkFrame(bottom_frame, fg_color="#131B2E", width=280)
+    live_frame.pack(side="right", fill="y", padx=(20, 0))
+    live_frame.pack_propagate(False)
+
+    live_title = ctk.CTkLabel(live_frame, text="Most Played Right Now 🔴", 
+                             font=("Arial", 16, "bold"), text_color="#B146EC")
+    live_title.pack(anchor="w", pady=(4, 15))
+
+    live_list_frame = ctk.CTkFrame(live_frame, fg_color="#1A1A2E", corner_radius=10)
+    live_list_frame.pack(fill="both", expand=True)
+
     # ---------------- Recent Activity Section ----------------
-    activity_frame = ctk.CTkFrame(content_frame, fg_color="#131B2E")
-    activity_frame.pack(fill="both", expand=True, padx=20, pady=(20, 20))
+    activity_frame = ctk.CTkFrame(bottom_frame, fg_color="#131B2E")
+    activity_frame.pack(side="left", fill="both", expand=True)
 
     # Section title
     activity_title = ctk.CTkLabel(activity_frame, text="Recent Activity 📝", 
                                  font=("Arial", 20, "bold"), text_color="#B146EC")
     activity_title.pack(anchor="w", pady=(0, 15))
 
-    # Activity list container
-    activity_list_frame = ctk.CTkFrame(activity_frame, fg_color="#1A1A2E", corner_radius=10)
+    # Activity list container (scrolls as older activities are loaded)
+    activity_list_frame = ctk.CTkScrollableFrame(activity_frame, fg_color="#1A1A2E", corner_radius=10)
     activity_list_frame.pack(fill="both", expand=True)
 
     # Get recent activities
-    activities = get_recent_activities()
+    load_older_activities()
 
-    # Display activities
-    if not activities:
-        no_activity_label = ctk.CTkLabel(
-            activity_list_frame, 
-            text="No recent activities found", 
-            font=("Arial", 12), 
-            text_color="#A0A0A0"
-        )
-        no_activity_label.pack(pady=20)
-    else:
-        for action, item, time in activities:
-            activity_item = ctk.CTkFrame(activity_list_frame, fg_color="#1A1A2E", height=40)
-            activity_item.pack(fill="x", padx=10, pady=5)
-            
-            action_label = ctk.CTkLabel(activity_item, text=action, font=("Arial", 12, "bold"), text_color="white")
-            action_label.pack(side="left", padx=10)
-            
-            item_label = ctk.CTkLabel(activity_item, text=item, font=("Arial", 12), text_color="#A0A0A0")
-            item_label.pack(side="left", padx=10)
-            
-            time_label = ctk.CTkLabel(activity_item, text=time, font=("Arial", 12), text_color="#B146EC")
-            time_label.pack(side="right", padx=10)
+    # Start polling the live top panel
+    refresh_live_top()
 
     # ---------------- Run Application ----------------
     root.mainloop()
@@ -0,0 +1,459 @@
+import customtkinter as ctk
+from tkinter import messagebox, ttk
+import mysql.connector
+import subprocess
+import os
+
+# Playlists shown per page
+PAGE_SIZE = 50
+
+# Sort option -> (Playlists column, descending). Ties are broken by playlist_id.
+SORT_OPTIONS = {
+    "Newest": ("created_at", True),
+    "Name": ("name", False),
+    "Most Songs": ("song_count", True),
+    "Longest": ("total_duration", True)
+}
+
+# Keyset pagination: the (sort value, playlist_id) after which each visited page starts
+page_state = {"starts": [None], "next_start": None}
+
+# ------------------- Database Functions -------------------
+def connect_db():
+    """Connect to the MySQL database"""
+    try:
+        connection = mysql.connector.connect(
+            host="localhost",
+            user="root",
+            password="new_password",
+            database="online_music_system"
+        )
+        return connection
+    except mysql.connector.Error as err:
+        messagebox.showerror("Database Connection Error",
+                            f"Failed to connect to database: {err}")
+        return None
+
+def get_admin_info():
+    """Get the current admin information"""
+    try:
+        # Read admin ID from file
+        if not os.path.exists("current_admin.txt"):
+            messagebox.showerror("Error", "Admin session not found!")
+            open_admin_login_page()
+            return None
+
+        with open("current_admin.txt", "r") as f:
+            admin_id = f.read().strip()
+
+        if not admin_id:
+            messagebox.showerror("Error", "Admin ID not found!")
+            open_admin_login_page()
+            return None
+
+        connection = connect_db()
+        if not connection:
+            return None
+
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(
+            "SELECT user_id, first_name, last_name, email FROM Users WHERE user_id = %s AND is_admin = 1",
+            (admin_id,)
+        )
+
+        admin = cursor.fetchone()
+        if not admin:
+            messagebox.showerror("Access Denied", "You do not have admin privileges!")
+            open_admin_login_page()
+            return None
+
+        return admin
+
+    except Exception as e:
+        print(f"Error getting admin info: {e}")
+        return None
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def get_playlists_page(sort="Newest", search="", start=None, limit=PAGE_SIZE):
+    """Get one page of playlists after the keyset start, plus the start of the next page"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return [], None
+
+        cursor = connection.cursor(dictionary=True)
+
+        column, descending = SORT_OPTIONS[sort]
+        compare = "<" if descending else ">"
+        direction = "DESC" if descending else "ASC"
+
+        conditions = []
+        params = []
+        if search:
+            # Prefix match so the name index can be used
+            conditions.append("p.name LIKE %s")
+            params.append(search.replace("%", r"\%").replace("_", r"\_") + "%")
+        if start is not None:
+            # Seek past the last row of the previous page instead of using OFFSET
+            conditions.append(f"(p.{column} {compare} %s OR (p.{column} = %s AND p.playlist_id {compare} %s))")
+            params.extend([start[0], start[0], start[1]])
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        # Song counts and durations are maintained columns, so no join on Playlist_Songs
+        query = f"""
+        SELECT p.playlist_id, p.name, p.song_count, p.total_duration, p.created_at,
+               p.{column} AS sort_value,
+               COALESCE(CONCAT(u.first_name, ' ', u.last_name), 'System') AS owner_name
+        FROM Playlists p
+        LEFT JOIN Users u ON p.user_id = u.user_id
+        {where}
+        ORDER BY p.{column} {direction}, p.playlist_id {direction}
+        LIMIT %s
+        """
+        cursor.execute(query, params + [limit + 1])
+        playlists = cursor.fetchall()
+
+        # One extra row tells whether there is a next page
+        next_start = None
+        if len(playlists) > limit:
+            playlists = playlists[:limit]
+            last = playlists[-1]
+            next_start = (last["sort_value"], last["playlist_id"])
+
+        return playlists, next_start
+
+    except mysql.connector.Error as e:
+        print(f"Error fetching playlists: {e}")
+        return [], None
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def delete_playlist(playlist_id):
+    """Delete a playlist (its songs are removed by the foreign key cascade)"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return False
+
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM Playlists WHERE playlist_id = %s", (playlist_id,))
+
+        connection.commit()
+        return True
+
+    except mysql.connector.Error as e:
+        print(f"Error deleting playlist: {e}")
+        return False
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def format_duration(seconds):
+    """Format a duration in seconds as H:MM:SS or M:SS"""
+    hours, remainder = divmod(seconds or 0, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+# ------------------- Navigation Functions -------------------
+def return_to_dashboard():
+    """Return to admin dashboard"""
+    try:
+        subprocess.Popen(["python", "admin.py"])
+        root.destroy()
+    except Exception as e:
+        messagebox.showerror("Error", f"Unable to open admin dashboard: {e}")
+
+def open_admin_login_page():
+    """Open the admin login page"""
+    try:
+        # Remove admin session
+        if os.path.exists("current_admin.txt"):
+            os.remove("current_admin.txt")
+
+        subprocess.Popen(["python", "admin_login.py"])
+        root.destroy()
+    except Exception as e:
+        messagebox.showerror("Error", f"Unable to open admin login: {e}")
+
+# ------------------- UI Functions -------------------
+def load_page():
+    """Show the page that starts at the last entry of page_state["starts"]"""
+    playlists, next_start = get_playlists_page(
+        sort_menu.get(), search_entry.get().strip(), page_state["starts"][-1]
+    )
+    page_state["next_start"] = next_start
+
+    # Clear the treeview
+    for item in playlists_tree.get_children():
+        playlists_tree.delete(item)
+
+    first_row = (len(page_state["starts"]) - 1) * PAGE_SIZE
+    for i, playlist in enumerate(playlists, first_row + 1):
+        playlists_tree.insert(
+            "", "end",
+            values=(
+                i,
+                playlist["name"],
+                playlist["owner_name"],
+                playlist["song_count"],
+                format_duration(playlist["total_duration"]),
+                playlist["created_at"].strftime("%Y-%m-%d") if playlist["created_at"] else "",
+                playlist["playlist_id"]
+            )
+        )
+
+    prev_btn.configure(state="normal" if len(page_state["starts"]) > 1 else "disabled")
+    next_btn.configure(state="normal" if next_start else "disabled")
+    stats_label.configure(
+        text=f"Page {len(page_state['starts'])}  ·  Showing {first_row + 1 if playlists else 0}-{first_row + len(playlists)}"
+    )
+
+def reload_from_first_page(*args):
+    """Go back to the first page (after a sort or search change)"""
+    page_state["starts"] = [None]
+    load_page()
+
+def show_next_page():
+    """Load the page after the current one"""
+    if page_state["next_start"]:
+        page_state["starts"].append(page_state["next_start"])
+        load_page()
+
+def show_previous_page():
+    """Load the page before the current one"""
+    if len(page_state["starts"]) > 1:
+        page_state["starts"].pop()
+        load_page()
+
+def confirm_delete_playlist():
+    """Confirm and delete the selected playlist"""
+    selected = playlists_tree.selection()
+    if not selected:
+        messagebox.showwarning("Warning", "Please select a playlist to delete.")
+        return
+
+    playlist_id = playlists_tree.item(selected, 'values')[-1]  # Last column contains playlist_id
+    playlist_name = playlists_tree.item(selected, 'values')[1]  # Second column contains name
+
+    if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete '{playlist_name}'?"):
+        if delete_playlist(playlist_id):
+            messagebox.showinfo("Success", f"Playlist '{playlist_name}' deleted successfully.")
+            load_page()
+        else:
+            messagebox.showerror("Error", "Failed to delete playlist.")
+
+# ------------------- Main Application -------------------
+try:
+    # Verify admin privileges
+    admin = get_admin_info()
+    if not admin:
+        exit()
+
+    # Initialize app
+    ctk.set_appearance_mode("dark")
+    ctk.set_default_color_theme("blue")
+
+    root = ctk.CTk()
+    root.title("Admin - Manage Playlists")
+    root.geometry("1000x600")
+
+    # Main frame
+    main_frame = ctk.CTkFrame(root)
+    main_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+    # Header
+    header_frame = ctk.CTkFrame(main_frame, height=60, fg_color="#1A1A2E")
+    header_frame.pack(fill="x", padx=10, pady=10)
+
+    # Title
+    ctk.CTkLabel(
+        header_frame,
+        text="Manage Playlists",
+        font=("Arial", 24, "bold"),
+        text_color="#B146EC"
+    ).pack(side="left", padx=20)
+
+    # Admin name
+    ctk.CTkLabel(
+        header_frame,
+        text=f"Admin: {admin['first_name']} {admin['last_name']}",
+        font=("Arial", 14)
+    ).pack(side="right", padx=20)
+
+    # Back button
+    back_btn = ctk.CTkButton(
+        header_frame,
+        text="← Back to Dashboard",
+        command=return_to_dashboard,
+        fg_color="#2563EB",
+        hover_color="#1D4ED8",
+        height=32
+    )
+    back_btn.pack(side="right", padx=20)
+
+    # Content area
+    content_frame = ctk.CTkFrame(main_frame, fg_color="#131B2E")
+    content_frame.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+    # Action buttons
+    action_frame = ctk.CTkFrame(content_frame, fg_color="#131B2E", height=50)
+    action_frame.pack(fill="x", padx=20, pady=20)
+
+    # Search by playlist name
+    search_entry = ctk.CTkEntry(
+        action_frame,
+        placeholder_text="Search playlists by name...",
+        width=260,
+        height=40
+    )
+    search_entry.pack(side="left", padx=(0, 10))
+    search_entry.bind("<Return>", reload_from_first_page)
+
+    search_btn = ctk.CTkButton(
+        action_frame,
+        text="🔍 Search",
+        command=reload_from_first_page,
+        fg_color="#2563EB",
+        hover_color="#1D4ED8",
+        width=100,
+        height=40
+    )
+    search_btn.pack(side="left", padx=(0, 10))
+
+    # Sort order
+    sort_menu = ctk.CTkOptionMenu(
+        action_frame,
+        values=list(SORT_OPTIONS),
+        command=reload_from_first_page,
+        fg_color="#1A1A2E",
+        button_color="#B146EC",
+        button_hover_color="#9333EA",
+        height=40
+    )
+    sort_menu.set("Newest")
+    sort_menu.pack(side="left", padx=(0, 10))
+
+    # Delete playlist button
+    delete_btn = ctk.CTkButton(
+        action_frame,
+        text="🗑️ Delete Selected",
+        command=confirm_delete_playlist,
+        fg_color="#DC2626",
+        hover_color="#B91C1C",
+        height=40
+    )
+    delete_btn.pack(side="right")
+
+    # Playlists list with scrollbar
+    playlists_frame = ctk.CTkFrame(content_frame, fg_color="#1A1A2E")
+    playlists_frame.pack(fill="both", expand=True, padx=20, pady=(0, 10))
+
+    # Create Treeview with ttk.Scrollbar
+    tree_frame = ctk.CTkFrame(playlists_frame)
+    tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+    # Create a custom style for the Treeview
+    style = ttk.Style()
+    style.theme_use("default")
+
+    # Configure colors for dark mode
+    style.configure(
+        "Treeview",
+        background="#1E1E2E",
+        foreground="white",
+        fieldbackground="#1E1E2E",
+        borderwidth=0
+    )
+    style.map(
+        "Treeview",
+        background=[("selected", "#B146EC")],
+        foreground=[("selected", "white")]
+    )
+
+    # Add scrollbar
+    tree_scroll = ttk.Scrollbar(tree_frame)
+    tree_scroll.pack(side="right", fill="y")
+
+    # Create Treeview with columns
+    playlists_tree = ttk.Treeview(
+        tree_frame,
+        columns=("id", "name", "owner", "songs", "duration", "created", "playlist_id"),
+        show="headings",
+        height=20,
+        yscrollcommand=tree_scroll.set
+    )
+    playlists_tree.pack(fill="both", expand=True)
+
+    # Configure scrollbar
+    tree_scroll.config(command=playlists_tree.yview)
+
+    # Format columns
+    playlists_tree.heading("id", text="#")
+    playlists_tree.heading("name", text="Playlist")
+    playlists_tree.heading("owner", text="Owner")
+    playlists_tree.heading("songs", text="Songs")
+    playlists_tree.heading("duration", text="Duration")
+    playlists_tree.heading("created", text="Created")
+    playlists_tree.heading("playlist_id", text="ID")
+
+    # Set column widths and alignment
+    playlists_tree.column("id", width=50, anchor="center")
+    playlists_tree.column("name", width=250, anchor="w")
+    playlists_tree.column("owner", width=180, anchor="w")
+    playlists_tree.column("songs", width=80, anchor="center")
+    playlists_tree.column("duration", width=100, anchor="center")
+    playlists_tree.column("created", width=100, anchor="center")
+    playlists_tree.column("playlist_id", width=50, anchor="center")
+
+    # Pagination footer
+    stats_frame = ctk.CTkFrame(content_frame, fg_color="#131B2E", height=30)
+    stats_frame.pack(fill="x", padx=20, pady=(0, 10))
+
+    stats_label = ctk.CTkLabel(
+        stats_frame,
+        text="Loading playlists...",
+        font=("Arial", 12),
+        text_color="#A0A0A0"
+    )
+    stats_label.pack(side="left")
+
+    next_btn = ctk.CTkButton(
+        stats_frame,
+        text="Next ▶",
+        command=show_next_page,
+        fg_color="#2563EB",
+        hover_color="#1D4ED8",
+        width=90,
+        height=28
+    )
+    next_btn.pack(side="right")
+
+    prev_btn = ctk.CTkButton(
+        stats_frame,
+        text="◀ Previous",
+        command=show_previous_page,
+        fg_color="#2563EB",
+        hover_color="#1D4ED8",
+        width=90,
+        height=28
+    )
+    prev_btn.pack(side="right", padx=(0, 10))
+
+    # Load the first page after the UI is created
+    root.after(100, load_page)
+
+    root.mainloop()
+
+except Exception as e:
+    import traceback
+    print(f"Error: {e}")
+    traceback.print_exc()
@@ -0,0 +1,351 @@
+import customtkinter as ctk
+from tkinter import messagebox, ttk
+import mysql.connector
+import subprocess
+import os
+import time
+
+# Width of the text bars drawn next to each value
+BAR_WIDTH = 30
+
+# ------------------- Database Functions -------------------
+def connect_db():
+    """Connect to the MySQL database"""
+    try:
+        connection = mysql.connector.connect(
+            host="localhost",
+            user="root",
+            password="new_password",
+            database="online_music_system"
+        )
+        return connection
+    except mysql.connector.Error as err:
+        messagebox.showerror("Database Connection Error",
+                            f"Failed to connect to database: {err}")
+        return None
+
+def get_admin_info():
+    """Get the current admin information"""
+    try:
+        # Read admin ID from file
+        if not os.path.exists("current_admin.txt"):
+            messagebox.showerror("Error", "Admin session not found!")
+            open_admin_login_page()
+            return None
+
+        with open("current_admin.txt", "r") as f:
+            admin_id = f.read().strip()
+
+        if not admin_id:
+            messagebox.showerror("Error", "Admin ID not found!")
+            open_admin_login_page()
+            return None
+
+        connection = connect_db()
+        if not connection:
+            return None
+
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(
+            "SELECT user_id, first_name, last_name, email FROM Users WHERE user_id = %s AND is_admin = 1",
+            (admin_id,)
+        )
+
+        admin = cursor.fetchone()
+        if not admin:
+            messagebox.showerror("Access Denied", "You do not have admin privileges!")
+            open_admin_login_page()
+            return None
+
+        return admin
+
+    except Exception as e:
+        print(f"Error getting admin info: {e}")
+        return None
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def run_report_query(query, params=()):
+    """Run a query against the summary tables and return (label, value) rows"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return []
+
+        cursor = connection.cursor()
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+    except mysql.connector.Error as e:
+        print(f"Error loading report: {e}")
+        return []
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+# The reports only read the small tables kept by report_summaries.py
+def get_daily_plays(days=30):
+    """Plays per day for the last days"""
+    rows = run_report_query("""
+    SELECT report_date, play_count
+    FROM Report_Daily_Plays
+    ORDER BY report_date DESC
+    LIMIT %s
+    """, (days,))
+    return [(str(day), plays) for day, plays in reversed(rows)]
+
+def get_top_items(item_type, limit=20):
+    """Most played songs, artists or genres of the last 30 days"""
+    rows = run_report_query("""
+    SELECT rank_pos, name, play_count
+    FROM Report_Top_Items
+    WHERE item_type = %s
+    ORDER BY rank_pos
+    LIMIT %s
+    """, (item_type, limit))
+    return [(f"{rank}. {name}", plays) for rank, name, plays in rows]
+
+def get_weekly_users(weeks=12):
+    """New users per week for the last weeks"""
+    rows = run_report_query("""
+    SELECT week_start, new_users
+    FROM Report_Weekly_Users
+    ORDER BY week_start DESC
+    LIMIT %s
+    """, (weeks,))
+    return [(f"Week of {week}", users) for week, users in reversed(rows)]
+
+def get_storage_growth(days=30):
+    """Total storage used by songs per day for the last days"""
+    rows = run_report_query("""
+    SELECT report_date, total_bytes
+    FROM Report_Daily_Storage
+    ORDER BY report_date DESC
+    LIMIT %s
+    """, (days,))
+    return [(str(day), total_bytes) for day, total_bytes in reversed(rows)]
+
+def get_summary_time():
+    """When report_summaries.py last refreshed the summaries"""
+    rows = run_report_query(
+        "SELECT job_name, updated_at FROM Job_State WHERE job_name = 'report_summaries'"
+    )
+    return rows[0][1] if rows else None
+
+def format_file_size(size_bytes):
+    """Format file size from bytes to human-readable format"""
+    if not size_bytes:
+        return "0 B"
+
+    # Define size units
+    units = ['B', 'KB', 'MB', 'GB']
+    size = float(size_bytes)
+    unit_index = 0
+
+    # Convert to appropriate unit
+    while size >= 1024 and unit_index < len(units) - 1:
+        size /= 1024.0
+        unit_index += 1
+
+    # Return formatted size
+    return f"{size:.2f} {units[unit_index]}"
+
+# Report name -> (loader, label heading, value heading, value formatter)
+REPORTS = {
+    "Plays per Day": (get_daily_plays, "Day", "Plays", str),
+    "Top Songs": (lambda: get_top_items("song"), "Song", "Plays", str),
+    "Top Artists": (lambda: get_top_items("artist"), "Artist", "Plays", str),
+    "Top Genres": (lambda: get_top_items("genre"), "Genre", "Plays", str),
+    "New Users": (get_weekly_users, "Week", "Sign-ups", str),
+    "Storage": (get_storage_growth, "Day", "Storage", format_file_size)
+}
+
+# ------------------- Navigation Functions -------------------
+def return_to_dashboard():
+    """Return to admin dashboard"""
+    try:
+        subprocess.Popen(["python", "admin.py"])
+        root.destroy()
+    except Exception as e:
+        messagebox.showerror("Error", f"Unable to open admin dashboard: {e}")
+
+def open_admin_login_page():
+    """Open the admin login page"""
+    try:
+        # Remove admin session
+        if os.path.exists("current_admin.txt"):
+            os.remove("current_admin.txt")
+
+        subprocess.Popen(["python", "admin_login.py"])
+        root.destroy()
+    except Exception as e:
+        messagebox.showerror("Error", f"Unable to open admin login: {e}")
+
+# ------------------- UI Functions -------------------
+def show_report(report_name):
+    """Load a report from its summary table and draw it"""
+    started = time.perf_counter()
+    loader, label_heading, value_heading, formatter = REPORTS[report_name]
+    rows = loader()
+
+    # Clear the treeview
+    for item in report_tree.get_children():
+        report_tree.delete(item)
+
+    report_tree.heading("label", text=label_heading)
+    report_tree.heading("value", text=value_heading)
+
+    # Bars are scaled to the largest value in the report
+    largest = max((value for _, value in rows), default=0) or 1
+    for label, value in rows:
+        report_tree.insert(
+            "", "end",
+            values=(label, formatter(value), "█" * max(1, round(value / largest * BAR_WIDTH)) if value else "")
+        )
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    summary_time = get_summary_time()
+    summary_text = f"Summaries computed {summary_time:%Y-%m-%d %H:%M}" if summary_time else "Summaries not computed yet - run report_summaries.py"
+    stats_label.configure(text=f"{summary_text}  ·  {len(rows)} rows rendered in {elapsed_ms:.0f} ms")
+
+# ------------------- Main Application -------------------
+try:
+    # Verify admin privileges
+    admin = get_admin_info()
+    if not admin:
+        exit()
+
+    # Initialize app
+    ctk.set_appearance_mode("dark")
+    ctk.set_default_color_theme("blue")
+
+    root = ctk.CTk()
+    root.title("Admin - Reports")
+    root.geometry("1000x600")
+
+    # Main frame
+    main_frame = ctk.CTkFrame(root)
+    main_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+    # Header
+    header_frame = ctk.CTkFrame(main_frame, height=60, fg_color="#1A1A2E")
+    header_frame.pack(fill="x", padx=10, pady=10)
+
+    # Title
+    ctk.CTkLabel(
+        header_frame,
+        text="Reports & Analytics",
+        font=("Arial", 24, "bold"),
+        text_color="#B146EC"
+    ).pack(side="left", padx=20)
+
+    # Admin name
+    ctk.CTkLabel(
+        header_frame,
+        text=f"Admin: {admin['first_name']} {admin['last_name']}",
+        font=("Arial", 14)
+    ).pack(side="right", padx=20)
+
+    # Back button
+    back_btn = ctk.CTkButton(
+        header_frame,
+        text="← Back to Dashboard",
+        command=return_to_dashboard,
+        fg_color="#2563EB",
+        hover_color="#1D4ED8",
+        height=32
+    )
+    back_btn.pack(side="right", padx=20)
+
+    # Content area
+    content_frame = ctk.CTkFrame(main_frame, fg_color="#131B2E")
+    content_frame.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+    # Report selector
+    report_selector = ctk.CTkSegmentedButton(
+        content_frame,
+        values=list(REPORTS),
+        selected_color="#B146EC",
+        selected_hover_color="#9333EA",
+        command=show_report
+    )
+    report_selector.pack(fill="x", padx=20, pady=20)
+
+    # Report table with scrollbar
+    report_frame = ctk.CTkFrame(content_frame, fg_color="#1A1A2E")
+    report_frame.pack(fill="both", expand=True, padx=20, pady=(0, 20))
+
+    # Create Treeview with ttk.Scrollbar
+    tree_frame = ctk.CTkFrame(report_frame)
+    tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+    # Create a custom style for the Treeview
+    style = ttk.Style()
+    style.theme_use("default")
+
+    # Configure colors for dark mode
+    style.configure(
+        "Treeview",
+        background="#1E1E2E",
+        foreground="white",
+        fieldbackground="#1E1E2E",
+        borderwidth=0
+    )
+    style.map(
+        "Treeview",
+        background=[("selected", "#B146EC")],
+        foreground=[("selected", "white")]
+    )
+
+    # Add scrollbar
+    tree_scroll = ttk.Scrollbar(tree_frame)
+    tree_scroll.pack(side="right", fill="y")
+
+    # Create Treeview with columns
+    report_tree = ttk.Treeview(
+        tree_frame,
+        columns=("label", "value", "bar"),
+        show="headings",
+        height=20,
+        yscrollcommand=tree_scroll.set
+    )
+    report_tree.pack(fill="both", expand=True)
+
+    # Configure scrollbar
+    tree_scroll.config(command=report_tree.yview)
+
+    # Format columns
+    report_tree.heading("label", text="")
+    report_tree.heading("value", text="")
+    report_tree.heading("bar", text="")
+
+    # Set column widths and alignment
+    report_tree.column("label", width=320, anchor="w")
+    report_tree.column("value", width=120, anchor="e")
+    report_tree.column("bar", width=420, anchor="w")
+
+    # Statistics footer
+    stats_frame = ctk.CTkFrame(content_frame, fg_color="#131B2E", height=30)
+    stats_frame.pack(fill="x", padx=20, pady=(0, 10))
+
+    stats_label = ctk.CTkLabel(
+        stats_frame,
+        text="Loading report...",
+        font=("Arial", 12),
+        text_color="#A0A0A0"
+    )
+    stats_label.pack(side="left")
+
+    # Load the first report after the UI is created
+    report_selector.set("Plays per Day")
+    root.after(100, lambda: show_report("Plays per Day"))
+
+    root.mainloop()
+
+except Exception as e:
+    import traceback
+    print(f"Error: {e}")
+    traceback.print_exc()
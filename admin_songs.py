@@ -4,13 +4,53 @@ import mysql.connector
 import subprocess
 import os
 import io
-import mutagen
-from mutagen.mp3 import MP3
-from mutagen.id3 import ID3
-from mutagen.flac import FLAC
-from mutagen.wave import WAVE
+import re
+import glob
+import threading
+import datetime
+import history_retention
+import song_index
+import upload_worker
 import magic  # For file type detection (install with: pip install python-magic)
 
+# Songs fetched per page as the list is scrolled
+PAGE_SIZE = 100
+
+# Fetch the next page once the view is scrolled past this fraction of the loaded rows
+LOAD_MORE_AT = 0.9
+
+# Filtered song counts stop at this many matches
+COUNT_LIMIT = 10000
+
+# Sort name -> (sort column, descending). Each page is read in index order: Songs
+# columns from their own indexes, Most Played from Song_Stats.idx_play_count and
+# Artist from Artists.idx_name (see song_page_query)
+SORT_OPTIONS = {
+    "Newest": ("s.upload_date", True),
+    "Title": ("s.title", False),
+    "Artist": ("a.name", False),
+    "Largest": ("s.file_size", True),
+    "Most Played": ("ss.play_count", True)
+}
+
+# Bulk deletes remove this many songs per transaction
+DELETE_CHUNK = 500
+
+# Each sync re-reads this many seconds before the last one, to catch late commits
+SYNC_OVERLAP_SECONDS = 5
+
+# Loaded rows of the song list: keyset start of the next page, total estimate and last sync time
+list_state = {"next_start": None, "loading": False, "total": (0, False), "synced_at": None}
+
+# Genre name -> genre_id for the genre filter
+genre_ids = {}
+
+# How often upload progress is redrawn
+UPLOAD_POLL_MS = 200
+
+# The uploads window and, per job ID, the upload's job and progress widgets
+uploads_state = {"window": None, "frame": None, "rows": {}, "polling": False}
+
 # ------------------- Database Functions -------------------
 def connect_db():
     """Connect to the MySQL database"""
@@ -70,78 +110,316 @@ def get_admin_info():
             cursor.close()
             connection.close()
 
-def get_all_songs():
-    """Get all songs from the database"""
+def song_filters(title="", artist="", genre_id=None):
+    """WHERE conditions and parameters for the column filters (title and artist match by prefix)
+
+    Returns the conditions on Songs and those on Artists separately, so Artists is
+    only joined when the artist filter or sort needs it.
+    """
+    song_conditions = []
+    song_params = []
+    artist_conditions = []
+    artist_params = []
+    if title:
+        song_conditions.append("s.title LIKE %s")
+        song_params.append(title.replace("%", r"\%").replace("_", r"\_") + "%")
+    if genre_id:
+        song_conditions.append("s.genre_id = %s")
+        song_params.append(genre_id)
+    if artist:
+        artist_conditions.append("a.name LIKE %s")
+        artist_params.append(artist.replace("%", r"\%").replace("_", r"\_") + "%")
+    return song_conditions, song_params, artist_conditions, artist_params
+
+def where_clause(conditions):
+    """Join conditions into a WHERE clause (empty when there are none)"""
+    return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+def song_page_query(sort, title, artist, genre_id, start, limit):
+    """Inner query picking one page of (song_id, sort_value, sort_group) in index order, and its parameters"""
+    song_conditions, song_params, artist_conditions, artist_params = song_filters(title, artist, genre_id)
+    artist_join = "JOIN Artists a ON s.artist_id = a.artist_id" if artist_conditions else ""
+    column, descending = SORT_OPTIONS[sort]
+    compare = "<" if descending else ">"
+    direction = "DESC" if descending else "ASC"
+    
+    if sort == "Artist":
+        # Artists are walked in name order on idx_name, skipping those with no matching
+        # song; each one's songs are then read in ID order on the artist_id index.
+        # Only limit + 1 artists and limit + 1 songs per artist are ever sorted.
+        outer_conditions = artist_conditions + [
+            f"EXISTS (SELECT 1 FROM Songs s WHERE {' AND '.join(['s.artist_id = a.artist_id'] + song_conditions)})"
+        ]
+        outer_params = artist_params + song_params
+        inner_conditions = ["s.artist_id = a.artist_id"] + song_conditions
+        inner_params = list(song_params)
+        if start is not None:
+            # Seek past the last (artist name, artist ID, song ID) of the previous page
+            outer_conditions.append("(a.name > %s OR (a.name = %s AND a.artist_id >= %s))")
+            outer_params.extend([start[0], start[0], start[1]])
+            inner_conditions.append("(a.artist_id <> %s OR s.song_id > %s)")
+            inner_params.extend([start[1], start[2]])
+        
+        query = f"""
+        SELECT s.song_id, a.name AS sort_value, a.artist_id AS sort_group
+        FROM (
+            SELECT a.artist_id, a.name
+            FROM Artists a
+            {where_clause(outer_conditions)}
+            ORDER BY a.name, a.artist_id
+            LIMIT %s
+        ) a,
+        LATERAL (
+            SELECT s.song_id
+            FROM Songs s
+            {where_clause(inner_conditions)}
+            ORDER BY s.song_id
+            LIMIT %s
+        ) s
+        ORDER BY a.name, a.artist_id, s.song_id
+        LIMIT %s
+        """
+        return query, outer_params + [limit + 1] + inner_params + [limit + 1, limit + 1]
+    
+    conditions = song_conditions + artist_conditions
+    params = song_params + artist_params
+    
+    if sort == "Most Played":
+        # Song_Stats has a row for every song, so the page is read straight off
+        # idx_play_count; Songs is only joined to filter
+        id_column = "ss.song_id"
+        source = "Song_Stats ss"
+        if conditions:
+            source += f" JOIN Songs s ON s.song_id = ss.song_id {artist_join}"
+    else:
+        id_column = "s.song_id"
+        source = f"Songs s {artist_join}"
+    
+    if start is not None:
+        # Seek past the last row of the previous page instead of using OFFSET
+        conditions.append(f"({column} {compare} %s OR ({column} = %s AND {id_column} {compare} %s))")
+        params.extend([start[0], start[0], start[1]])
+    
+    query = f"""
+    SELECT {id_column} AS song_id, {column} AS sort_value, NULL AS sort_group
+    FROM {source}
+    {where_clause(conditions)}
+    ORDER BY {column} {direction}, {id_column} {direction}
+    LIMIT %s
+    """
+    return query, params + [limit + 1]
+
+def get_songs_page(sort="Newest", title="", artist="", genre_id=None, start=None, limit=PAGE_SIZE, since=None):
+    """Get one page of songs after the keyset start, plus the start of the next page
+
+    With since, get the songs matching the filters that changed after that time instead
+    (newest first; changes since a sync are few, so they are not paged).
+    """
     try:
         connection = connect_db()
         if not connection:
-            return []
+            return [], None
             
         cursor = connection.cursor(dictionary=True)
         
-        query = """
-        SELECT s.song_id, s.title, a.name as artist_name, al.title as album_name,
-               g.name as genre_name, s.duration, s.file_size, s.file_type, s.upload_date
-        FROM Songs s
-        JOIN Artists a ON s.artist_id = a.artist_id
-        LEFT JOIN Albums al ON s.album_id = al.album_id
+        if since is None:
+            page_query, params = song_page_query(sort, title, artist, genre_id, start, limit)
+            direction = "DESC" if SORT_OPTIONS[sort][1] else "ASC"
+        else:
+            song_conditions, song_params, artist_conditions, artist_params = song_filters(title, artist, genre_id)
+            artist_join = "JOIN Artists a ON s.artist_id = a.artist_id" if artist_conditions else ""
+            page_query = f"""
+            SELECT s.song_id, s.upload_date AS sort_value, NULL AS sort_group
+            FROM Songs s {artist_join}
+            {where_clause(song_conditions + artist_conditions + ["s.updated_at >= %s"])}
+            """
+            params = song_params + artist_params + [since]
+            direction = "DESC"
+        
+        # The inner query picks the page's IDs in index order; only those rows are
+        # then looked up and joined for display
+        query = f"""
+        SELECT s.song_id, s.title, a.name AS artist_name, g.name AS genre_name,
+               s.duration, s.file_size, s.upload_date,
+               COALESCE(ss.play_count, 0) AS plays,
+               COALESCE(sls.listeners, 0) AS listeners,
+               page.sort_value, page.sort_group
+        FROM ({page_query}) page
+        JOIN Songs s ON s.song_id = page.song_id
+        LEFT JOIN Artists a ON s.artist_id = a.artist_id
         LEFT JOIN Genres g ON s.genre_id = g.genre_id
-        ORDER BY s.upload_date DESC
+        LEFT JOIN Song_Stats ss ON s.song_id = ss.song_id
+        LEFT JOIN Song_Listener_Sketches sls ON s.song_id = sls.song_id
+        ORDER BY page.sort_value {direction}, page.sort_group, page.song_id {direction}
         """
         
-        cursor.execute(query)
+        cursor.execute(query, params)
         songs = cursor.fetchall()
         
-        # Format durations to MM:SS
+        # Only the rows on this page are formatted
         for song in songs:
+            # Format durations to MM:SS
             minutes, seconds = divmod(song['duration'] or 0, 60)
             song['duration_formatted'] = f"{minutes}:{seconds:02d}"
             
             # Format file size
             song['file_size_formatted'] = format_file_size(song['file_size'])
         
-        return songs
+        if since is not None:
+            return songs, None
+        
+        # One extra row tells whether there is a next page
+        next_start = None
+        if len(songs) > limit:
+            songs = songs[:limit]
+            last = songs[-1]
+            if sort == "Artist":
+                next_start = (last["sort_value"], last["sort_group"], last["song_id"])
+            else:
+                next_start = (last["sort_value"], last["song_id"])
+        
+        return songs, next_start
         
     except mysql.connector.Error as e:
         print(f"Error fetching songs: {e}")
-        return []
+        return [], None
     finally:
         if 'connection' in locals() and connection and connection.is_connected():
             cursor.close()
             connection.close()
 
-def delete_song(song_id):
-    """Delete a song from the database"""
+def count_songs(title="", artist="", genre_id=None):
+    """Estimate how many songs match the filters, as (count, more); more means there are at least count"""
     try:
         connection = connect_db()
         if not connection:
-            return False
+            return 0, False
             
         cursor = connection.cursor()
         
-        # First delete from related tables to avoid foreign key constraints
-        tables = [
-            "Playlist_Songs",
-            "User_Favorites",
-            "Listening_History"
-        ]
+        song_conditions, song_params, artist_conditions, artist_params = song_filters(title, artist, genre_id)
+        conditions = song_conditions + artist_conditions
+        if not conditions:
+            # The unfiltered total is kept up to date by triggers
+            cursor.execute("SELECT value FROM System_Counters WHERE counter_name = 'songs'")
+            row = cursor.fetchone()
+            return (row[0] if row else 0), False
         
-        for table in tables:
-            cursor.execute(f"DELETE FROM {table} WHERE song_id = %s", (song_id,))
+        # Filtered totals stop counting at COUNT_LIMIT rows
+        cursor.execute(f"""
+        SELECT COUNT(*) FROM (
+            SELECT 1
+            FROM Songs s
+            {"JOIN Artists a ON s.artist_id = a.artist_id" if artist_conditions else ""}
+            WHERE {' AND '.join(conditions)}
+            LIMIT %s
+        ) matches
+        """, song_params + artist_params + [COUNT_LIMIT + 1])
+        count = cursor.fetchone()[0]
+        return min(count, COUNT_LIMIT), count > COUNT_LIMIT
         
-        # Now delete the song itself
-        cursor.execute("DELETE FROM Songs WHERE song_id = %s", (song_id,))
+    except mysql.connector.Error as e:
+        print(f"Error counting songs: {e}")
+        return 0, False
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def get_sync_time():
+    """Database time to sync from next (a little early, to catch late commits)"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return None
+            
+        cursor = connection.cursor()
+        cursor.execute("SELECT NOW() - INTERVAL %s SECOND", (SYNC_OVERLAP_SECONDS,))
+        return cursor.fetchone()[0]
         
-        connection.commit()
-        return True
+    except mysql.connector.Error as e:
+        print(f"Error reading database time: {e}")
+        return None
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def get_deleted_song_ids(since):
+    """Get the IDs of songs deleted since a sync time"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return []
+            
+        cursor = connection.cursor()
+        cursor.execute(
+            "SELECT row_id FROM Deleted_Rows WHERE table_name = 'Songs' AND deleted_at >= %s",
+            (since,)
+        )
+        return [row[0] for row in cursor.fetchall()]
+        
+    except mysql.connector.Error as e:
+        print(f"Error fetching deleted songs: {e}")
+        return []
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def delete_songs(song_ids):
+    """Delete songs in chunks, one transaction per chunk; returns the IDs actually deleted"""
+    song_ids = [int(song_id) for song_id in song_ids]
+    deleted = []
+    try:
+        connection = connect_db()
+        if not connection:
+            return deleted
+            
+        cursor = connection.cursor()
+        
+        for i in range(0, len(song_ids), DELETE_CHUNK):
+            chunk = song_ids[i:i + DELETE_CHUNK]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            
+            # Playlist_Songs is cleared explicitly because cascades do not fire the triggers
+            # that keep playlist totals; Listening_History is partitioned and has no foreign
+            # keys. Every other song table cascades from Songs.
+            cursor.execute(f"DELETE FROM Playlist_Songs WHERE song_id IN ({placeholders})", chunk)
+            cursor.execute(f"DELETE FROM Listening_History WHERE song_id IN ({placeholders})", chunk)
+            cursor.execute(f"DELETE FROM Songs WHERE song_id IN ({placeholders})", chunk)
+            
+            connection.commit()
+            deleted.extend(chunk)
+        
+        return deleted
         
     except mysql.connector.Error as e:
-        print(f"Error deleting song: {e}")
-        return False
+        print(f"Error deleting songs: {e}")
+        return deleted
     finally:
         if 'connection' in locals() and connection and connection.is_connected():
             cursor.close()
             connection.close()
+        # Whatever was deleted is cleaned up off the UI thread
+        if deleted:
+            threading.Thread(target=clean_up_deleted_songs, args=(deleted,), daemon=True).start()
+
+def clean_up_deleted_songs(song_ids):
+    """Drop deleted songs from the similar-songs index and remove their cached audio files"""
+    try:
+        # Keep the similar-songs index in step with the catalogue
+        song_index.remove_songs(song_ids)
+    except Exception as e:
+        print(f"Error updating the song index: {e}")
+    
+    # Players cache songs as temp/song_<id>.<type>
+    for song_id in song_ids:
+        for path in glob.glob(os.path.join("temp", f"song_{song_id}.*")):
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Error removing cached song file: {e}")
 
 def get_artists():
     """Get list of artists from the database"""
@@ -228,68 +506,6 @@ def format_file_size(size_bytes):
     # Return formatted size
     return f"{size:.2f} {units[unit_index]}"
 
-def upload_song(file_path, title, artist_id, genre_id=None):
-    """Upload a song to the database"""
-    try:
-        if not os.path.exists(file_path):
-            messagebox.showerror("Error", f"File not found: {file_path}")
-            return None
-        
-        # Get file information
-        file_size = os.path.getsize(file_path)
-        file_type = os.path.splitext(file_path)[1][1:].lower()  # Get extension without dot
-        
-        # Get song duration using mutagen
-        try:
-            if file_type == 'mp3':
-                audio = MP3(file_path)
-            elif file_type == 'flac':
-                audio = FLAC(file_path)
-            elif file_type in ['wav', 'wave']:
-                audio = WAVE(file_path)
-            else:
-                # Fallback for other formats
-                audio = mutagen.File(file_path)
-                
-            duration = int(audio.info.length)
-        except Exception as e:
-            print(f"Error getting audio duration: {e}")
-            duration = 0
-        
-        # Read file binary data
-        with open(file_path, 'rb') as file:
-            file_data = file.read()
-        
-        # Insert into database
-        connection = connect_db()
-        if not connection:
-            return None
-            
-        cursor = connection.cursor()
-        
-        query = """
-        INSERT INTO Songs (title, artist_id, genre_id, duration, file_data, file_type, file_size)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        values = (title, artist_id, genre_id, duration, file_data, file_type, file_size)
-        
-        cursor.execute(query, values)
-        connection.commit()
-        
-        # Return the new song ID
-        new_song_id = cursor.lastrowid
-        return new_song_id
-        
-    except mysql.connector.Error as e:
-        print(f"Error uploading song: {e}")
-        messagebox.showerror("Database Error", f"Failed to upload song: {e}")
-        return None
-    finally:
-        if 'connection' in locals() and connection and connection.is_connected():
-            cursor.close()
-            connection.close()
-
 # ------------------- Navigation Functions -------------------
 def return_to_dashboard():
     """Return to admin dashboard"""
@@ -312,53 +528,322 @@ def open_admin_login_page():
         messagebox.showerror("Error", f"Unable to open admin login: {e}")
 
 # ------------------- UI Functions -------------------
-def refresh_song_list():
-    """Refresh the song list display"""
+def song_row_values(number, song):
+    """Treeview values for one song"""
+    return (
+        number,
+        song["title"], 
+        song["artist_name"] or "", 
+        song["genre_name"] or "", 
+        song["duration_formatted"], 
+        song["file_size_formatted"],
+        song["plays"],
+        song["listeners"],
+        song["song_id"]
+    )
+
+def current_filters():
+    """The sort and column filters currently chosen above the list"""
+    return {
+        "sort": sort_menu.get(),
+        "title": title_filter.get().strip(),
+        "artist": artist_filter.get().strip(),
+        "genre_id": genre_ids.get(genre_filter.get())
+    }
+
+def update_song_stats():
+    """Show how many songs are loaded out of the estimated total"""
+    count, more = list_state["total"]
+    total = f"{count:,}+" if more else f"{count:,}"
+    stats_label.configure(text=f"Showing {len(songs_tree.get_children()):,} of {total} songs")
+
+def refresh_song_list(*args):
+    """Reload the song list from the first page (the Refresh button and filter changes)"""
+    filters = current_filters()
+    synced_at = get_sync_time()
+    songs, next_start = get_songs_page(**filters)
+    list_state["next_start"] = next_start
+    list_state["loading"] = False
+    list_state["synced_at"] = synced_at
+    list_state["total"] = count_songs(filters["title"], filters["artist"], filters["genre_id"])
+    
     # Clear the treeview
     for item in songs_tree.get_children():
         songs_tree.delete(item)
+    songs_tree.yview_moveto(0)
     
-    # Get updated songs
-    songs = get_all_songs()
-    
-    # Add songs to treeview
+    # Add songs to treeview; the item ID is the song ID so later syncs can find them
     for i, song in enumerate(songs, 1):
-        songs_tree.insert(
-            "", "end", 
-            values=(
-                i,
-                song["title"], 
-                song["artist_name"], 
-                song["genre_name"] or "", 
-                song["duration_formatted"], 
-                song["file_size_formatted"],
-                song["song_id"]
-            )
-        )
+        songs_tree.insert("", "end", iid=str(song["song_id"]), values=song_row_values(i, song))
+    
+    update_song_stats()
+
+def load_next_page():
+    """Append the next page of songs to the list"""
+    if not list_state["next_start"]:
+        list_state["loading"] = False
+        return
+    
+    songs, next_start = get_songs_page(start=list_state["next_start"], **current_filters())
+    list_state["next_start"] = next_start
+    
+    number = len(songs_tree.get_children())
+    for song in songs:
+        iid = str(song["song_id"])
+        # A sync may already have added this song at the top
+        if songs_tree.exists(iid):
+            continue
+        number += 1
+        songs_tree.insert("", "end", iid=iid, values=song_row_values(number, song))
+    
+    list_state["loading"] = False
+    update_song_stats()
+
+def on_song_list_scroll(first, last):
+    """Move the scrollbar, and fetch the next page when the view nears the end of the loaded rows"""
+    tree_scroll.set(first, last)
+    if float(last) >= LOAD_MORE_AT and list_state["next_start"] and not list_state["loading"]:
+        list_state["loading"] = True
+        root.after_idle(load_next_page)
+
+def sync_song_list():
+    """Apply only the songs added, changed or deleted since the last load or sync"""
+    if list_state["synced_at"] is None:
+        refresh_song_list()
+        return
+    
+    since = list_state["synced_at"]
+    filters = current_filters()
+    synced_at = get_sync_time()
+    if synced_at is None:
+        return
+    
+    # Older tombstones are pruned, so a list last synced before then may miss deletions
+    if synced_at - since >= datetime.timedelta(days=history_retention.TOMBSTONE_DAYS):
+        refresh_song_list()
+        return
+    
+    changed, _ = get_songs_page(since=since, **filters)
+    deleted = get_deleted_song_ids(since)
+    list_state["synced_at"] = synced_at
+    
+    # Row numbers only need fixing from the first row that moved
+    renumber_from = None
+    
+    for song_id in deleted:
+        if songs_tree.exists(str(song_id)):
+            index = songs_tree.index(str(song_id))
+            renumber_from = index if renumber_from is None else min(renumber_from, index)
+            songs_tree.delete(str(song_id))
+    
+    # Oldest first, so new uploads end up newest-first at the top. In other sort
+    # orders a new song's place is not known until the list is reloaded.
+    for song in reversed(changed):
+        iid = str(song["song_id"])
+        if songs_tree.exists(iid):
+            number = songs_tree.set(iid, "id")
+            songs_tree.item(iid, values=song_row_values(number, song))
+        elif filters["sort"] == "Newest" and song["upload_date"] >= since:
+            songs_tree.insert("", 0, iid=iid, values=song_row_values(0, song))
+            renumber_from = 0
+    
+    if renumber_from is not None:
+        items = songs_tree.get_children()
+        for number, iid in enumerate(items[renumber_from:], renumber_from + 1):
+            songs_tree.set(iid, "id", number)
+    
+    filters.pop("sort")
+    list_state["total"] = count_songs(**filters)
+    update_song_stats()
 
 def confirm_delete_song():
-    """Confirm and delete selected song"""
+    """Confirm and delete the selected songs"""
     selected = songs_tree.selection()
     if not selected:
-        messagebox.showwarning("Selection Required", "Please select a song to delete.")
+        messagebox.showwarning("Selection Required", "Please select one or more songs to delete.")
         return
     
-    # Get the song ID from the selected item
-    song_id = songs_tree.item(selected, 'values')[-1]  # Last column contains song_id
-    song_title = songs_tree.item(selected, 'values')[1]  # Second column contains title
+    # Item IDs are song IDs; the second column contains the title
+    song_ids = list(selected)
+    if len(song_ids) == 1:
+        description = f"the song '{songs_tree.item(selected[0], 'values')[1]}'"
+    else:
+        description = f"{len(song_ids)} songs"
     
     # Confirmation dialog
     confirm = messagebox.askyesno(
         "Confirm Delete", 
-        f"Are you sure you want to delete the song '{song_title}'?\n\nThis action cannot be undone."
+        f"Are you sure you want to delete {description}?\n\nThis action cannot be undone."
     )
     
     if confirm:
-        if delete_song(song_id):
-            messagebox.showinfo("Success", f"Song '{song_title}' deleted successfully!")
-            refresh_song_list()
+        root.configure(cursor="watch")
+        root.update_idletasks()
+        deleted = delete_songs(song_ids)
+        root.configure(cursor="")
+        
+        if len(deleted) == len(song_ids):
+            messagebox.showinfo("Success", f"Deleted {description} successfully!")
+        elif deleted:
+            messagebox.showwarning("Partly Deleted", f"Deleted {len(deleted)} of {len(song_ids)} songs. Check console for details.")
         else:
-            messagebox.showerror("Error", f"Failed to delete song '{song_title}'.")
+            messagebox.showerror("Error", f"Failed to delete {description}.")
+        sync_song_list()
+
+def show_upload(job):
+    """Add an upload to the uploads window, opening the window if needed"""
+    if uploads_state["window"] is None:
+        window = ctk.CTkToplevel(root)
+        window.title("Uploads")
+        window.geometry("560x300")
+        window.transient(root)
+        
+        # Closing only hides the window, so running uploads keep their progress rows
+        window.protocol("WM_DELETE_WINDOW", window.withdraw)
+        
+        uploads_frame = ctk.CTkScrollableFrame(window, fg_color="#131B2E")
+        uploads_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        uploads_state["window"] = window
+        uploads_state["frame"] = uploads_frame
+    else:
+        uploads_state["window"].deiconify()
+    
+    row = ctk.CTkFrame(uploads_state["frame"], fg_color="#1A1A2E")
+    row.pack(fill="x", pady=5)
+    
+    ctk.CTkLabel(row, text=job["title"], font=("Arial", 13, "bold"), anchor="w").pack(fill="x", padx=10, pady=(5, 0))
+    
+    progress_bar = ctk.CTkProgressBar(row, progress_color="#B146EC")
+    progress_bar.set(0)
+    progress_bar.pack(side="left", fill="x", expand=True, padx=10, pady=5)
+    
+    status_label = ctk.CTkLabel(row, text="Queued", font=("Arial", 12), text_color="#A0A0A0", width=170)
+    status_label.pack(side="left")
+    
+    cancel_btn = ctk.CTkButton(
+        row,
+        text="Cancel",
+        command=lambda: upload_worker.cancel(job),
+        fg_color="#DC2626",
+        hover_color="#B91C1C",
+        width=70
+    )
+    cancel_btn.pack(side="left", padx=10)
+    
+    uploads_state["rows"][job["job_id"]] = (job, progress_bar, status_label, cancel_btn)
+    
+    if not uploads_state["polling"]:
+        uploads_state["polling"] = True
+        root.after(UPLOAD_POLL_MS, update_uploads)
+
+def update_uploads():
+    """Redraw upload progress and handle finished uploads (runs on the UI thread)"""
+    for job, progress_bar, status_label, cancel_btn in uploads_state["rows"].values():
+        if job["status"] == "uploading" and job["size"]:
+            progress_bar.set(job["sent"] / job["size"])
+            status_label.configure(text=f"{format_file_size(job['sent'])} / {format_file_size(job['size'])}")
+        elif job["status"] == "storing":
+            progress_bar.set(1)
+            status_label.configure(text="Saving...")
+            cancel_btn.configure(state="disabled")
+    
+    finished = upload_worker.collect_finished()
+    for job in finished:
+        if job["job_id"] not in uploads_state["rows"]:
+            continue
+        _, progress_bar, status_label, cancel_btn = uploads_state["rows"].pop(job["job_id"])
+        cancel_btn.configure(state="disabled")
+        if job["status"] == "done":
+            progress_bar.set(1)
+            status_label.configure(text="Uploaded", text_color="#16A34A")
+        elif job["status"] == "cancelled":
+            status_label.configure(text="Cancelled")
+        else:
+            status_label.configure(text="Failed", text_color="#DC2626")
+            messagebox.showerror("Error", f"Failed to upload '{job['title']}': {job['error']}")
+    
+    if any(job["status"] == "done" for job in finished):
+        sync_song_list()
+    
+    if uploads_state["rows"]:
+        root.after(UPLOAD_POLL_MS, update_uploads)
+    else:
+        uploads_state["polling"] = False
+
+def handle_import_folder():
+    """Import a whole folder tree of songs with bulk_import.py, showing its progress"""
+    folder = filedialog.askdirectory(title="Select a folder to import")
+    if not folder:  # User cancelled
+        return
+    
+    # Create progress dialog
+    import_dialog = ctk.CTkToplevel(root)
+    import_dialog.title("Import Folder")
+    import_dialog.geometry("450x200")
+    import_dialog.transient(root)
+    
+    ctk.CTkLabel(
+        import_dialog, 
+        text="Importing Songs", 
+        font=("Arial", 18, "bold")
+    ).pack(pady=(20, 15))
+    
+    import_progress = ctk.CTkProgressBar(import_dialog, width=380, progress_color="#B146EC")
+    import_progress.set(0)
+    import_progress.pack(pady=5)
+    
+    import_label = ctk.CTkLabel(import_dialog, text="Scanning folder...", font=("Arial", 12), wraplength=400)
+    import_label.pack(pady=10)
+    
+    # The importer runs as its own process since it uses a process pool;
+    # its progress lines are read on a thread
+    import_state = {"done": 0, "total": 0, "message": "Scanning folder...", "finished": False}
+    process = subprocess.Popen(
+        ["python", "bulk_import.py", folder, "--skip-features"],
+        stdout=subprocess.PIPE,
+        text=True,
+        bufsize=1
+    )
+    
+    def read_progress():
+        for line in process.stdout:
+            match = re.match(r"\[(\d+)/(\d+)\] (.*)", line.strip())
+            if match:
+                import_state["done"] = int(match.group(1))
+                import_state["total"] = int(match.group(2))
+                import_state["message"] = match.group(3)
+        process.wait()
+        import_state["finished"] = True
+        
+        # Finish here rather than in the dialog, which the admin may already have closed:
+        # decode and analyse the new songs in the background, and show them in the list
+        subprocess.Popen(["python", "audio_features.py"])
+        root.after(0, sync_song_list)
+    
+    threading.Thread(target=read_progress, daemon=True).start()
+    
+    def show_progress():
+        if not import_dialog.winfo_exists():
+            return
+        if import_state["total"]:
+            import_progress.set(import_state["done"] / import_state["total"])
+        import_label.configure(text=import_state["message"])
+        
+        if import_state["finished"]:
+            import_progress.set(1)
+            import_label.configure(text=f"{import_state['message']}\nAudio features are extracted in the background.")
+            ctk.CTkButton(
+                import_dialog,
+                text="Close",
+                command=import_dialog.destroy,
+                fg_color="#B146EC",
+                hover_color="#9333EA"
+            ).pack(pady=10)
+        else:
+            import_dialog.after(250, show_progress)
+    
+    show_progress()
 
 def handle_upload_song():
     """Handle the song upload process"""
@@ -494,15 +979,15 @@ def handle_upload_song():
         genre_index = genre_names.index(genre_name)
         genre_id = genre_ids[genre_index]
         
-        # Upload song
-        song_id = upload_song(file_path, title, artist_id, genre_id)
+        # Upload song in the background; its progress is shown in the uploads window
+        try:
+            job = upload_worker.submit(file_path, title, artist_id, genre_id)
+        except OSError as e:
+            messagebox.showerror("Error", f"File not found: {e}")
+            return
         
-        if song_id:
-            messagebox.showinfo("Success", f"Song '{title}' uploaded successfully!")
-            upload_dialog.destroy()
-            refresh_song_list()
-        else:
-            messagebox.showerror("Error", "Failed to upload song.")
+        upload_dialog.destroy()
+        show_upload(job)
     
     upload_btn = ctk.CTkButton(
         upload_dialog,
@@ -581,10 +1066,21 @@ try:
     )
     upload_btn.pack(side="left", padx=(0, 10))
     
+    # Import folder button
+    import_btn = ctk.CTkButton(
+        action_frame,
+        text="📁 Import Folder",
+        command=handle_import_folder,
+        fg_color="#2563EB",
+        hover_color="#1D4ED8",
+        height=40
+    )
+    import_btn.pack(side="left", padx=(0, 10))
+    
     # Delete button
     delete_btn = ctk.CTkButton(
         action_frame,
-        text="🗑️ Delete Selected Song",
+        text="🗑️ Delete Selected",
         command=confirm_delete_song,
         fg_color="#DC2626",
         hover_color="#B91C1C",
@@ -603,6 +1099,55 @@ try:
     )
     refresh_btn.pack(side="right")
     
+    # Sort and column filters
+    filter_frame = ctk.CTkFrame(content_frame, fg_color="#131B2E", height=40)
+    filter_frame.pack(fill="x", padx=20, pady=(0, 10))
+    
+    title_filter = ctk.CTkEntry(
+        filter_frame,
+        placeholder_text="Title starts with...",
+        width=200,
+        height=36
+    )
+    title_filter.pack(side="left", padx=(0, 10))
+    title_filter.bind("<Return>", refresh_song_list)
+    
+    artist_filter = ctk.CTkEntry(
+        filter_frame,
+        placeholder_text="Artist starts with...",
+        width=200,
+        height=36
+    )
+    artist_filter.pack(side="left", padx=(0, 10))
+    artist_filter.bind("<Return>", refresh_song_list)
+    
+    genre_ids.update({genre["name"]: genre["genre_id"] for genre in get_genres()})
+    genre_filter = ctk.CTkOptionMenu(
+        filter_frame,
+        values=["All Genres"] + list(genre_ids),
+        command=refresh_song_list,
+        fg_color="#1A1A2E",
+        button_color="#B146EC",
+        button_hover_color="#9333EA",
+        height=36
+    )
+    genre_filter.set("All Genres")
+    genre_filter.pack(side="left", padx=(0, 10))
+    
+    ctk.CTkLabel(filter_frame, text="Sort by:", font=("Arial", 12)).pack(side="left", padx=(10, 5))
+    
+    sort_menu = ctk.CTkOptionMenu(
+        filter_frame,
+        values=list(SORT_OPTIONS),
+        command=refresh_song_list,
+        fg_color="#1A1A2E",
+        button_color="#B146EC",
+        button_hover_color="#9333EA",
+        height=36
+    )
+    sort_menu.set("Newest")
+    sort_menu.pack(side="left")
+    
     # Songs list with scrollbar
     songs_frame = ctk.CTkFrame(content_frame, fg_color="#1A1A2E")
     songs_frame.pack(fill="both", expand=True, padx=20, pady=(0, 20))
@@ -636,10 +1181,10 @@ try:
     # Create Treeview with columns
     songs_tree = ttk.Treeview(
         tree_frame,
-        columns=("id", "title", "artist", "genre", "duration", "size", "song_id"),
+        columns=("id", "title", "artist", "genre", "duration", "size", "plays", "listeners", "song_id"),
         show="headings",
         height=20,
-        yscrollcommand=tree_scroll.set
+        yscrollcommand=on_song_list_scroll
     )
     songs_tree.pack(fill="both", expand=True)
     
@@ -653,15 +1198,19 @@ try:
     songs_tree.heading("genre", text="Genre")
     songs_tree.heading("duration", text="Duration")
     songs_tree.heading("size", text="Size")
+    songs_tree.heading("plays", text="Plays")
+    songs_tree.heading("listeners", text="Listeners")
     songs_tree.heading("song_id", text="ID")
     
     # Set column widths and alignment
     songs_tree.column("id", width=50, anchor="center")
-    songs_tree.column("title", width=250, anchor="w")
-    songs_tree.column("artist", width=150, anchor="w")
-    songs_tree.column("genre", width=100, anchor="w")
+    songs_tree.column("title", width=190, anchor="w")
+    songs_tree.column("artist", width=100, anchor="w")
+    songs_tree.column("genre", width=90, anchor="w")
     songs_tree.column("duration", width=80, anchor="center")
     songs_tree.column("size", width=80, anchor="e")
+    songs_tree.column("plays", width=70, anchor="e")
+    songs_tree.column("listeners", width=80, anchor="e")
     songs_tree.column("song_id", width=50, anchor="center")
     
     # Statistics footer
@@ -677,10 +1226,7 @@ try:
     stats_label.pack(side="left")
     
     # Load songs after the UI is created
-    root.after(100, lambda: [
-        refresh_song_list(),
-        stats_label.configure(text=f"Total Songs: {len(songs_tree.get_children())}")
-    ])
+    root.after(100, refresh_song_list)
     
     root.mainloop()
     
@@ -4,6 +4,17 @@ import mysql.connector
 import subprocess
 import os
 import hashlib
+import datetime
+import history_retention
+
+# Users shown per page
+PAGE_SIZE = 50
+
+# Keyset pagination: the (created_at, user_id) after which each visited page starts
+page_state = {"starts": [None], "next_start": None, "synced_at": None}
+
+# Each sync re-reads this many seconds before the last one, to catch late commits
+SYNC_OVERLAP_SECONDS = 5
 
 # ------------------- Database Functions -------------------
 def connect_db():
@@ -64,33 +75,109 @@ def get_admin_info():
             cursor.close()
             connection.close()
 
-def get_all_users():
-    """Get all users from the database"""
+def get_users_page(search="", start=None, limit=PAGE_SIZE, since=None):
+    """Get one page of users (newest first) after the keyset start, plus the start of the next page
+
+    With since, get the users matching the search that changed after that time instead.
+    """
     try:
         connection = connect_db()
         if not connection:
-            return []
+            return [], None
             
         cursor = connection.cursor(dictionary=True)
         
-        query = """
-        SELECT u.user_id, u.first_name, u.last_name, u.email, u.is_admin, u.created_at,
-               COUNT(DISTINCT p.playlist_id) as playlist_count,
-               COUNT(DISTINCT lh.history_id) as listening_count
-        FROM Users u
-        LEFT JOIN Playlists p ON u.user_id = p.user_id
-        LEFT JOIN Listening_History lh ON u.user_id = lh.user_id
-        GROUP BY u.user_id
-        ORDER BY u.created_at DESC
+        conditions = []
+        params = []
+        if search:
+            # Prefix match on name or email
+            pattern = search.replace("%", r"\%").replace("_", r"\_") + "%"
+            conditions.append("(u.first_name LIKE %s OR u.last_name LIKE %s OR u.email LIKE %s)")
+            params.extend([pattern, pattern, pattern])
+        if start is not None:
+            # Seek past the last row of the previous page instead of using OFFSET
+            conditions.append("(u.created_at < %s OR (u.created_at = %s AND u.user_id < %s))")
+            params.extend([start[0], start[0], start[1]])
+        if since is not None:
+            conditions.append("u.updated_at >= %s")
+            params.append(since)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        # The page is picked first; the counts are then looked up for its rows only,
+        # one table at a time, so playlists and plays are never joined together
+        query = f"""
+        SELECT page.*,
+               (SELECT COUNT(*) FROM Playlists p WHERE p.user_id = page.user_id) as playlist_count,
+               (SELECT COALESCE(SUM(usp.play_count), 0) FROM User_Song_Plays usp
+                WHERE usp.user_id = page.user_id) as listening_count
+        FROM (
+            SELECT u.user_id, u.first_name, u.last_name, u.email, u.is_admin, u.created_at
+            FROM Users u
+            {where}
+            ORDER BY u.created_at DESC, u.user_id DESC
+            LIMIT %s
+        ) page
+        ORDER BY page.created_at DESC, page.user_id DESC
         """
         
-        cursor.execute(query)
+        cursor.execute(query, params + [limit + 1])
         users = cursor.fetchall()
         
-        return users
+        if since is not None:
+            return users, None
+        
+        # One extra row tells whether there is a next page
+        next_start = None
+        if len(users) > limit:
+            users = users[:limit]
+            next_start = (users[-1]["created_at"], users[-1]["user_id"])
+        
+        return users, next_start
         
     except mysql.connector.Error as e:
         print(f"Error fetching users: {e}")
+        return [], None
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def get_sync_time():
+    """Database time to sync from next (a little early, to catch late commits)"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return None
+            
+        cursor = connection.cursor()
+        cursor.execute("SELECT NOW() - INTERVAL %s SECOND", (SYNC_OVERLAP_SECONDS,))
+        return cursor.fetchone()[0]
+        
+    except mysql.connector.Error as e:
+        print(f"Error reading database time: {e}")
+        return None
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def get_deleted_user_ids(since):
+    """Get the IDs of users deleted since a sync time"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return []
+            
+        cursor = connection.cursor()
+        cursor.execute(
+            "SELECT row_id FROM Deleted_Rows WHERE table_name = 'Users' AND deleted_at >= %s",
+            (since,)
+        )
+        return [row[0] for row in cursor.fetchall()]
+        
+    except mysql.connector.Error as e:
+        print(f"Error fetching deleted users: {e}")
         return []
     finally:
         if 'connection' in locals() and connection and connection.is_connected():
@@ -114,6 +201,9 @@ def delete_user(user_id):
             messagebox.showerror("Error", "Cannot delete an admin user.")
             return False
         
+        # Listening_History is partitioned and has no foreign keys, so clear it first
+        cursor.execute("DELETE FROM Listening_History WHERE user_id = %s", (user_id,))
+
         # The foreign key constraints with ON DELETE CASCADE should
         # automatically delete related records in other tables
         cursor.execute("DELETE FROM Users WHERE user_id = %s", (user_id,))
@@ -227,39 +317,111 @@ def open_admin_login_page():
         messagebox.showerror("Error", f"Unable to open admin login: {e}")
 
 # ------------------- UI Functions -------------------
-def refresh_user_list():
-    """Refresh the user list display"""
+def user_row_values(number, user):
+    """Treeview values for one user"""
+    return (
+        number,
+        f"{user['first_name']} {user['last_name']}",
+        user["email"],
+        "Yes" if user["is_admin"] else "No",
+        user["created_at"].strftime("%Y-%m-%d"),
+        user["playlist_count"],
+        user["listening_count"],
+        user["user_id"]
+    )
+
+def refresh_user_list(*args):
+    """Reload the current page of the user list"""
+    search = search_entry.get().strip()
+    synced_at = get_sync_time()
+    users, next_start = get_users_page(search, page_state["starts"][-1])
+    page_state["next_start"] = next_start
+    page_state["synced_at"] = synced_at
+    
     # Clear the treeview
     for item in users_tree.get_children():
         users_tree.delete(item)
     
-    # Get updated users
-    users = get_all_users()
+    # Add users to treeview; the item ID is the user ID so later syncs can find them
+    first_row = (len(page_state["starts"]) - 1) * PAGE_SIZE
+    for i, user in enumerate(users, first_row + 1):
+        users_tree.insert("", "end", iid=str(user["user_id"]), values=user_row_values(i, user))
     
-    # Add users to treeview
-    for i, user in enumerate(users, 1):
-        # Format admin status
-        admin_status = "Yes" if user["is_admin"] else "No"
-        
-        # Format created date
-        created_date = user["created_at"].strftime("%Y-%m-%d")
-        
-        users_tree.insert(
-            "", "end", 
-            values=(
-                i,
-                f"{user['first_name']} {user['last_name']}",
-                user["email"],
-                admin_status,
-                created_date,
-                user["playlist_count"],
-                user["listening_count"],
-                user["user_id"]
-            )
-        )
+    update_page_controls()
+
+def sync_user_list():
+    """Apply only the users added, changed or deleted since the page was loaded or synced"""
+    since = page_state["synced_at"]
+    if since is None:
+        refresh_user_list()
+        return
     
-    # Update stats
-    stats_label.configure(text=f"Total Users: {len(users_tree.get_children())}")
+    synced_at = get_sync_time()
+    if synced_at is None:
+        return
+    
+    # Older tombstones are pruned, so a page last synced before then may miss deletions
+    if synced_at - since >= datetime.timedelta(days=history_retention.TOMBSTONE_DAYS):
+        refresh_user_list()
+        return
+    
+    changed, _ = get_users_page(search_entry.get().strip(), since=since)
+    deleted = get_deleted_user_ids(since)
+    page_state["synced_at"] = synced_at
+    
+    first_row = (len(page_state["starts"]) - 1) * PAGE_SIZE
+    renumber_from = None
+    
+    for user_id in deleted:
+        if users_tree.exists(str(user_id)):
+            index = users_tree.index(str(user_id))
+            renumber_from = index if renumber_from is None else min(renumber_from, index)
+            users_tree.delete(str(user_id))
+    
+    # Changed users on this page are updated in place; new sign-ups belong on the first page
+    on_first_page = len(page_state["starts"]) == 1
+    for user in reversed(changed):
+        iid = str(user["user_id"])
+        if users_tree.exists(iid):
+            number = users_tree.set(iid, "id")
+            users_tree.item(iid, values=user_row_values(number, user))
+        elif on_first_page and user["created_at"] >= since:
+            users_tree.insert("", 0, iid=iid, values=user_row_values(0, user))
+            renumber_from = 0
+    
+    if renumber_from is not None:
+        items = users_tree.get_children()
+        for number, iid in enumerate(items[renumber_from:], first_row + renumber_from + 1):
+            users_tree.set(iid, "id", number)
+    
+    update_page_controls()
+
+def update_page_controls():
+    """Update the paging buttons and the footer for the rows shown"""
+    first_row = (len(page_state["starts"]) - 1) * PAGE_SIZE
+    shown = len(users_tree.get_children())
+    prev_btn.configure(state="normal" if len(page_state["starts"]) > 1 else "disabled")
+    next_btn.configure(state="normal" if page_state["next_start"] else "disabled")
+    stats_label.configure(
+        text=f"Page {len(page_state['starts'])}  ·  Showing {first_row + 1 if shown else 0}-{first_row + shown}"
+    )
+
+def search_users(*args):
+    """Start over from the first page with the current search"""
+    page_state["starts"] = [None]
+    refresh_user_list()
+
+def show_next_page():
+    """Load the page after the current one"""
+    if page_state["next_start"]:
+        page_state["starts"].append(page_state["next_start"])
+        refresh_user_list()
+
+def show_previous_page():
+    """Load the page before the current one"""
+    if len(page_state["starts"]) > 1:
+        page_state["starts"].pop()
+        refresh_user_list()
 
 def confirm_delete_user():
     """Confirm and delete selected user"""
@@ -281,7 +443,7 @@ def confirm_delete_user():
     if confirm:
         if delete_user(user_id):
             messagebox.showinfo("Success", f"User '{user_name}' deleted successfully!")
-            refresh_user_list()
+            sync_user_list()
         else:
             messagebox.showerror("Error", f"Failed to delete user '{user_name}'.")
 
@@ -310,7 +472,7 @@ def toggle_selected_admin_status():
         if toggle_admin_status(user_id, current_status):
             status_msg = "removed from" if current_status else "granted to"
             messagebox.showinfo("Success", f"Admin privileges {status_msg} '{user_name}' successfully!")
-            refresh_user_list()
+            sync_user_list()
         else:
             messagebox.showerror("Error", f"Failed to update admin status for '{user_name}'.")
 
@@ -431,7 +593,7 @@ def handle_add_user():
         if new_user_id:
             messagebox.showinfo("Success", f"User '{first_name} {last_name}' added successfully!")
             add_dialog.destroy()
-            refresh_user_list()
+            sync_user_list()
         else:
             messagebox.showerror("Error", "Failed to add user. Check console for details.")
     
@@ -536,6 +698,27 @@ try:
     )
     toggle_admin_btn.pack(side="left")
     
+    # Search by name or email
+    search_btn = ctk.CTkButton(
+        action_frame,
+        text="🔍",
+        command=search_users,
+        fg_color="#2563EB",
+        hover_color="#1D4ED8",
+        width=40,
+        height=40
+    )
+    search_btn.pack(side="right", padx=(0, 10))
+    
+    search_entry = ctk.CTkEntry(
+        action_frame,
+        placeholder_text="Search name or email...",
+        width=180,
+        height=40
+    )
+    search_entry.pack(side="right", padx=(10, 5))
+    search_entry.bind("<Return>", search_users)
+    
     # Refresh button
     refresh_btn = ctk.CTkButton(
         action_frame,
@@ -622,6 +805,28 @@ try:
     )
     stats_label.pack(side="left")
     
+    next_btn = ctk.CTkButton(
+        stats_frame,
+        text="Next ▶",
+        command=show_next_page,
+        fg_color="#2563EB",
+        hover_color="#1D4ED8",
+        width=90,
+        height=28
+    )
+    next_btn.pack(side="right")
+    
+    prev_btn = ctk.CTkButton(
+        stats_frame,
+        text="◀ Previous",
+        command=show_previous_page,
+        fg_color="#2563EB",
+        hover_color="#1D4ED8",
+        width=90,
+        height=28
+    )
+    prev_btn.pack(side="right", padx=(0, 10))
+    
     # Load users after the UI is created
     root.after(100, refresh_user_list)
     
@@ -0,0 +1,187 @@
+import mysql.connector
+import time
+import argparse
+import numpy as np
+from recom_batch import compute_item_neighbors
+
+# Similar artists stored per artist
+TOP_N = 20
+
+# Artists need this many listeners before their similarities are trusted
+MIN_LISTENERS = 2
+
+# Reload the in-memory graph after this many seconds
+CACHE_SECONDS = 10 * 60
+
+# In-memory adjacency lists: artist_id -> [(similar_artist_id, name, score), ...]
+artist_graph = {
+    "loaded_at": 0.0,
+    "neighbors": {}
+}
+
+# ------------------- Database Functions -------------------
+def connect_db():
+    """Connect to the MySQL database"""
+    try:
+        connection = mysql.connector.connect(
+            host="localhost",
+            user="root",
+            password="new_password",
+            database="online_music_system"
+        )
+        return connection
+    except mysql.connector.Error as err:
+        print(f"Error connecting to database: {err}")
+        return None
+
+def load_artist_play_counts():
+    """Load per-user artist play counts in the format of recom_batch.load_play_counts()"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return None
+
+        cursor = connection.cursor()
+
+        query = """
+        SELECT usp.user_id, s.artist_id, CAST(SUM(usp.play_count) AS UNSIGNED) as play_count
+        FROM User_Song_Plays usp
+        JOIN Songs s ON usp.song_id = s.song_id
+        WHERE s.artist_id IS NOT NULL
+        GROUP BY usp.user_id, s.artist_id
+        """
+
+        cursor.execute(query)
+        rows = cursor.fetchall()
+
+        if not rows:
+            return None
+
+        data = np.array(rows, dtype=np.int64)
+
+        # Drop artists with too few listeners to compare reliably
+        artist_ids, artist_index, listeners = np.unique(data[:, 1], return_inverse=True, return_counts=True)
+        data = data[listeners[artist_index] >= MIN_LISTENERS]
+        if len(data) == 0:
+            return None
+
+        user_ids, user_index = np.unique(data[:, 0], return_inverse=True)
+        artist_ids, artist_index = np.unique(data[:, 1], return_inverse=True)
+
+        # Artists take the place of songs so the song similarity code can be reused
+        return {
+            "user_ids": user_ids,
+            "song_ids": artist_ids,
+            "user_index": user_index,
+            "song_index": artist_index,
+            "counts": data[:, 2].astype(np.float32)
+        }
+
+    except mysql.connector.Error as e:
+        print(f"Error loading artist play counts: {e}")
+        return None
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+# ------------------- Batch Computation -------------------
+def compute_artist_similarity(top_n=TOP_N, write_batch=1000):
+    """Rebuild Artist_Similarity from co-listening (cosine over listeners' play counts)"""
+    started = time.time()
+
+    data = load_artist_play_counts()
+    if not data:
+        print("Not enough listening history to compare artists.")
+        return 0
+
+    neighbors, scores = compute_item_neighbors(data, top_n)
+    artist_ids = data["song_ids"]
+
+    rows = []
+    for row in range(len(artist_ids)):
+        order = np.argsort(-scores[row], kind="stable")
+        rank = 0
+        for index in order:
+            # Only artists that actually share listeners are kept
+            if scores[row, index] <= 0 or neighbors[row, index] == row:
+                continue
+            rank += 1
+            rows.append((int(artist_ids[row]), int(artist_ids[neighbors[row, index]]),
+                         float(scores[row, index]), rank))
+
+    try:
+        connection = connect_db()
+        if not connection:
+            return 0
+
+        cursor = connection.cursor()
+
+        # Replace the whole graph in one transaction so readers never see half of it
+        cursor.execute("DELETE FROM Artist_Similarity")
+        query = """
+        INSERT INTO Artist_Similarity (artist_id, similar_artist_id, score, rank_pos)
+        VALUES (%s, %s, %s, %s)
+        """
+        for start in range(0, len(rows), write_batch):
+            cursor.executemany(query, rows[start:start + write_batch])
+        connection.commit()
+
+        print(f"Stored {len(rows)} similar-artist links for {len(artist_ids)} artists "
+              f"in {time.time() - started:.1f}s.")
+        return len(rows)
+
+    except mysql.connector.Error as e:
+        print(f"Error storing artist similarity: {e}")
+        return 0
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+# ------------------- Lookups -------------------
+def load_artist_graph():
+    """Load every adjacency list into memory, reusing the cache while it is fresh"""
+    if artist_graph["loaded_at"] and time.time() - artist_graph["loaded_at"] < CACHE_SECONDS:
+        return artist_graph["neighbors"]
+
+    try:
+        connection = connect_db()
+        if not connection:
+            return artist_graph["neighbors"]
+
+        cursor = connection.cursor()
+        cursor.execute("""
+        SELECT asim.artist_id, asim.similar_artist_id, a.name, asim.score
+        FROM Artist_Similarity asim
+        JOIN Artists a ON asim.similar_artist_id = a.artist_id
+        ORDER BY asim.artist_id, asim.rank_pos
+        """)
+
+        neighbors = {}
+        for artist_id, similar_id, name, score in cursor.fetchall():
+            neighbors.setdefault(artist_id, []).append((similar_id, name, score))
+
+        artist_graph["neighbors"] = neighbors
+        artist_graph["loaded_at"] = time.time()
+        return neighbors
+
+    except mysql.connector.Error as e:
+        print(f"Error loading artist graph: {e}")
+        return artist_graph["neighbors"]
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def get_similar_artists(artist_id, limit=5):
+    """Return up to limit (artist_id, name, score) tuples for artists whose fans overlap"""
+    return load_artist_graph().get(artist_id, [])[:limit]
+
+# ------------------- Main Entry Point -------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute the similar-artist graph from listening history")
+    parser.add_argument("--top-n", type=int, default=TOP_N, help="Similar artists stored per artist")
+    args = parser.parse_args()
+
+    compute_artist_similarity(args.top_n)
@@ -0,0 +1,384 @@
+import mysql.connector
+import os
+import wave
+import argparse
+import numpy as np
+import song_index
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# Analysis settings
+TARGET_RATE = 22050
+MAX_SECONDS = 90
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MELS = 40
+N_MFCC = 13
+
+# tempo, spectral centroid, spectral rolloff, RMS energy, MFCC means
+FEATURE_DIM = 4 + N_MFCC
+
+# Background pool used by the upload pages so extraction never blocks the UI
+extraction_pool = {
+    "executor": None
+}
+
+# ------------------- Database Functions -------------------
+def connect_db():
+    """Connect to the MySQL database"""
+    try:
+        connection = mysql.connector.connect(
+            host="localhost",
+            user="root",
+            password="new_password",
+            database="online_music_system"
+        )
+        return connection
+    except mysql.connector.Error as err:
+        print(f"Error connecting to database: {err}")
+        return None
+
+def save_song_features(song_id, features):
+    """Store the feature vector of a song in the Song_Features table"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return False
+
+        cursor = connection.cursor()
+
+        query = """
+        INSERT INTO Song_Features (song_id, tempo, spectral_centroid, spectral_rolloff, rms_energy, feature_vector)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            tempo = VALUES(tempo),
+            spectral_centroid = VALUES(spectral_centroid),
+            spectral_rolloff = VALUES(spectral_rolloff),
+            rms_energy = VALUES(rms_energy),
+            feature_vector = VALUES(feature_vector),
+            extracted_at = CURRENT_TIMESTAMP
+        """
+
+        vector = features.astype("<f4")
+        cursor.execute(query, (song_id, float(vector[0]), float(vector[1]), float(vector[2]),
+                               float(vector[3]), vector.tobytes()))
+        connection.commit()
+        return True
+
+    except mysql.connector.Error as e:
+        print(f"Error saving song features: {e}")
+        return False
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def load_feature_matrix():
+    """Load all stored feature vectors as (song_ids, matrix)"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, FEATURE_DIM), dtype=np.float32)
+
+        cursor = connection.cursor()
+        cursor.execute("SELECT song_id, feature_vector FROM Song_Features ORDER BY song_id")
+        rows = cursor.fetchall()
+
+        song_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        matrix = np.frombuffer(b"".join(bytes(row[1]) for row in rows), dtype="<f4")
+        return song_ids, matrix.reshape(len(rows), FEATURE_DIM).astype(np.float32)
+
+    except mysql.connector.Error as e:
+        print(f"Error loading song features: {e}")
+        return np.zeros(0, dtype=np.int64), np.zeros((0, FEATURE_DIM), dtype=np.float32)
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def get_songs_without_features():
+    """Get IDs of songs that have no stored features yet"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return []
+
+        cursor = connection.cursor()
+        cursor.execute("""
+        SELECT s.song_id
+        FROM Songs s
+        LEFT JOIN Song_Features f ON s.song_id = f.song_id
+        WHERE f.song_id IS NULL
+        """)
+        return [row[0] for row in cursor.fetchall()]
+
+    except mysql.connector.Error as e:
+        print(f"Error finding songs without features: {e}")
+        return []
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+# ------------------- Decoding -------------------
+def decode_wav(file_path):
+    """Decode a PCM WAV file to mono float samples"""
+    with wave.open(file_path, "rb") as wav_file:
+        channels = wav_file.getnchannels()
+        sample_width = wav_file.getsampwidth()
+        rate = wav_file.getframerate()
+        frames = wav_file.readframes(min(wav_file.getnframes(), rate * MAX_SECONDS))
+
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+    elif sample_width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        ints = (raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8) | (raw[:, 2].astype(np.int32) << 16))
+        ints = np.where(ints >= 1 << 23, ints - (1 << 24), ints)
+        samples = ints.astype(np.float32) / float(1 << 23)
+    else:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / float(1 << 31)
+
+    samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+def decode_with_mixer(file_path):
+    """Decode any format pygame can load (mp3, ogg, flac) to mono float samples"""
+    from pygame import mixer, sndarray
+
+    if not mixer.get_init():
+        mixer.init()
+    rate, size, _ = mixer.get_init()
+
+    samples = sndarray.array(mixer.Sound(file_path)).astype(np.float32)
+    samples /= float(1 << (abs(size) - 1))
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+    return samples[:rate * MAX_SECONDS], rate
+
+def decode_audio(file_path):
+    """Decode an audio file once to mono samples at roughly TARGET_RATE"""
+    if os.path.splitext(file_path)[1].lower() in (".wav", ".wave"):
+        samples, rate = decode_wav(file_path)
+    else:
+        samples, rate = decode_with_mixer(file_path)
+
+    # Downsample by an integer factor with mean pooling
+    factor = max(1, rate // TARGET_RATE)
+    if factor > 1:
+        samples = samples[:len(samples) - len(samples) % factor].reshape(-1, factor).mean(axis=1)
+        rate = rate // factor
+
+    return samples.astype(np.float32), rate
+
+# ------------------- Feature Extraction -------------------
+def mel_filterbank(rate, n_fft=N_FFT, n_mels=N_MELS):
+    """Build a triangular mel filterbank matrix (n_mels x n_fft // 2 + 1)"""
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+    mel_points = np.linspace(hz_to_mel(0.0), hz_to_mel(rate / 2.0), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mel_points) / rate).astype(int)
+
+    filters = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for i in range(1, n_mels + 1):
+        left, center, right = bins[i - 1], bins[i], bins[i + 1]
+        if center > left:
+            filters[i - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            filters[i - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+    return filters
+
+def dct_matrix(n_out, n_in):
+    """Orthonormal DCT-II matrix used to turn log-mel energies into MFCCs"""
+    k = np.arange(n_out)[:, None]
+    n = np.arange(n_in)[None, :]
+    matrix = np.cos(np.pi / n_in * (n + 0.5) * k) * np.sqrt(2.0 / n_in)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+def estimate_tempo(onset, rate, min_bpm=60.0, max_bpm=200.0):
+    """Estimate tempo in BPM from the autocorrelation of an onset envelope"""
+    if len(onset) < 4 or not onset.any():
+        return 0.0
+
+    onset = onset - onset.mean()
+    size = 1 << int(np.ceil(np.log2(2 * len(onset))))
+    spectrum = np.fft.rfft(onset, size)
+    autocorr = np.fft.irfft(spectrum * np.conj(spectrum), size)[:len(onset)]
+
+    frames_per_second = rate / HOP_LENGTH
+    min_lag = max(1, int(frames_per_second * 60.0 / max_bpm))
+    max_lag = min(len(autocorr) - 1, int(frames_per_second * 60.0 / min_bpm))
+    if max_lag <= min_lag:
+        return 0.0
+
+    # Weight lags towards ~120 BPM to avoid half/double tempo picks
+    lags = np.arange(min_lag, max_lag + 1)
+    bpm = 60.0 * frames_per_second / lags
+    prior = np.exp(-0.5 * np.log2(bpm / 120.0) ** 2)
+    lag = int(lags[np.argmax(autocorr[min_lag:max_lag + 1] * prior)])
+    return float(60.0 * frames_per_second / lag)
+
+def compute_features(samples, rate):
+    """Compute the fixed-width feature vector of a decoded signal"""
+    features = np.zeros(FEATURE_DIM, dtype=np.float32)
+    if len(samples) < N_FFT:
+        samples = np.pad(samples, (0, N_FFT - len(samples)))
+
+    # Frame the signal and take the power spectrum of every frame at once
+    frames = np.lib.stride_tricks.sliding_window_view(samples, N_FFT)[::HOP_LENGTH]
+    window = np.hanning(N_FFT).astype(np.float32)
+    magnitude = np.abs(np.fft.rfft(frames * window, axis=1)).astype(np.float32)
+    power = magnitude ** 2
+    freqs = np.fft.rfftfreq(N_FFT, 1.0 / rate).astype(np.float32)
+
+    total = magnitude.sum(axis=1)
+    valid = total > 0
+
+    # Spectral centroid and 85% rolloff, averaged over non-silent frames
+    if valid.any():
+        centroid = (magnitude[valid] @ freqs) / total[valid]
+        cumulative = np.cumsum(power[valid], axis=1)
+        rolloff = freqs[np.argmax(cumulative >= 0.85 * cumulative[:, -1:], axis=1)]
+        features[1] = centroid.mean()
+        features[2] = rolloff.mean()
+
+    # RMS energy per frame
+    features[3] = np.sqrt((frames ** 2).mean(axis=1)).mean()
+
+    # MFCC means from log-mel energies
+    log_mel = np.log(power @ mel_filterbank(rate).T + 1e-10)
+    features[4:] = (log_mel @ dct_matrix(N_MFCC, N_MELS).T).mean(axis=0)
+
+    # Tempo from the positive log-mel flux
+    onset = np.maximum(np.diff(log_mel, axis=0), 0.0).sum(axis=1)
+    features[0] = estimate_tempo(onset, rate)
+
+    return features
+
+def extract_features(file_path):
+    """Decode an audio file and compute its feature vector"""
+    samples, rate = decode_audio(file_path)
+    return compute_features(samples, rate)
+
+def extract_and_store(song_id, file_path):
+    """Extract features for one song and save them"""
+    try:
+        features = extract_features(file_path)
+    except Exception as e:
+        print(f"Error extracting features for song {song_id}: {e}")
+        return False
+    return save_song_features(song_id, features)
+
+def extract_and_index(song_id, file_path):
+    """Extract features for a new upload and add it to the similar-songs index"""
+    try:
+        features = extract_features(file_path)
+    except Exception as e:
+        print(f"Error extracting features for song {song_id}: {e}")
+        return False
+    if not save_song_features(song_id, features):
+        return False
+    return song_index.add_song(song_id, features)
+
+def queue_feature_extraction(song_id, file_path):
+    """Extract features for a freshly uploaded song in the background"""
+    if extraction_pool["executor"] is None:
+        extraction_pool["executor"] = ThreadPoolExecutor(max_workers=2, thread_name_prefix="audio-features")
+    return extraction_pool["executor"].submit(extract_and_index, song_id, file_path)
+
+# ------------------- Similarity -------------------
+def standardize(matrix):
+    """Scale each feature to zero mean and unit variance, then rows to unit length"""
+    if len(matrix) == 0:
+        return matrix
+    std = matrix.std(axis=0)
+    std[std == 0] = 1.0
+    scaled = (matrix - matrix.mean(axis=0)) / std
+    norms = np.linalg.norm(scaled, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (scaled / norms).astype(np.float32)
+
+def find_similar_songs(song_id, k=10):
+    """Find the songs whose audio features are closest to a given song (exact scan)"""
+    song_ids, matrix = load_feature_matrix()
+    matches = np.flatnonzero(song_ids == int(song_id))
+    if len(matches) == 0:
+        return []
+
+    vectors = standardize(matrix)
+    similarity = vectors @ vectors[matches[0]]
+    similarity[matches[0]] = -np.inf
+
+    k = min(k, len(song_ids) - 1)
+    if k <= 0:
+        return []
+    top = np.argpartition(-similarity, k - 1)[:k]
+    top = top[np.argsort(-similarity[top], kind="stable")]
+    return [int(song_ids[i]) for i in top]
+
+# ------------------- Backfill -------------------
+def backfill_song(song_id):
+    """Decode a stored song blob and extract its features (runs in a worker process)"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return False
+
+        cursor = connection.cursor()
+        cursor.execute("SELECT file_data, file_type FROM Songs WHERE song_id = %s", (song_id,))
+        result = cursor.fetchone()
+        cursor.close()
+        connection.close()
+
+        if not result:
+            return False
+
+        temp_dir = "temp"
+        os.makedirs(temp_dir, exist_ok=True)
+        temp_file = os.path.join(temp_dir, f"features_{song_id}.{result[1]}")
+        with open(temp_file, "wb") as f:
+            f.write(result[0])
+
+        try:
+            return extract_and_store(song_id, temp_file)
+        finally:
+            os.remove(temp_file)
+
+    except mysql.connector.Error as e:
+        print(f"Error backfilling song {song_id}: {e}")
+        return False
+
+def backfill_features(workers=None):
+    """Extract features for every song that does not have them yet"""
+    song_ids = get_songs_without_features()
+    if not song_ids:
+        print("All songs already have features.")
+        return 0
+
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for ok in pool.map(backfill_song, song_ids):
+            done += 1 if ok else 0
+
+    print(f"Extracted features for {done}/{len(song_ids)} songs.")
+    if done:
+        song_index.build_index()
+    return done
+
+# ------------------- Main Entry Point -------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract audio features for songs")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for the backfill")
+    parser.add_argument("--file", help="Print the feature vector of a local audio file instead")
+    args = parser.parse_args()
+
+    if args.file:
+        print(extract_features(args.file))
+    else:
+        backfill_features(args.workers)
@@ -0,0 +1,311 @@
+import mysql.connector
+import os
+import time
+import random
+import argparse
+import threading
+import numpy as np
+from recom_batch import MODEL_DIR
+
+# Name of this job's watermark row in Job_State
+JOB_NAME = "song_transitions"
+
+# Plays further apart than this belong to different sessions
+SESSION_GAP_SECONDS = 30 * 60
+
+# Only the most common next songs are kept in the exported table
+MAX_NEXT_SONGS = 50
+
+# History rows read per incremental pass
+READ_BATCH = 50000
+
+# Rebuild the exported table when it is older than this
+REFRESH_SECONDS = 10 * 60
+
+# Transition table files
+FROM_IDS_FILE = "transitions_from_ids.npy"
+INDPTR_FILE = "transitions_indptr.npy"
+TO_IDS_FILE = "transitions_to_ids.npy"
+CUMULATIVE_FILE = "transitions_cumulative.npy"
+
+# In-memory transition table, read from disk on first use
+transition_table = {
+    "loaded_at": 0.0,
+    "row_of": {},
+    "indptr": None,
+    "to_ids": None,
+    "cumulative": None
+}
+
+# Only one background refresh per process
+refresh_state = {"running": False}
+
+# ------------------- Database Functions -------------------
+def connect_db():
+    """Connect to the MySQL database"""
+    try:
+        connection = mysql.connector.connect(
+            host="localhost",
+            user="root",
+            password="new_password",
+            database="online_music_system"
+        )
+        return connection
+    except mysql.connector.Error as err:
+        print(f"Error connecting to database: {err}")
+        return None
+
+def get_previous_plays(cursor, user_ids, watermark):
+    """Get each user's last play at or before the watermark, to link it to their next play"""
+    previous = {}
+    user_ids = list(user_ids)
+    for start in range(0, len(user_ids), 1000):
+        chunk = user_ids[start:start + 1000]
+        placeholders = ", ".join(["%s"] * len(chunk))
+        cursor.execute(f"""
+        SELECT h.user_id, h.song_id, h.played_at
+        FROM Listening_History h
+        JOIN (
+            SELECT user_id, MAX(history_id) AS history_id
+            FROM Listening_History
+            WHERE history_id <= %s AND user_id IN ({placeholders})
+            GROUP BY user_id
+        ) last_play ON h.history_id = last_play.history_id
+        """, [watermark] + chunk)
+        for user_id, song_id, played_at in cursor.fetchall():
+            previous[user_id] = (song_id, played_at)
+    return previous
+
+def count_transitions(rows, previous):
+    """Count consecutive same-session plays per user, updating each user's last play"""
+    counts = {}
+    for user_id, song_id, played_at in sorted(rows, key=lambda row: (row[0], row[2])):
+        last = previous.get(user_id)
+        if last and last[0] != song_id and (played_at - last[1]).total_seconds() <= SESSION_GAP_SECONDS:
+            key = (last[0], song_id)
+            counts[key] = counts.get(key, 0) + 1
+        previous[user_id] = (song_id, played_at)
+    return counts
+
+def update_transitions(batch_size=READ_BATCH):
+    """Add transitions from history recorded since the last run to Song_Transitions"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return 0
+
+        cursor = connection.cursor()
+        cursor.execute(
+            "INSERT IGNORE INTO Job_State (job_name, last_history_id) VALUES (%s, 0)", (JOB_NAME,)
+        )
+        connection.commit()
+
+        added = 0
+        previous = {}
+        expected = None
+        while True:
+            # Lock the watermark so concurrent runs cannot count the same plays twice
+            connection.start_transaction()
+            cursor.execute(
+                "SELECT last_history_id FROM Job_State WHERE job_name = %s FOR UPDATE", (JOB_NAME,)
+            )
+            watermark = cursor.fetchone()[0]
+
+            # Another run moved the watermark: the cached last plays may be stale
+            if watermark != expected:
+                previous = {}
+
+            cursor.execute("""
+            SELECT history_id, user_id, song_id, played_at
+            FROM Listening_History
+            WHERE history_id > %s
+            ORDER BY history_id
+            LIMIT %s
+            """, (watermark, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                connection.rollback()
+                break
+
+            missing = {row[1] for row in rows if row[1] not in previous}
+            if missing:
+                previous.update(get_previous_plays(cursor, missing, watermark))
+
+            counts = count_transitions([row[1:] for row in rows], previous)
+            if counts:
+                cursor.executemany("""
+                INSERT INTO Song_Transitions (from_song_id, to_song_id, transition_count)
+                VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE transition_count = transition_count + VALUES(transition_count)
+                """, [(from_id, to_id, count) for (from_id, to_id), count in counts.items()])
+
+            cursor.execute(
+                "UPDATE Job_State SET last_history_id = %s WHERE job_name = %s", (rows[-1][0], JOB_NAME)
+            )
+            connection.commit()
+            added += sum(counts.values())
+            expected = rows[-1][0]
+
+            if len(rows) < batch_size:
+                break
+
+        return added
+
+    except mysql.connector.Error as e:
+        print(f"Error updating song transitions: {e}")
+        return 0
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+# ------------------- Transition Table -------------------
+def table_path(name, model_dir=MODEL_DIR):
+    """Full path of a transition table file"""
+    return os.path.join(model_dir, name)
+
+def export_transitions(model_dir=MODEL_DIR):
+    """Write Song_Transitions as a compact CSR table of next songs and cumulative counts"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return False
+
+        cursor = connection.cursor()
+        cursor.execute("""
+        SELECT from_song_id, to_song_id, transition_count
+        FROM Song_Transitions
+        ORDER BY from_song_id, transition_count DESC, to_song_id
+        """)
+        rows = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 3)
+
+    except mysql.connector.Error as e:
+        print(f"Error exporting song transitions: {e}")
+        return False
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+    from_ids, starts, lengths = np.unique(rows[:, 0], return_index=True, return_counts=True)
+
+    # Keep the top MAX_NEXT_SONGS per song (rows are already sorted by count)
+    position = np.arange(len(rows)) - np.repeat(starts, lengths)
+    rows = rows[position < MAX_NEXT_SONGS]
+    lengths = np.minimum(lengths, MAX_NEXT_SONGS)
+
+    indptr = np.zeros(len(from_ids) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+
+    # Per-row running totals, so sampling is a binary search within the row
+    cumulative = np.cumsum(rows[:, 2])
+    offsets = np.concatenate([[0], cumulative[indptr[1:-1] - 1]])[:len(lengths)]
+    cumulative -= np.repeat(offsets, lengths)
+
+    os.makedirs(model_dir, exist_ok=True)
+
+    # The from-IDs file is replaced last; readers use its timestamp to detect changes
+    for name, array in ((INDPTR_FILE, indptr), (TO_IDS_FILE, rows[:, 1].copy()),
+                        (CUMULATIVE_FILE, cumulative), (FROM_IDS_FILE, from_ids)):
+        temp_path = table_path(name, model_dir) + ".tmp.npy"
+        np.save(temp_path, array)
+        os.replace(temp_path, table_path(name, model_dir))
+    return True
+
+def load_transitions(model_dir=MODEL_DIR):
+    """Load the transition table, reloading only when it has changed (read into memory, so
+    refresh_transitions can replace the files while it is loaded)"""
+    try:
+        modified = os.path.getmtime(table_path(FROM_IDS_FILE, model_dir))
+    except OSError:
+        return None
+
+    if transition_table["indptr"] is not None and modified <= transition_table["loaded_at"]:
+        return transition_table
+
+    try:
+        from_ids = np.load(table_path(FROM_IDS_FILE, model_dir))
+        indptr = np.load(table_path(INDPTR_FILE, model_dir))
+        to_ids = np.load(table_path(TO_IDS_FILE, model_dir))
+        cumulative = np.load(table_path(CUMULATIVE_FILE, model_dir))
+    except (OSError, ValueError) as e:
+        print(f"Error loading song transitions: {e}")
+        return None
+
+    # Another process may be halfway through rewriting the files
+    if len(indptr) != len(from_ids) + 1 or len(to_ids) != len(cumulative):
+        return transition_table if transition_table["indptr"] is not None else None
+
+    transition_table.update({
+        "loaded_at": modified,
+        "row_of": {song_id: row for row, song_id in enumerate(from_ids.tolist())},
+        "indptr": indptr,
+        "to_ids": to_ids,
+        "cumulative": cumulative
+    })
+    return transition_table
+
+def refresh_transitions(model_dir=MODEL_DIR):
+    """Fold new history into Song_Transitions and re-export the table"""
+    added = update_transitions()
+    if added or not os.path.exists(table_path(FROM_IDS_FILE, model_dir)):
+        export_transitions(model_dir)
+    return added
+
+def refresh_if_stale(model_dir=MODEL_DIR):
+    """Refresh the table in a background thread when the export is old"""
+    try:
+        age = time.time() - os.path.getmtime(table_path(FROM_IDS_FILE, model_dir))
+    except OSError:
+        age = REFRESH_SECONDS
+
+    if age < REFRESH_SECONDS or refresh_state["running"]:
+        return
+
+    def run():
+        try:
+            refresh_transitions(model_dir)
+        finally:
+            refresh_state["running"] = False
+
+    refresh_state["running"] = True
+    threading.Thread(target=run, daemon=True).start()
+
+# ------------------- Prediction -------------------
+def predict_next(song_id, exclude=(), model_dir=MODEL_DIR):
+    """Sample the next song after song_id in proportion to how often listeners played it next"""
+    table = load_transitions(model_dir)
+    if table is None:
+        return None
+
+    row = table["row_of"].get(song_id)
+    if row is None:
+        return None
+
+    start, end = int(table["indptr"][row]), int(table["indptr"][row + 1])
+    to_ids = table["to_ids"][start:end]
+    cumulative = table["cumulative"][start:end]
+
+    # A few draws to avoid songs just played; then fall back to the most common unplayed one
+    for _ in range(5):
+        pick = int(to_ids[np.searchsorted(cumulative, random.random() * cumulative[-1], side="right")])
+        if pick not in exclude:
+            return pick
+    for next_id in to_ids.tolist():
+        if next_id not in exclude:
+            return next_id
+    return None
+
+# ------------------- Main Entry Point -------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update the song transition table used by autoplay")
+    parser.add_argument("--interval", type=int, default=0, help="Keep running, refreshing every N seconds")
+    args = parser.parse_args()
+
+    while True:
+        started = time.time()
+        added = refresh_transitions()
+        print(f"Added {added} transitions in {time.time() - started:.2f}s")
+        if not args.interval:
+            break
+        time.sleep(args.interval)
@@ -0,0 +1,295 @@
+import mysql.connector
+import os
+import time
+import hashlib
+import argparse
+import mutagen
+from mysql.connector import errorcode
+from concurrent.futures import ProcessPoolExecutor
+
+# Audio files picked up from the folder tree (the formats the players can load)
+AUDIO_EXTENSIONS = {"mp3", "flac", "wav"}
+
+# Songs inserted per transaction
+BATCH_SIZE = 50
+
+# Files handed to each worker process at a time
+READ_CHUNK = 16
+
+# Stored songs hashed per statement when filling in missing content hashes
+HASH_BATCH = 20
+
+# Used when a file has no artist tag
+UNKNOWN_ARTIST = "Unknown Artist"
+
+# ------------------- Database Functions -------------------
+def connect_db():
+    """Connect to the MySQL database"""
+    try:
+        connection = mysql.connector.connect(
+            host="localhost",
+            user="root",
+            password="new_password",
+            database="online_music_system"
+        )
+        return connection
+    except mysql.connector.Error as err:
+        print(f"Error connecting to database: {err}")
+        return None
+
+# ------------------- File Scanning -------------------
+def find_audio_files(folder):
+    """List every audio file under a folder, in a stable order"""
+    paths = []
+    for directory, subdirectories, files in os.walk(folder):
+        subdirectories.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1][1:].lower() in AUDIO_EXTENSIONS:
+                paths.append(os.path.join(directory, name))
+    return paths
+
+def first_tag(tags, key):
+    """First value of a tag, stripped, or None"""
+    try:
+        values = tags.get(key) if tags else None
+    except Exception:
+        return None
+    if not values:
+        return None
+    value = str(values[0]).strip()
+    return value or None
+
+def read_file_info(path):
+    """Read the tags, duration and content hash of one file (runs in a worker process)"""
+    try:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+
+        # Easy tags give the same keys for ID3, FLAC and WAV files
+        audio = mutagen.File(path, easy=True)
+        tags = audio.tags if audio is not None else None
+        duration = int(audio.info.length) if audio is not None and audio.info else 0
+
+        year = first_tag(tags, "date")
+        return {
+            "path": path,
+            "title": first_tag(tags, "title") or os.path.splitext(os.path.basename(path))[0],
+            "artist": first_tag(tags, "artist") or UNKNOWN_ARTIST,
+            "album": first_tag(tags, "album"),
+            "genre": first_tag(tags, "genre"),
+            "year": int(year[:4]) if year and year[:4].isdigit() else None,
+            "duration": duration,
+            "file_type": os.path.splitext(path)[1][1:].lower(),
+            "file_size": os.path.getsize(path),
+            "content_hash": digest.hexdigest()
+        }
+    except Exception as e:
+        print(f"Error reading {path}: {e}")
+        return None
+
+# ------------------- Lookups -------------------
+def load_lookups(cursor):
+    """Load artist, album and genre IDs keyed by lower-cased name, so each is looked up once"""
+    cursor.execute("SELECT artist_id, name FROM Artists")
+    artists = {name.lower(): artist_id for artist_id, name in cursor.fetchall()}
+
+    cursor.execute("SELECT album_id, artist_id, title FROM Albums")
+    albums = {(artist_id, title.lower()): album_id for album_id, artist_id, title in cursor.fetchall()}
+
+    cursor.execute("SELECT genre_id, name FROM Genres")
+    genres = {name.lower(): genre_id for genre_id, name in cursor.fetchall()}
+
+    return {"artists": artists, "albums": albums, "genres": genres}
+
+def resolve_artist(cursor, lookups, name):
+    """Artist ID for a name, creating the artist if needed"""
+    key = name.lower()
+    if key not in lookups["artists"]:
+        cursor.execute("INSERT INTO Artists (name) VALUES (%s)", (name[:100],))
+        lookups["artists"][key] = cursor.lastrowid
+    return lookups["artists"][key]
+
+def resolve_album(cursor, lookups, title, artist_id, year):
+    """Album ID for a title by an artist, creating the album if needed"""
+    if not title:
+        return None
+    key = (artist_id, title.lower())
+    if key not in lookups["albums"]:
+        cursor.execute(
+            "INSERT INTO Albums (title, artist_id, release_year) VALUES (%s, %s, %s)",
+            (title[:100], artist_id, year)
+        )
+        lookups["albums"][key] = cursor.lastrowid
+    return lookups["albums"][key]
+
+def resolve_genre(cursor, lookups, name):
+    """Genre ID for a name, creating the genre if needed"""
+    if not name:
+        return None
+    key = name.lower()
+    if key not in lookups["genres"]:
+        cursor.execute("INSERT INTO Genres (name) VALUES (%s)", (name[:50],))
+        lookups["genres"][key] = cursor.lastrowid
+    return lookups["genres"][key]
+
+def existing_hashes(cursor, hashes):
+    """The content hashes that are already stored"""
+    if not hashes:
+        return set()
+    placeholders = ", ".join(["%s"] * len(hashes))
+    cursor.execute(f"SELECT content_hash FROM Songs WHERE content_hash IN ({placeholders})", list(hashes))
+    return {row[0] for row in cursor.fetchall()}
+
+def backfill_hashes(connection, cursor):
+    """Hash stored songs that have no content hash yet, so they are found as duplicates too"""
+    cursor.execute("SELECT song_id FROM Songs WHERE content_hash IS NULL")
+    song_ids = [row[0] for row in cursor.fetchall()]
+    hashed = 0
+    
+    # The file data is hashed inside MySQL, so it is never sent to this process.
+    # IGNORE leaves a copy of an already hashed file without a hash (the index is unique).
+    for start in range(0, len(song_ids), HASH_BATCH):
+        batch = song_ids[start:start + HASH_BATCH]
+        placeholders = ", ".join(["%s"] * len(batch))
+        cursor.execute(f"""
+        UPDATE IGNORE Songs SET content_hash = SHA2(file_data, 256)
+        WHERE song_id IN ({placeholders}) AND content_hash IS NULL
+        """, batch)
+        hashed += cursor.rowcount
+        connection.commit()
+    return hashed
+
+# ------------------- Import -------------------
+def insert_batch(connection, cursor, lookups, batch, seen_hashes):
+    """Insert one batch of songs in a single transaction; returns (imported, duplicates)"""
+    stored = existing_hashes(cursor, [info["content_hash"] for info in batch])
+    added = []
+    duplicates = 0
+
+    try:
+        for info in batch:
+            # Skip songs already in the catalogue or seen earlier in this import
+            if info["content_hash"] in stored or info["content_hash"] in seen_hashes:
+                duplicates += 1
+                continue
+
+            artist_id = resolve_artist(cursor, lookups, info["artist"])
+            album_id = resolve_album(cursor, lookups, info["album"], artist_id, info["year"])
+            genre_id = resolve_genre(cursor, lookups, info["genre"])
+
+            with open(info["path"], "rb") as f:
+                file_data = f.read()
+
+            try:
+                cursor.execute("""
+                INSERT INTO Songs (title, artist_id, album_id, genre_id, duration,
+                                   file_data, file_type, file_size, content_hash)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, (info["title"][:100], artist_id, album_id, genre_id, info["duration"],
+                      file_data, info["file_type"], info["file_size"], info["content_hash"]))
+            except mysql.connector.IntegrityError as e:
+                # Another import or upload stored the same file since the hashes were checked
+                if e.errno != errorcode.ER_DUP_ENTRY:
+                    raise
+                duplicates += 1
+                continue
+
+            seen_hashes.add(info["content_hash"])
+            added.append(info["content_hash"])
+
+        connection.commit()
+        return len(added), duplicates
+
+    except (mysql.connector.Error, OSError):
+        connection.rollback()
+        # Artists, albums and genres created in this batch were rolled back too
+        lookups.update(load_lookups(cursor))
+        seen_hashes.difference_update(added)
+        raise
+
+def import_folder(folder, workers=None, progress=None):
+    """Import every audio file under a folder; progress(done, total, message) is called as it goes"""
+    started = time.time()
+    report = progress or (lambda done, total, message: None)
+    result = {"imported": 0, "duplicates": 0, "failed": 0}
+
+    paths = find_audio_files(folder)
+    total = len(paths)
+    report(0, total, f"Found {total} audio files")
+    if not paths:
+        return result
+
+    try:
+        connection = connect_db()
+        if not connection:
+            result["failed"] = total
+            return result
+
+        cursor = connection.cursor()
+        hashed = backfill_hashes(connection, cursor)
+        if hashed:
+            report(0, total, f"Hashed {hashed} stored songs")
+        lookups = load_lookups(cursor)
+        seen_hashes = set()
+        batch = []
+        done = 0
+
+        def flush():
+            """Insert the pending batch, counting it as failed if the transaction fails"""
+            try:
+                imported, duplicates = insert_batch(connection, cursor, lookups, batch, seen_hashes)
+                result["imported"] += imported
+                result["duplicates"] += duplicates
+            except (mysql.connector.Error, OSError) as e:
+                print(f"Error importing batch: {e}")
+                result["failed"] += len(batch)
+            batch.clear()
+
+        # Tags, durations and hashes are read in parallel; inserts stay on one connection
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for info in pool.map(read_file_info, paths, chunksize=READ_CHUNK):
+                done += 1
+                if info is None:
+                    result["failed"] += 1
+                else:
+                    batch.append(info)
+                    if len(batch) >= BATCH_SIZE:
+                        flush()
+                        report(done, total, f"Imported {result['imported']} songs")
+
+        if batch:
+            flush()
+
+        elapsed = time.time() - started
+        report(total, total, f"Imported {result['imported']} songs, skipped {result['duplicates']} duplicates, "
+                             f"{result['failed']} failed in {elapsed:.0f}s")
+        return result
+
+    except mysql.connector.Error as e:
+        print(f"Error importing folder: {e}")
+        result["failed"] = total - result["imported"] - result["duplicates"]
+        return result
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+# ------------------- Main Entry Point -------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import a folder tree of audio files into the catalogue")
+    parser.add_argument("folder", help="Folder to import (searched recursively)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for reading tags")
+    parser.add_argument("--skip-features", action="store_true", help="Do not extract audio features afterwards")
+    args = parser.parse_args()
+
+    def print_progress(done, total, message):
+        # admin_songs.py reads these lines for its progress bar
+        print(f"[{done}/{total}] {message}", flush=True)
+
+    result = import_folder(args.folder, args.workers, print_progress)
+
+    if result["imported"] and not args.skip_features:
+        import audio_features
+        audio_features.backfill_features(args.workers)
@@ -6,11 +6,9 @@ import os
 import io
 import shutil
 from pygame import mixer
-import mutagen
-from mutagen.mp3 import MP3
-from mutagen.id3 import ID3
-from mutagen.flac import FLAC
-from mutagen.wave import WAVE
+import autoplay
+import history_buffer
+import upload_worker
 
 # Initialize mixer for music playback
 mixer.init()
@@ -24,6 +22,12 @@ current_song = {
     "paused": False
 }
 
+# Autoplay state: the player picks the next song when the current one ends
+autoplay_state = {
+    "enabled": True,
+    "recent": []
+}
+
 # Keep track of selected song
 selected_song = {
     "id": None,
@@ -31,6 +35,12 @@ selected_song = {
     "artist": None
 }
 
+# How often upload progress is redrawn
+UPLOAD_POLL_MS = 200
+
+# The uploads window and, per job ID, the upload's job and progress widgets
+uploads_state = {"window": None, "frame": None, "rows": {}, "polling": False}
+
 # ------------------- Database Functions -------------------
 def connect_db():
     """Connect to the MySQL database"""
@@ -94,35 +104,38 @@ def get_popular_songs(limit=8):
             
         cursor = connection.cursor(dictionary=True)
         
-        # Get songs with most plays in listening history
+        # Get songs with most plays (top-N read on the Song_Stats play count index)
         query = """
-        SELECT s.song_id, s.title, a.name as artist_name, COUNT(lh.history_id) as play_count, 
+        SELECT s.song_id, s.title, a.name as artist_name, ss.play_count, 
                g.name as genre_name, s.file_size, s.file_type
-        FROM Songs s
+        FROM Song_Stats ss
+        JOIN Songs s ON ss.song_id = s.song_id
         JOIN Artists a ON s.artist_id = a.artist_id
         LEFT JOIN Genres g ON s.genre_id = g.genre_id
-        LEFT JOIN Listening_History lh ON s.song_id = lh.song_id
-        GROUP BY s.song_id
-        ORDER BY play_count DESC
+        WHERE ss.play_count > 0
+        ORDER BY ss.play_count DESC
         LIMIT %s
         """
         
         cursor.execute(query, (limit,))
         songs = cursor.fetchall()
         
-        # If no songs with play history, get newest songs
-        if not songs:
-            query = """
+        # If not enough songs with play history, fill with newest songs
+        if len(songs) < limit:
+            exclude_ids = [song['song_id'] for song in songs] or [0]
+            placeholders = ", ".join(["%s"] * len(exclude_ids))
+            query = f"""
             SELECT s.song_id, s.title, a.name as artist_name, s.file_size, s.file_type,
                    g.name as genre_name, 0 as play_count
             FROM Songs s
             JOIN Artists a ON s.artist_id = a.artist_id
             LEFT JOIN Genres g ON s.genre_id = g.genre_id
+            WHERE s.song_id NOT IN ({placeholders})
             ORDER BY s.upload_date DESC
             LIMIT %s
             """
-            cursor.execute(query, (limit,))
-            songs = cursor.fetchall()
+            cursor.execute(query, exclude_ids + [limit - len(songs)])
+            songs.extend(cursor.fetchall())
             
         # Format file sizes to human-readable format
         for song in songs:
@@ -153,13 +166,13 @@ def get_user_favorite_songs(limit=8):
         
         # Get songs the user has listened to most
         query = """
-        SELECT s.song_id, s.title, a.name as artist_name, COUNT(lh.history_id) as play_count,
+        SELECT s.song_id, s.title, a.name as artist_name, CAST(SUM(usp.play_count) AS UNSIGNED) as play_count,
                g.name as genre_name, s.file_size, s.file_type
-        FROM Listening_History lh
-        JOIN Songs s ON lh.song_id = s.song_id
+        FROM User_Song_Plays usp
+        JOIN Songs s ON usp.song_id = s.song_id
         JOIN Artists a ON s.artist_id = a.artist_id
         LEFT JOIN Genres g ON s.genre_id = g.genre_id
-        WHERE lh.user_id = %s
+        WHERE usp.user_id = %s
         GROUP BY s.song_id
         ORDER BY play_count DESC
         LIMIT %s
@@ -224,22 +237,11 @@ def record_listening_history(song_id):
         with open("current_user.txt", "r") as f:
             user_id = f.read().strip()
             
-        connection = connect_db()
-        if not connection:
-            return
-            
-        cursor = connection.cursor()
-        
-        query = "INSERT INTO Listening_History (user_id, song_id) VALUES (%s, %s)"
-        cursor.execute(query, (user_id, song_id))
-        connection.commit()
+        # Queued and written in batches by a background thread
+        history_buffer.record(user_id, song_id)
         
     except Exception as e:
         print(f"Error recording listening history: {e}")
-    finally:
-        if 'connection' in locals() and connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 def get_artists():
     """Get list of artists from the database"""
@@ -285,70 +287,6 @@ def get_genres():
             cursor.close()
             connection.close()
 
-def upload_song(file_path, title, artist_id, genre_id=None):
-    """Upload a song to the database"""
-    try:
-        if not os.path.exists(file_path):
-            messagebox.showerror("Error", f"File not found: {file_path}")
-            return None
-        
-        # Get file information
-        file_size = os.path.getsize(file_path)
-        file_type = os.path.splitext(file_path)[1][1:].lower()  # Get extension without dot
-        
-        # Get song duration using mutagen
-        try:
-            if file_type == 'mp3':
-                audio = MP3(file_path)
-            elif file_type == 'flac':
-                audio = FLAC(file_path)
-            elif file_type in ['wav', 'wave']:
-                audio = WAVE(file_path)
-            else:
-                # Fallback for other formats
-                audio = mutagen.File(file_path)
-                
-            duration = int(audio.info.length)
-        except Exception as e:
-            print(f"Error getting audio duration: {e}")
-            duration = 0
-        
-        # Read file binary data
-        with open(file_path, 'rb') as file:
-            file_data = file.read()
-        
-        # Insert into database
-        connection = connect_db()
-        if not connection:
-            return None
-            
-        cursor = connection.cursor()
-        
-        query = """
-        INSERT INTO Songs (title, artist_id, genre_id, duration, file_data, file_type, file_size)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        values = (title, artist_id, genre_id, duration, file_data, file_type, file_size)
-        
-        cursor.execute(query, values)
-        connection.commit()
-        
-        # Return the new song ID
-        new_song_id = cursor.lastrowid
-        
-        messagebox.showinfo("Success", f"Song '{title}' uploaded successfully!")
-        return new_song_id
-        
-    except mysql.connector.Error as e:
-        print(f"Error uploading song: {e}")
-        messagebox.showerror("Database Error", f"Failed to upload song: {e}")
-        return None
-    finally:
-        if 'connection' in locals() and connection and connection.is_connected():
-            cursor.close()
-            connection.close()
-
 def format_file_size(size_bytes):
     """Format file size from bytes to human-readable format"""
     if not size_bytes:
@@ -412,6 +350,9 @@ def play_song(song_id):
         # Record in listening history
         record_listening_history(song_id)
         
+        # Remember recent songs so autoplay does not repeat them
+        autoplay_state["recent"] = (autoplay_state["recent"] + [song_id])[-20:]
+        
         return True
         
     except Exception as e:
@@ -440,8 +381,29 @@ def toggle_play_pause():
         play_btn.configure(text="▶️")
 
 def play_next_song():
-    """Placeholder for playing next song"""
-    messagebox.showinfo("Info", "Next song feature will be implemented with playlists")
+    """Play a song listeners often play after the current one"""
+    if current_song["id"] is None:
+        messagebox.showinfo("Info", "Play a song first to start autoplay")
+        return False
+    
+    next_id = autoplay.predict_next(current_song["id"], set(autoplay_state["recent"]))
+    if next_id is None:
+        messagebox.showinfo("Info", "No next song prediction for this song yet")
+        return False
+    return play_song(next_id)
+
+def check_song_finished():
+    """Autoplay the next song when the current one finishes"""
+    if autoplay_state["enabled"] and current_song["playing"] and not mixer.music.get_busy():
+        next_id = autoplay.predict_next(current_song["id"], set(autoplay_state["recent"]))
+        if next_id is None or not play_song(next_id):
+            current_song["playing"] = False
+            play_btn.configure(text="▶️")
+    root.after(1000, check_song_finished)
+
+def toggle_autoplay():
+    """Turn autoplay on or off"""
+    autoplay_state["enabled"] = bool(autoplay_switch.get())
 
 def play_previous_song():
     """Placeholder for playing previous song"""
@@ -664,12 +626,96 @@ def handle_upload_song():
     # Wait for dialog to close
     root.wait_window(genre_select)
     
-    # Upload the song
-    song_id = upload_song(file_path, title, artist_id, genre_id)
+    # Upload the song in the background; its progress is shown in the uploads window
+    try:
+        job = upload_worker.submit(file_path, title, artist_id, genre_id)
+    except OSError as e:
+        messagebox.showerror("Error", f"File not found: {e}")
+        return
+    
+    show_upload(job)
+
+def show_upload(job):
+    """Add an upload to the uploads window, opening the window if needed"""
+    if uploads_state["window"] is None:
+        window = ctk.CTkToplevel(root)
+        window.title("Uploads")
+        window.geometry("560x300")
+        window.transient(root)
+        
+        # Closing only hides the window, so running uploads keep their progress rows
+        window.protocol("WM_DELETE_WINDOW", window.withdraw)
+        
+        uploads_frame = ctk.CTkScrollableFrame(window, fg_color="#131B2E")
+        uploads_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        uploads_state["window"] = window
+        uploads_state["frame"] = uploads_frame
+    else:
+        uploads_state["window"].deiconify()
+    
+    row = ctk.CTkFrame(uploads_state["frame"], fg_color="#1A1A2E")
+    row.pack(fill="x", pady=5)
+    
+    ctk.CTkLabel(row, text=job["title"], font=("Arial", 13, "bold"), anchor="w").pack(fill="x", padx=10, pady=(5, 0))
+    
+    progress_bar = ctk.CTkProgressBar(row, progress_color="#B146EC")
+    progress_bar.set(0)
+    progress_bar.pack(side="left", fill="x", expand=True, padx=10, pady=5)
+    
+    status_label = ctk.CTkLabel(row, text="Queued", font=("Arial", 12), text_color="#A0A0A0", width=170)
+    status_label.pack(side="left")
+    
+    cancel_btn = ctk.CTkButton(
+        row,
+        text="Cancel",
+        command=lambda: upload_worker.cancel(job),
+        fg_color="#DC2626",
+        hover_color="#B91C1C",
+        width=70
+    )
+    cancel_btn.pack(side="left", padx=10)
+    
+    uploads_state["rows"][job["job_id"]] = (job, progress_bar, status_label, cancel_btn)
+    
+    if not uploads_state["polling"]:
+        uploads_state["polling"] = True
+        root.after(UPLOAD_POLL_MS, update_uploads)
+
+def update_uploads():
+    """Redraw upload progress and handle finished uploads (runs on the UI thread)"""
+    for job, progress_bar, status_label, cancel_btn in uploads_state["rows"].values():
+        if job["status"] == "uploading" and job["size"]:
+            progress_bar.set(job["sent"] / job["size"])
+            status_label.configure(text=f"{format_file_size(job['sent'])} / {format_file_size(job['size'])}")
+        elif job["status"] == "storing":
+            progress_bar.set(1)
+            status_label.configure(text="Saving...")
+            cancel_btn.configure(state="disabled")
+    
+    finished = upload_worker.collect_finished()
+    for job in finished:
+        if job["job_id"] not in uploads_state["rows"]:
+            continue
+        _, progress_bar, status_label, cancel_btn = uploads_state["rows"].pop(job["job_id"])
+        cancel_btn.configure(state="disabled")
+        if job["status"] == "done":
+            progress_bar.set(1)
+            status_label.configure(text="Uploaded", text_color="#16A34A")
+        elif job["status"] == "cancelled":
+            status_label.configure(text="Cancelled")
+        else:
+            status_label.configure(text="Failed", text_color="#DC2626")
+            messagebox.showerror("Database Error", f"Failed to upload song '{job['title']}': {job['error']}")
     
-    if song_id:
+    if any(job["status"] == "done" for job in finished):
         # Refresh the song list
         refresh_song_list()
+    
+    if uploads_state["rows"]:
+        root.after(UPLOAD_POLL_MS, update_uploads)
+    else:
+        uploads_state["polling"] = False
 
 # ------------------- Navigation Functions -------------------
 def open_home_page():
@@ -979,6 +1025,13 @@ try:
                                    wraplength=220)
     now_playing_label.pack(pady=5)
 
+    # Autoplay toggle
+    autoplay_switch = ctk.CTkSwitch(now_playing_frame, text="Autoplay", font=("Arial", 12),
+                                  text_color="#A0A0A0", progress_color="#B146EC",
+                                  command=toggle_autoplay)
+    autoplay_switch.select()
+    autoplay_switch.pack(pady=(0, 5))
+
     # Music player controls at bottom of sidebar
     player_frame = ctk.CTkFrame(sidebar, fg_color="#111827", height=50)
     player_frame.pack(side="bottom", fill="x", pady=10, padx=10)
@@ -1067,6 +1120,9 @@ try:
     upload_button.pack(side="left", padx=10)
 
     # ---------------- Run Application ----------------
+    # Watch for songs ending so autoplay can continue the session
+    root.after(1000, check_song_finished)
+
     root.mainloop()
     
 except Exception as e:
@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import uuid
+import queue
+import atexit
+import datetime
+import threading
+import play_events
+
+# A batch is written once this many plays are waiting...
+FLUSH_EVENTS = 50
+
+# ...or once the oldest waiting play is this many seconds old
+FLUSH_SECONDS = 5
+
+# Plays that could not be written are kept here until MySQL is reachable again
+SPOOL_FILE = os.path.join("temp", "history_spool.jsonl")
+
+# Plays waiting to be written: (user_id, song_id, played_at)
+play_queue = queue.Queue()
+
+# One writer thread per process; flushes and spool replays never overlap
+# (re-entrant, since a flush replays the spool while holding it)
+buffer_state = {"thread": None}
+flush_lock = threading.RLock()
+play_queued = threading.Event()
+
+# ------------------- Spool File -------------------
+def spool_plays(plays):
+    """Append plays that could not be written to the spool file"""
+    try:
+        os.makedirs(os.path.dirname(SPOOL_FILE), exist_ok=True)
+        with open(SPOOL_FILE, "a") as f:
+            for user_id, song_id, played_at in plays:
+                f.write(json.dumps([user_id, song_id, played_at.isoformat()]) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+    except OSError as e:
+        print(f"Error spooling {len(plays)} plays: {e}")
+
+def replay_spool():
+    """Write spooled plays to the database; they go back to the spool if it cannot take them now"""
+    with flush_lock:
+        if not os.path.exists(SPOOL_FILE):
+            return 0
+
+        # Renaming claims the spool; the unique name means no other process or thread
+        # can overwrite a claimed spool while it is being replayed
+        claimed = f"{SPOOL_FILE}.{os.getpid()}.{uuid.uuid4().hex}"
+        try:
+            os.replace(SPOOL_FILE, claimed)
+        except OSError as e:
+            # Another process claimed it first
+            print(f"Error claiming spooled plays: {e}")
+            return 0
+
+        plays = []
+        try:
+            with open(claimed, "r") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        user_id, song_id, played_at = json.loads(line)
+                        plays.append((user_id, song_id, datetime.datetime.fromisoformat(played_at)))
+                    except (ValueError, TypeError) as e:
+                        # A line torn by a crash mid-write is skipped, not the whole spool
+                        print(f"Skipping bad spooled play {line.strip()!r}: {e}")
+        except OSError as e:
+            print(f"Error reading spooled plays: {e}")
+            return 0
+
+        if plays and not play_events.record_plays(plays):
+            spool_plays(plays)
+            plays = []
+
+        try:
+            os.remove(claimed)
+        except OSError as e:
+            print(f"Error removing replayed spool: {e}")
+        return len(plays)
+
+# ------------------- Flushing -------------------
+def flush():
+    """Write every waiting play in one batch (plays are spooled if the database cannot take them now)"""
+    with flush_lock:
+        plays = []
+        while True:
+            try:
+                plays.append(play_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        if not plays:
+            return 0
+
+        if not play_events.record_plays(plays):
+            spool_plays(plays)
+            return 0
+
+        # The database is reachable, so older spooled plays can go too
+        replay_spool()
+        return len(plays)
+
+def writer_loop():
+    """Background thread: flush every FLUSH_EVENTS plays or FLUSH_SECONDS, whichever comes first"""
+    while True:
+        # Sleep until a play is queued, then give the batch time to fill up
+        play_queued.wait()
+        play_queued.clear()
+        deadline = time.time() + FLUSH_SECONDS
+        while play_queue.qsize() < FLUSH_EVENTS and time.time() < deadline:
+            time.sleep(0.1)
+        flush()
+
+def start():
+    """Start the writer thread (once per process) and replay anything left in the spool"""
+    if buffer_state["thread"] is not None:
+        return
+
+    buffer_state["thread"] = threading.Thread(target=writer_loop, daemon=True)
+    buffer_state["thread"].start()
+
+    threading.Thread(target=replay_spool, daemon=True).start()
+
+# Plays still waiting when the page closes are written (or spooled) on the way out
+atexit.register(flush)
+
+# ------------------- Public API -------------------
+def record(user_id, song_id):
+    """Queue a play; it is written in the background within FLUSH_SECONDS"""
+    start()
+    # The play time is taken now, not when the batch reaches the database
+    play_queue.put((user_id, song_id, datetime.datetime.now()))
+    play_queued.set()
@@ -0,0 +1,381 @@
+import mysql.connector
+import os
+import csv
+import gzip
+import time
+import argparse
+import datetime
+
+# Raw plays are kept this many whole months before their partition is dropped
+RAW_RETENTION_MONTHS = 3
+
+# Empty partitions created ahead of time, so new plays never land in p_future
+PARTITIONS_AHEAD = 3
+
+# Days are rolled up once they are this many days old, leaving room for late plays
+ROLLUP_DELAY_DAYS = 1
+
+# Dropped partitions are written here first (gzipped CSV)
+ARCHIVE_DIR = "archive"
+
+# Plays in the admin activity feed (Activity_Log song_played rows) are kept this many days;
+# sign-ups, uploads and new playlists are kept
+ACTIVITY_PLAY_DAYS = 7
+
+# Deleted_Rows tombstones are kept this many days; admin lists last synced before that reload in full
+TOMBSTONE_DAYS = 1
+
+# Tables whose deletions are recorded in Deleted_Rows
+TOMBSTONE_TABLES = ("Users", "Songs")
+
+# Log rows deleted per statement, so each delete holds its locks only briefly
+PRUNE_BATCH = 5000
+
+# ------------------- Database Functions -------------------
+def connect_db():
+    """Connect to the MySQL database"""
+    try:
+        connection = mysql.connector.connect(
+            host="localhost",
+            user="root",
+            password="new_password",
+            database="online_music_system"
+        )
+        return connection
+    except mysql.connector.Error as err:
+        print(f"Error connecting to database: {err}")
+        return None
+
+# ------------------- Partitions -------------------
+def month_start(day, offset=0):
+    """Return the first day of the month offset months from day's month"""
+    months = day.year * 12 + day.month - 1 + offset
+    return datetime.date(months // 12, months % 12 + 1, 1)
+
+def partition_name(month):
+    """Name of the partition holding a month's plays (e.g. p202610)"""
+    return f"p{month:%Y%m}"
+
+def partition_definition(month):
+    """Partition clause for one month, bounded by the start of the next"""
+    return (f"PARTITION {partition_name(month)} VALUES LESS THAN "
+            f"(UNIX_TIMESTAMP('{month_start(month, 1):%Y-%m-%d} 00:00:00'))")
+
+def get_partitions(cursor):
+    """Return the partition names of Listening_History in order (empty if unpartitioned)"""
+    cursor.execute("""
+    SELECT PARTITION_NAME
+    FROM INFORMATION_SCHEMA.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Listening_History'
+      AND PARTITION_NAME IS NOT NULL
+    ORDER BY PARTITION_ORDINAL_POSITION
+    """)
+    return [row[0] for row in cursor.fetchall()]
+
+def partition_history(cursor):
+    """Convert an unpartitioned Listening_History (older installs) to monthly partitions"""
+    # Partitioned InnoDB tables cannot have foreign keys; history deletes are explicit instead
+    cursor.execute("""
+    SELECT CONSTRAINT_NAME
+    FROM INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS
+    WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = 'Listening_History'
+    """)
+    for (constraint,) in cursor.fetchall():
+        cursor.execute(f"ALTER TABLE Listening_History DROP FOREIGN KEY {constraint}")
+
+    # The partitioning column has to be part of the primary key
+    cursor.execute("""
+    ALTER TABLE Listening_History
+        MODIFY played_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        DROP PRIMARY KEY,
+        ADD PRIMARY KEY (history_id, played_at)
+    """)
+
+    cursor.execute("SELECT MIN(played_at) FROM Listening_History")
+    earliest = cursor.fetchone()[0]
+    month = month_start(earliest.date() if earliest else datetime.date.today())
+    last = month_start(datetime.date.today(), PARTITIONS_AHEAD)
+
+    definitions = []
+    while month <= last:
+        definitions.append(partition_definition(month))
+        month = month_start(month, 1)
+    definitions.append("PARTITION p_future VALUES LESS THAN MAXVALUE")
+
+    cursor.execute(f"""
+    ALTER TABLE Listening_History
+    PARTITION BY RANGE (UNIX_TIMESTAMP(played_at)) (
+        {", ".join(definitions)}
+    )
+    """)
+    print(f"Partitioned Listening_History into {len(definitions)} partitions.")
+
+def add_partitions(cursor, partitions):
+    """Split upcoming months off p_future"""
+    months = sorted(p for p in partitions if p != "p_future")
+    if months:
+        month = month_start(datetime.datetime.strptime(months[-1], "p%Y%m").date(), 1)
+    else:
+        # Fresh install: start at the earliest play, or this month
+        cursor.execute("SELECT MIN(played_at) FROM Listening_History")
+        earliest = cursor.fetchone()[0]
+        month = month_start(earliest.date() if earliest else datetime.date.today())
+
+    last = month_start(datetime.date.today(), PARTITIONS_AHEAD)
+    definitions = []
+    while month <= last:
+        definitions.append(partition_definition(month))
+        month = month_start(month, 1)
+
+    if not definitions:
+        return 0
+
+    # p_future is kept empty by creating months ahead, so this split moves no rows
+    definitions.append("PARTITION p_future VALUES LESS THAN MAXVALUE")
+    cursor.execute(f"""
+    ALTER TABLE Listening_History
+    REORGANIZE PARTITION p_future INTO ({", ".join(definitions)})
+    """)
+    return len(definitions) - 1
+
+def maintain_partitions():
+    """Make sure Listening_History is partitioned and has partitions for the coming months"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return False
+
+        cursor = connection.cursor()
+
+        partitions = get_partitions(cursor)
+        if not partitions:
+            partition_history(cursor)
+        else:
+            added = add_partitions(cursor, partitions)
+            if added:
+                print(f"Added {added} monthly partitions to Listening_History.")
+
+        return True
+
+    except mysql.connector.Error as e:
+        print(f"Error maintaining history partitions: {e}")
+        return False
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+# ------------------- Rollups -------------------
+def get_rollup_cutoff(cursor):
+    """First day whose plays are still read from the raw history (same rule as User_Song_Plays)"""
+    cursor.execute("SELECT MAX(play_date) FROM Daily_User_Song_Plays")
+    last = cursor.fetchone()[0]
+    if last:
+        return last + datetime.timedelta(days=1)
+
+    cursor.execute("SELECT MIN(played_at) FROM Listening_History")
+    earliest = cursor.fetchone()[0]
+    return earliest.date() if earliest else None
+
+def rollup_history():
+    """Roll complete days of raw plays up into Daily_User_Song_Plays, one day per transaction"""
+    started = time.time()
+    try:
+        connection = connect_db()
+        if not connection:
+            return 0
+
+        cursor = connection.cursor()
+
+        day = get_rollup_cutoff(cursor)
+        if day is None:
+            return 0
+
+        last_day = datetime.date.today() - datetime.timedelta(days=ROLLUP_DELAY_DAYS + 1)
+        days = 0
+        while day <= last_day:
+            # The range on played_at prunes to one partition. A plain INSERT makes a
+            # second rollup of the same day fail instead of double counting it.
+            cursor.execute("""
+            INSERT INTO Daily_User_Song_Plays
+                (play_date, user_id, song_id, play_count, first_played_at, last_played_at)
+            SELECT DATE(lh.played_at), lh.user_id, lh.song_id, COUNT(*), MIN(lh.played_at), MAX(lh.played_at)
+            FROM Listening_History lh
+            JOIN Users u ON lh.user_id = u.user_id
+            JOIN Songs s ON lh.song_id = s.song_id
+            WHERE lh.played_at >= %s AND lh.played_at < %s
+            GROUP BY DATE(lh.played_at), lh.user_id, lh.song_id
+            """, (day, day + datetime.timedelta(days=1)))
+            connection.commit()
+            day += datetime.timedelta(days=1)
+            days += 1
+
+        if days:
+            print(f"Rolled up {days} days of listening history in {time.time() - started:.1f}s.")
+        return days
+
+    except mysql.connector.Error as e:
+        print(f"Error rolling up listening history: {e}")
+        return 0
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+# ------------------- Retention -------------------
+def archive_partition(connection, partition, batch=10000):
+    """Write one partition's rows to a gzipped CSV file in ARCHIVE_DIR"""
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    path = os.path.join(ARCHIVE_DIR, f"listening_history_{partition[1:]}.csv.gz")
+    temp_path = path + ".tmp"
+
+    # Unbuffered cursor: the partition is streamed to disk, not loaded into memory
+    cursor = connection.cursor()
+    cursor.execute(f"""
+    SELECT history_id, user_id, song_id, played_at
+    FROM Listening_History PARTITION ({partition})
+    """)
+    rows = 0
+    with gzip.open(temp_path, "wt", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["history_id", "user_id", "song_id", "played_at"])
+        while True:
+            chunk = cursor.fetchmany(batch)
+            if not chunk:
+                break
+            writer.writerows(chunk)
+            rows += len(chunk)
+    cursor.close()
+    os.replace(temp_path, path)
+    return rows
+
+def drop_old_partitions(retention_months=RAW_RETENTION_MONTHS, archive=True):
+    """Drop raw partitions older than the retention window that are fully rolled up"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return 0
+
+        cursor = connection.cursor()
+
+        cutoff = get_rollup_cutoff(cursor)
+        if cutoff is None:
+            return 0
+
+        # A month may go once it is past retention and every one of its days is rolled up
+        keep_from = min(month_start(datetime.date.today(), -retention_months), cutoff)
+
+        dropped = 0
+        for partition in get_partitions(cursor):
+            if partition == "p_future":
+                continue
+            month = datetime.datetime.strptime(partition, "p%Y%m").date()
+            if month_start(month, 1) > keep_from:
+                continue
+
+            if archive:
+                rows = archive_partition(connection, partition)
+                print(f"Archived {rows} plays from {partition}.")
+
+            # Dropping a partition is a metadata change, unlike deleting its rows
+            cursor.execute(f"ALTER TABLE Listening_History DROP PARTITION {partition}")
+            dropped += 1
+
+        return dropped
+
+    except (mysql.connector.Error, OSError) as e:
+        print(f"Error dropping old history partitions: {e}")
+        return 0
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+# ------------------- Log Pruning -------------------
+def delete_in_batches(connection, cursor, query, params, batch=PRUNE_BATCH):
+    """Run a DELETE ... LIMIT %s repeatedly, one commit per batch, until it deletes fewer rows"""
+    deleted = 0
+    while True:
+        cursor.execute(query, list(params) + [batch])
+        rows = cursor.rowcount
+        connection.commit()
+        deleted += rows
+        if rows < batch:
+            return deleted
+
+def prune_activity_log(days=ACTIVITY_PLAY_DAYS):
+    """Delete plays older than the given number of days from the activity feed"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return 0
+
+        cursor = connection.cursor()
+
+        # Oldest first along the (occurred_at, activity_id) index
+        deleted = delete_in_batches(connection, cursor, """
+        DELETE FROM Activity_Log
+        WHERE occurred_at < NOW() - INTERVAL %s DAY AND activity_type = 'song_played'
+        ORDER BY occurred_at
+        LIMIT %s
+        """, [days])
+        if deleted:
+            print(f"Pruned {deleted} plays from the activity log.")
+        return deleted
+
+    except mysql.connector.Error as e:
+        print(f"Error pruning the activity log: {e}")
+        return 0
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def prune_tombstones(days=TOMBSTONE_DAYS):
+    """Delete Deleted_Rows tombstones older than the given number of days"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return 0
+
+        cursor = connection.cursor()
+
+        # One table at a time, oldest first along the (table_name, deleted_at) index
+        deleted = 0
+        for table in TOMBSTONE_TABLES:
+            deleted += delete_in_batches(connection, cursor, """
+            DELETE FROM Deleted_Rows
+            WHERE table_name = %s AND deleted_at < NOW() - INTERVAL %s DAY
+            ORDER BY deleted_at
+            LIMIT %s
+            """, [table, days])
+        if deleted:
+            print(f"Pruned {deleted} deleted-row tombstones.")
+        return deleted
+
+    except mysql.connector.Error as e:
+        print(f"Error pruning tombstones: {e}")
+        return 0
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def run_retention(retention_months=RAW_RETENTION_MONTHS, archive=True):
+    """Scheduled job: add partitions, roll up finished days, drop expired raw months and prune logs"""
+    maintain_partitions()
+    rollup_history()
+    dropped = drop_old_partitions(retention_months, archive)
+    prune_activity_log()
+    prune_tombstones()
+    print(f"History retention done ({dropped} partitions dropped).")
+
+# ------------------- Main Entry Point -------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Partition, roll up and expire listening history")
+    parser.add_argument("--retention-months", type=int, default=RAW_RETENTION_MONTHS,
+                        help="Whole months of raw plays to keep")
+    parser.add_argument("--no-archive", action="store_true", help="Drop old partitions without archiving them")
+    args = parser.parse_args()
+
+    run_retention(args.retention_months, not args.no_archive)
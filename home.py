@@ -9,6 +9,10 @@ import time
 from PIL import Image, ImageTk
 from pygame import mixer
 import tempfile
+import song_index
+import autoplay
+import history_buffer
+import trending
 
 # Initialize mixer for music playback
 mixer.init()
@@ -22,6 +26,12 @@ current_song = {
     "paused": False
 }
 
+# Autoplay state: the player picks the next song when the current one ends
+autoplay_state = {
+    "enabled": True,
+    "recent": []
+}
+
 # ------------------- Database Functions -------------------
 def connect_db():
     """Connect to the MySQL database"""
@@ -85,31 +95,34 @@ def get_featured_songs(limit=3):
             
         cursor = connection.cursor(dictionary=True)
         
-        # Get songs with most plays in listening history
+        # Get songs with most plays (top-N read on the Song_Stats play count index)
         query = """
-        SELECT s.song_id, s.title, a.name as artist_name, COUNT(lh.history_id) as play_count 
-        FROM Songs s
+        SELECT s.song_id, s.title, a.name as artist_name, ss.play_count 
+        FROM Song_Stats ss
+        JOIN Songs s ON ss.song_id = s.song_id
         JOIN Artists a ON s.artist_id = a.artist_id
-        LEFT JOIN Listening_History lh ON s.song_id = lh.song_id
-        GROUP BY s.song_id
-        ORDER BY play_count DESC
+        WHERE ss.play_count > 0
+        ORDER BY ss.play_count DESC
         LIMIT %s
         """
         
         cursor.execute(query, (limit,))
         songs = cursor.fetchall()
         
-        # If no songs with play history, get newest songs
-        if not songs:
-            query = """
-            SELECT s.song_id, s.title, a.name as artist_name 
+        # If not enough songs with play history, fill with newest songs
+        if len(songs) < limit:
+            exclude_ids = [song['song_id'] for song in songs] or [0]
+            placeholders = ", ".join(["%s"] * len(exclude_ids))
+            query = f"""
+            SELECT s.song_id, s.title, a.name as artist_name, 0 as play_count 
             FROM Songs s
             JOIN Artists a ON s.artist_id = a.artist_id
+            WHERE s.song_id NOT IN ({placeholders})
             ORDER BY s.upload_date DESC
             LIMIT %s
             """
-            cursor.execute(query, (limit,))
-            songs = cursor.fetchall()
+            cursor.execute(query, exclude_ids + [limit - len(songs)])
+            songs.extend(cursor.fetchall())
             
         return songs
         
@@ -174,30 +187,53 @@ def get_song_info(song_id):
             cursor.close()
             connection.close()
 
-def record_listening_history(song_id):
-    """Record that the current user listened to a song"""
+def get_similar_songs(song_id, limit=8):
+    """Get songs that sound like the given song from the similar-songs index"""
+    similar_ids = song_index.find_similar(song_id, limit)
+    if not similar_ids:
+        return []
+
     try:
-        # Get current user ID
-        with open("current_user.txt", "r") as f:
-            user_id = f.read().strip()
-            
         connection = connect_db()
         if not connection:
-            return
+            return []
             
-        cursor = connection.cursor()
+        cursor = connection.cursor(dictionary=True)
+        
+        placeholders = ", ".join(["%s"] * len(similar_ids))
+        query = f"""
+        SELECT s.song_id, s.title, a.name as artist_name
+        FROM Songs s
+        JOIN Artists a ON s.artist_id = a.artist_id
+        WHERE s.song_id IN ({placeholders})
+        """
+        cursor.execute(query, similar_ids)
         
-        query = "INSERT INTO Listening_History (user_id, song_id) VALUES (%s, %s)"
-        cursor.execute(query, (user_id, song_id))
-        connection.commit()
+        # Keep the index's similarity order
+        songs = {song["song_id"]: song for song in cursor.fetchall()}
+        return [songs[sid] for sid in similar_ids if sid in songs]
         
-    except Exception as e:
-        print(f"Error recording listening history: {e}")
+    except mysql.connector.Error as e:
+        print(f"Error fetching similar songs: {e}")
+        return []
     finally:
         if 'connection' in locals() and connection and connection.is_connected():
             cursor.close()
             connection.close()
 
+def record_listening_history(song_id):
+    """Record that the current user listened to a song"""
+    try:
+        # Get current user ID
+        with open("current_user.txt", "r") as f:
+            user_id = f.read().strip()
+            
+        # Queued and written in batches by a background thread
+        history_buffer.record(user_id, song_id)
+        
+    except Exception as e:
+        print(f"Error recording listening history: {e}")
+
 # ------------------- Music Player Functions -------------------
 def play_song(song_id):
     """Play a song from its binary data in the database"""
@@ -246,6 +282,9 @@ def play_song(song_id):
         # Record in listening history
         record_listening_history(song_id)
         
+        # Remember recent songs so autoplay does not repeat them
+        autoplay_state["recent"] = (autoplay_state["recent"] + [song_id])[-20:]
+        
         return True
         
     except Exception as e:
@@ -276,9 +315,29 @@ def toggle_play_pause():
         play_btn.configure(text="▶️")
 
 def play_next_song():
-    """Play the next song in the playlist"""
-    # This is a placeholder that would be implemented with your playlist functionality
-    messagebox.showinfo("Info", "Next song feature will be implemented with playlists")
+    """Play a song listeners often play after the current one"""
+    if current_song["id"] is None:
+        messagebox.showinfo("Info", "Play a song first to start autoplay")
+        return False
+    
+    next_id = autoplay.predict_next(current_song["id"], set(autoplay_state["recent"]))
+    if next_id is None:
+        messagebox.showinfo("Info", "No next song prediction for this song yet")
+        return False
+    return play_song(next_id)
+
+def check_song_finished():
+    """Autoplay the next song when the current one finishes"""
+    if autoplay_state["enabled"] and current_song["playing"] and not mixer.music.get_busy():
+        next_id = autoplay.predict_next(current_song["id"], set(autoplay_state["recent"]))
+        if next_id is None or not play_song(next_id):
+            current_song["playing"] = False
+            play_btn.configure(text="▶️")
+    root.after(1000, check_song_finished)
+
+def toggle_autoplay():
+    """Turn autoplay on or off"""
+    autoplay_state["enabled"] = bool(autoplay_switch.get())
 
 def play_previous_song():
     """Play the previous song in the playlist"""
@@ -362,8 +421,93 @@ def create_song_card(parent, song_id, title, artist):
                                 command=lambda: play_song(song_id))
     play_song_btn.pack(pady=(15, 0))
     
+    # Similar songs button
+    similar_btn = ctk.CTkButton(song_card, text="🎧 Similar", 
+                              font=("Arial", 12),
+                              fg_color="#1A1A2E", hover_color="#232342",
+                              command=lambda: show_similar_songs(song_id))
+    similar_btn.pack(pady=(5, 0))
+    
     return song_card
 
+def show_similar_songs(song_id):
+    """Show a popup listing songs that sound like the given song"""
+    songs = get_similar_songs(song_id)
+    if not songs:
+        messagebox.showinfo("Similar Songs", "No similar songs found for this song yet.")
+        return
+    
+    similar_dialog = ctk.CTkToplevel(root)
+    similar_dialog.title("Similar Songs")
+    similar_dialog.geometry("420x400")
+    similar_dialog.configure(fg_color="#131B2E")
+    similar_dialog.transient(root)
+    
+    ctk.CTkLabel(similar_dialog, text="🎧 Similar Songs", 
+               font=("Arial", 18, "bold"), text_color="white").pack(pady=(15, 10))
+    
+    similar_list = ctk.CTkScrollableFrame(similar_dialog, fg_color="#131B2E")
+    similar_list.pack(fill="both", expand=True, padx=15, pady=(0, 15))
+    
+    for song in songs:
+        song_row = ctk.CTkFrame(similar_list, fg_color="#1A1A2E", corner_radius=5, height=40)
+        song_row.pack(fill="x", pady=2)
+        
+        ctk.CTkLabel(song_row, text=f"{song['artist_name']} - {song['title']}", font=("Arial", 12),
+                   text_color="white", anchor="w").pack(side="left", padx=10)
+        
+        play_btn = ctk.CTkButton(song_row, text="▶️", font=("Arial", 14), fg_color="#1A1A2E",
+                               hover_color="#232342", width=30, height=30, 
+                               command=lambda sid=song["song_id"]: play_song(sid))
+        play_btn.pack(side="right", padx=10)
+
+def show_trending_charts():
+    """Show the trending charts for the last hour, day and week"""
+    trending_dialog = ctk.CTkToplevel(root)
+    trending_dialog.title("Trending")
+    trending_dialog.geometry("460x480")
+    trending_dialog.configure(fg_color="#131B2E")
+    trending_dialog.transient(root)
+    
+    ctk.CTkLabel(trending_dialog, text="🔥 Trending Now", 
+               font=("Arial", 18, "bold"), text_color="white").pack(pady=(15, 10))
+    
+    chart_list = ctk.CTkScrollableFrame(trending_dialog, fg_color="#131B2E")
+    
+    windows = {"Last Hour": "1h", "24 Hours": "24h", "7 Days": "7d"}
+    
+    def show_chart(label):
+        for widget in chart_list.winfo_children():
+            widget.destroy()
+        
+        songs = trending.get_trending_songs(windows[label], 10)
+        if not songs:
+            ctk.CTkLabel(chart_list, text="No plays in this period yet.", 
+                       font=("Arial", 14), text_color="#A0A0A0").pack(pady=20)
+            return
+        
+        for song in songs:
+            song_row = ctk.CTkFrame(chart_list, fg_color="#1A1A2E", corner_radius=5, height=40)
+            song_row.pack(fill="x", pady=2)
+            
+            ctk.CTkLabel(song_row, text=f"{song['rank_pos']}. {song['artist_name']} - {song['title']}",
+                       font=("Arial", 12), text_color="white", anchor="w").pack(side="left", padx=10)
+            ctk.CTkLabel(song_row, text=f"{song['play_count']} plays · ~{song['listeners']} listeners", font=("Arial", 11),
+                       text_color="#A0A0A0").pack(side="right", padx=(0, 10))
+            
+            play_btn = ctk.CTkButton(song_row, text="▶️", font=("Arial", 14), fg_color="#1A1A2E",
+                                   hover_color="#232342", width=30, height=30, 
+                                   command=lambda sid=song["song_id"]: play_song(sid))
+            play_btn.pack(side="right", padx=5)
+    
+    window_selector = ctk.CTkSegmentedButton(trending_dialog, values=list(windows), 
+                                           selected_color="#2563EB", command=show_chart)
+    window_selector.set("24 Hours")
+    window_selector.pack(pady=(0, 10))
+    
+    chart_list.pack(fill="both", expand=True, padx=15, pady=(0, 15))
+    show_chart("24 Hours")
+
 # ------------------- Initialize App -------------------
 try:
     # Get current user info
@@ -436,6 +580,13 @@ try:
                                    wraplength=220)
     now_playing_label.pack(pady=5)
 
+    # Autoplay toggle
+    autoplay_switch = ctk.CTkSwitch(now_playing_frame, text="Autoplay", font=("Arial", 12),
+                                  text_color="#A0A0A0", progress_color="#B146EC",
+                                  command=toggle_autoplay)
+    autoplay_switch.select()
+    autoplay_switch.pack(pady=(0, 5))
+
     # Music player controls at bottom of sidebar
     player_frame = ctk.CTkFrame(sidebar, fg_color="#111827", height=50)
     player_frame.pack(side="bottom", fill="x", pady=10, padx=10)
@@ -493,10 +644,11 @@ try:
     button_frame = ctk.CTkFrame(hero_frame, fg_color="#131B2E")
     button_frame.pack(anchor="w")
 
-    # Trending button (just scrolls to featured songs for now)
+    # Trending button
     trending_btn = ctk.CTkButton(button_frame, text="🔥 Trending", font=("Arial", 14, "bold"), 
                                 fg_color="#2563EB", hover_color="#1D4ED8", 
-                                corner_radius=8, height=40, width=150)
+                                corner_radius=8, height=40, width=150,
+                                command=show_trending_charts)
     trending_btn.pack(side="left", padx=(0, 10))
 
     # Playlists button
@@ -548,6 +700,12 @@ try:
         song_card.pack(side="left", padx=10)
 
     # ---------------- Run Application ----------------
+    # Fold new listening history into the autoplay table in the background
+    autoplay.refresh_if_stale()
+
+    # Watch for songs ending so autoplay can continue the session
+    root.after(1000, check_song_finished)
+
     root.mainloop()
     
 except Exception as e:
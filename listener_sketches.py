@@ -0,0 +1,218 @@
+import mysql.connector
+import time
+import argparse
+import numpy as np
+
+# HyperLogLog precision: 2^10 one-byte registers per sketch, about 3% standard error
+PRECISION = 10
+REGISTERS = 1 << PRECISION
+
+# Bits of the 64-bit hash left after the register index
+RANK_BITS = 64 - PRECISION
+
+# Bias correction constant for REGISTERS registers
+ALPHA = 0.7213 / (1 + 1.079 / REGISTERS)
+
+# Sketch tables and the column each one is keyed by
+SKETCH_TABLES = {
+    "song": ("Song_Listener_Sketches", "song_id"),
+    "artist": ("Artist_Listener_Sketches", "artist_id")
+}
+
+# ------------------- HyperLogLog -------------------
+def hash_users(user_ids):
+    """Hash user IDs to 64-bit values (splitmix64, the same in every process)"""
+    x = np.asarray(user_ids, dtype=np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+def register_positions(user_ids):
+    """Return the register index and rank each user sets"""
+    hashes = hash_users(user_ids)
+    index = (hashes >> np.uint64(RANK_BITS)).astype(np.int64)
+    rest = hashes & np.uint64((1 << RANK_BITS) - 1)
+
+    # Rank is the position of the first set bit in the remaining bits
+    bit_length = np.zeros(len(rest), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = rest >= np.uint64(1 << shift)
+        rest = np.where(high, rest >> np.uint64(shift), rest)
+        bit_length += high * shift
+    bit_length += rest > 0
+
+    return index, (RANK_BITS - bit_length + 1).astype(np.uint8)
+
+def estimate(registers):
+    """Estimate distinct counts from one sketch or a matrix of sketches (one per row)"""
+    registers = np.atleast_2d(np.asarray(registers, dtype=np.uint8))
+    harmonic = np.sum(np.exp2(-registers.astype(np.float64)), axis=1)
+    counts = ALPHA * REGISTERS * REGISTERS / harmonic
+
+    # Small cardinalities are more accurate with linear counting of empty registers
+    zeros = np.sum(registers == 0, axis=1)
+    small = (counts <= 2.5 * REGISTERS) & (zeros > 0)
+    counts[small] = REGISTERS * np.log(REGISTERS / zeros[small])
+
+    return np.rint(counts).astype(np.int64)
+
+def merge(sketches):
+    """Merge sketches (bytes) into one counting the union of their listeners"""
+    if not sketches:
+        return bytes(REGISTERS)
+    matrix = np.frombuffer(b"".join(sketches), dtype=np.uint8).reshape(-1, REGISTERS)
+    return matrix.max(axis=0).tobytes()
+
+# ------------------- Database Functions -------------------
+def connect_db():
+    """Connect to the MySQL database"""
+    try:
+        connection = mysql.connector.connect(
+            host="localhost",
+            user="root",
+            password="new_password",
+            database="online_music_system"
+        )
+        return connection
+    except mysql.connector.Error as err:
+        print(f"Error connecting to database: {err}")
+        return None
+
+def add_listeners(cursor, kind, pairs):
+    """Add (key, user_id) pairs to the song or artist sketches (caller commits)"""
+    if not pairs:
+        return
+    table, column = SKETCH_TABLES[kind]
+
+    # Each affected sketch is raised once per batch, however many plays it got
+    data = np.array(pairs, dtype=np.int64)
+    keys, raised = build_sketches(data[:, 0], data[:, 1])
+    keys = [int(key) for key in keys]
+
+    # Sketch rows are locked in key order so concurrent batches cannot deadlock
+    placeholders = ", ".join(["%s"] * len(keys))
+    cursor.execute(
+        f"SELECT {column}, registers FROM {table} WHERE {column} IN ({placeholders}) ORDER BY {column} FOR UPDATE",
+        keys
+    )
+    current = {key: np.frombuffer(registers, dtype=np.uint8) for key, registers in cursor.fetchall()}
+
+    # Most plays leave a sketch unchanged; only raised registers are written back
+    changed = []
+    for row, key in enumerate(keys):
+        old = current.get(key)
+        new = raised[row] if old is None else np.maximum(old, raised[row])
+        if old is None or (new != old).any():
+            changed.append((key, new.tobytes(), int(estimate(new)[0])))
+
+    if changed:
+        cursor.executemany(f"""
+        INSERT INTO {table} ({column}, registers, listeners)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE registers = VALUES(registers), listeners = VALUES(listeners)
+        """, changed)
+
+def count_listeners(cursor, listeners, artist_of):
+    """Add (song_id, user_id) listeners to the song and artist sketches (caller commits)"""
+    add_listeners(cursor, "song", sorted(listeners))
+    add_listeners(cursor, "artist", sorted({(artist_of[song_id], user_id)
+                                            for song_id, user_id in listeners
+                                            if artist_of.get(song_id) is not None}))
+
+# ------------------- Rebuild -------------------
+def build_sketches(keys, user_ids):
+    """Build one sketch per distinct key from (key, user) pairs"""
+    unique_keys, key_index = np.unique(keys, return_inverse=True)
+    index, rank = register_positions(user_ids)
+
+    matrix = np.zeros((len(unique_keys), REGISTERS), dtype=np.uint8)
+    np.maximum.at(matrix, (key_index, index), rank)
+    return unique_keys, matrix
+
+def rebuild_listener_sketches(write_batch=1000):
+    """Recompute every song and artist sketch from the full listening history"""
+    started = time.time()
+    try:
+        connection = connect_db()
+        if not connection:
+            return False
+
+        cursor = connection.cursor()
+        cursor.execute("""
+        SELECT DISTINCT usp.song_id, s.artist_id, usp.user_id
+        FROM User_Song_Plays usp
+        JOIN Songs s ON usp.song_id = s.song_id
+        """)
+        rows = cursor.fetchall()
+
+        for kind, (table, column) in SKETCH_TABLES.items():
+            cursor.execute(f"DELETE FROM {table}")
+            pairs = [(row[0] if kind == "song" else row[1], row[2]) for row in rows]
+            pairs = [pair for pair in pairs if pair[0] is not None]
+            if not pairs:
+                continue
+
+            data = np.array(pairs, dtype=np.int64)
+            keys, matrix = build_sketches(data[:, 0], data[:, 1])
+            listeners = estimate(matrix)
+
+            values = [(int(key), matrix[row].tobytes(), int(listeners[row]))
+                      for row, key in enumerate(keys)]
+            query = f"INSERT INTO {table} ({column}, registers, listeners) VALUES (%s, %s, %s)"
+            for start in range(0, len(values), write_batch):
+                cursor.executemany(query, values[start:start + write_batch])
+
+        connection.commit()
+        print(f"Rebuilt listener sketches from {len(rows)} song/listener pairs "
+              f"in {time.time() - started:.1f}s.")
+        return True
+
+    except mysql.connector.Error as e:
+        print(f"Error rebuilding listener sketches: {e}")
+        return False
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+# ------------------- Lookups -------------------
+def get_genre_listeners(genre_id):
+    """Estimate distinct listeners of a genre by merging its songs' sketches"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return 0
+
+        cursor = connection.cursor()
+        cursor.execute("""
+        SELECT sls.registers
+        FROM Song_Listener_Sketches sls
+        JOIN Songs s ON sls.song_id = s.song_id
+        WHERE s.genre_id = %s
+        """, (genre_id,))
+        sketches = [row[0] for row in cursor.fetchall()]
+
+        if not sketches:
+            return 0
+        # A listener of several songs sets the same registers, so the union is counted once
+        return int(estimate(np.frombuffer(merge(sketches), dtype=np.uint8))[0])
+
+    except mysql.connector.Error as e:
+        print(f"Error estimating genre listeners: {e}")
+        return 0
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+# ------------------- Main Entry Point -------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HyperLogLog unique-listener sketches")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild every sketch from listening history")
+    parser.add_argument("--genre", type=int, help="Print the estimated listeners of a genre")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild_listener_sketches()
+    if args.genre is not None:
+        print(f"Genre {args.genre}: about {get_genre_listeners(args.genre)} listeners")
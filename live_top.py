@@ -0,0 +1,256 @@
+import mysql.connector
+import os
+import json
+import time
+import datetime
+
+# Counters kept per sketch; any count is at most total / CAPACITY too high
+CAPACITY = 200
+
+# Plays lose half their weight every HALF_LIFE_SECONDS, so the lists show "right now"
+HALF_LIFE_SECONDS = 15 * 60
+
+# New plays read per poll
+POLL_BATCH = 5000
+
+# Plays replayed into an empty sketch on first start
+WARM_START_PLAYS = 5000
+
+# Sketch state is saved here so a restart does not lose it
+CHECKPOINT_FILE = os.path.join("temp", "live_top.json")
+CHECKPOINT_SECONDS = 60
+
+# ------------------- Space-Saving Sketch -------------------
+def new_sketch(capacity=CAPACITY):
+    """Create an empty Space-Saving sketch"""
+    return {"capacity": capacity, "counts": {}, "errors": {}, "total": 0.0}
+
+def sketch_add(sketch, key, weight=1.0):
+    """Count one (weighted) occurrence of key"""
+    counts = sketch["counts"]
+    sketch["total"] += weight
+
+    if key in counts:
+        counts[key] += weight
+    elif len(counts) < sketch["capacity"]:
+        counts[key] = weight
+        sketch["errors"][key] = 0.0
+    else:
+        # Evict the smallest counter; the newcomer inherits its count as possible error
+        smallest = min(counts, key=counts.get)
+        floor = counts.pop(smallest)
+        del sketch["errors"][smallest]
+        counts[key] = floor + weight
+        sketch["errors"][key] = floor
+
+def sketch_decay(sketch, factor):
+    """Scale every counter (exponential time decay)"""
+    for key in sketch["counts"]:
+        sketch["counts"][key] *= factor
+        sketch["errors"][key] *= factor
+    sketch["total"] *= factor
+
+def sketch_top(sketch, k):
+    """Return the k heaviest keys as (key, count, error, guaranteed) tuples
+
+    The true count lies in [count - error, count]. An entry is guaranteed to
+    belong in the top k when its lower bound beats the (k+1)th count.
+    """
+    ranked = sorted(sketch["counts"].items(), key=lambda item: item[1], reverse=True)
+    cutoff = ranked[k][1] if len(ranked) > k else 0.0
+    return [
+        (key, count, sketch["errors"][key], count - sketch["errors"][key] >= cutoff)
+        for key, count in ranked[:k]
+    ]
+
+# ------------------- Live State -------------------
+live_state = {
+    "songs": new_sketch(),
+    "artists": new_sketch(),
+    "last_history_id": None,
+    "decayed_at": time.time(),
+    "checkpointed_at": 0.0,
+    "loaded": False
+}
+
+def decay_to_now():
+    """Apply the time decay accumulated since the last update"""
+    now = time.time()
+    factor = 0.5 ** ((now - live_state["decayed_at"]) / HALF_LIFE_SECONDS)
+    sketch_decay(live_state["songs"], factor)
+    sketch_decay(live_state["artists"], factor)
+    live_state["decayed_at"] = now
+
+def save_checkpoint(path=CHECKPOINT_FILE):
+    """Write the sketches and the history watermark to disk atomically"""
+    def dump(sketch):
+        return {
+            "capacity": sketch["capacity"],
+            "counts": {str(key): value for key, value in sketch["counts"].items()},
+            "errors": {str(key): value for key, value in sketch["errors"].items()},
+            "total": sketch["total"]
+        }
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump({
+                "songs": dump(live_state["songs"]),
+                "artists": dump(live_state["artists"]),
+                "last_history_id": live_state["last_history_id"],
+                "decayed_at": live_state["decayed_at"]
+            }, f)
+        os.replace(temp_path, path)
+        live_state["checkpointed_at"] = time.time()
+    except OSError as e:
+        print(f"Error saving live top checkpoint: {e}")
+
+def load_checkpoint(path=CHECKPOINT_FILE):
+    """Restore the sketches from the last checkpoint, if there is one"""
+    def restore(saved):
+        return {
+            "capacity": saved["capacity"],
+            "counts": {int(key): value for key, value in saved["counts"].items()},
+            "errors": {int(key): value for key, value in saved["errors"].items()},
+            "total": saved["total"]
+        }
+
+    try:
+        with open(path, "r") as f:
+            saved = json.load(f)
+        live_state["songs"] = restore(saved["songs"])
+        live_state["artists"] = restore(saved["artists"])
+        live_state["last_history_id"] = saved["last_history_id"]
+        live_state["decayed_at"] = saved["decayed_at"]
+        return True
+    except (OSError, ValueError, KeyError) as e:
+        if os.path.exists(path):
+            print(f"Error loading live top checkpoint: {e}")
+        return False
+
+# ------------------- Database Functions -------------------
+def connect_db():
+    """Connect to the MySQL database"""
+    try:
+        connection = mysql.connector.connect(
+            host="localhost",
+            user="root",
+            password="new_password",
+            database="online_music_system"
+        )
+        return connection
+    except mysql.connector.Error as err:
+        print(f"Error connecting to database: {err}")
+        return None
+
+def poll_plays():
+    """Feed plays recorded since the last poll into the sketches"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return 0
+
+        cursor = connection.cursor()
+
+        if live_state["last_history_id"] is None:
+            # First start without a checkpoint: replay the most recent plays
+            cursor.execute("SELECT COALESCE(MAX(history_id), 0) FROM Listening_History")
+            live_state["last_history_id"] = max(cursor.fetchone()[0] - WARM_START_PLAYS, 0)
+
+        decay_to_now()
+        now = datetime.datetime.now()
+
+        fed = 0
+        while True:
+            # Primary-key range read: only rows newer than the watermark
+            cursor.execute("""
+            SELECT lh.history_id, lh.song_id, s.artist_id, lh.played_at
+            FROM Listening_History lh
+            JOIN Songs s ON lh.song_id = s.song_id
+            WHERE lh.history_id > %s
+            ORDER BY lh.history_id
+            LIMIT %s
+            """, (live_state["last_history_id"], POLL_BATCH))
+            rows = cursor.fetchall()
+
+            for history_id, song_id, artist_id, played_at in rows:
+                # Older plays count for less, as if they had decayed since they happened
+                age = max((now - played_at).total_seconds(), 0.0) if played_at else 0.0
+                weight = 0.5 ** (age / HALF_LIFE_SECONDS)
+                sketch_add(live_state["songs"], song_id, weight)
+                if artist_id is not None:
+                    sketch_add(live_state["artists"], artist_id, weight)
+
+            if rows:
+                live_state["last_history_id"] = rows[-1][0]
+                fed += len(rows)
+            if len(rows) < POLL_BATCH:
+                break
+
+        return fed
+
+    except mysql.connector.Error as e:
+        print(f"Error polling plays: {e}")
+        return 0
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def get_names(table, id_column, name_column, ids):
+    """Look up display names for a handful of IDs"""
+    if not ids:
+        return {}
+    try:
+        connection = connect_db()
+        if not connection:
+            return {}
+
+        cursor = connection.cursor()
+        placeholders = ", ".join(["%s"] * len(ids))
+        cursor.execute(
+            f"SELECT {id_column}, {name_column} FROM {table} WHERE {id_column} IN ({placeholders})",
+            list(ids)
+        )
+        return dict(cursor.fetchall())
+
+    except mysql.connector.Error as e:
+        print(f"Error fetching names: {e}")
+        return {}
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def get_live_top(k=5):
+    """Poll new plays and return the approximate top songs and artists right now"""
+    if not live_state["loaded"]:
+        load_checkpoint()
+        live_state["loaded"] = True
+
+    poll_plays()
+
+    if time.time() - live_state["checkpointed_at"] >= CHECKPOINT_SECONDS:
+        save_checkpoint()
+
+    top_songs = sketch_top(live_state["songs"], k)
+    top_artists = sketch_top(live_state["artists"], k)
+    song_names = get_names("Songs", "song_id", "title", [key for key, _, _, _ in top_songs])
+    artist_names = get_names("Artists", "artist_id", "name", [key for key, _, _, _ in top_artists])
+
+    return {
+        "songs": [(song_names.get(key, f"Song {key}"), count, error, guaranteed)
+                  for key, count, error, guaranteed in top_songs],
+        "artists": [(artist_names.get(key, f"Artist {key}"), count, error, guaranteed)
+                    for key, count, error, guaranteed in top_artists]
+    }
+
+# ------------------- Main Entry Point -------------------
+if __name__ == "__main__":
+    top = get_live_top(10)
+    save_checkpoint()
+    for section in ("songs", "artists"):
+        print(section.title())
+        for name, count, error, guaranteed in top[section]:
+            print(f"  {name:<40} {count:8.1f} ±{error:.1f}{'' if guaranteed else ' ?'}")
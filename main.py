@@ -10,6 +10,73 @@ import time
 import shutil
 import io
 from PIL import Image
+import play_events
+import trending
+import listener_sketches
+import history_retention
+import report_summaries
+import system_stats
+
+# Columns added to tables after they were first released: (table, column, definition).
+# CREATE TABLE IF NOT EXISTS leaves an existing table alone, so older databases get these here
+UPGRADE_COLUMNS = [
+    ("Users", "updated_at", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"),
+    ("Songs", "content_hash", "CHAR(64) NULL"),
+    ("Songs", "updated_at", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"),
+    ("Playlists", "song_count", "INT NOT NULL DEFAULT 0"),
+    ("Playlists", "total_duration", "INT NOT NULL DEFAULT 0")
+]
+
+# Indexes added the same way: (table, index, columns)
+UPGRADE_INDEXES = [
+    ("Users", "idx_created_at", "created_at"),
+    ("Users", "idx_updated_at", "updated_at"),
+    ("Artists", "idx_name", "name"),
+    ("Songs", "idx_updated_at", "updated_at"),
+    ("Songs", "idx_upload_date", "upload_date"),
+    ("Songs", "idx_title", "title"),
+    ("Songs", "idx_file_size", "file_size"),
+    ("Songs", "idx_genre_upload", "genre_id, upload_date"),
+    ("Playlists", "idx_name", "name"),
+    ("Playlists", "idx_created_at", "created_at"),
+    ("Playlists", "idx_song_count", "song_count"),
+    ("Playlists", "idx_total_duration", "total_duration")
+]
+
+# When Activity_Log is added to an existing database, it starts with this many of the
+# latest sign-ups, uploads, playlists and plays
+ACTIVITY_BACKFILL_ROWS = 50
+
+# Activity type -> query for its latest ACTIVITY_BACKFILL_ROWS (item, occurred_at) rows
+ACTIVITY_BACKFILL_QUERIES = {
+    "user_registered": """
+        SELECT CONCAT(first_name, ' ', last_name) AS item, created_at AS occurred_at
+        FROM Users
+        ORDER BY created_at DESC
+        LIMIT %s
+    """,
+    "song_uploaded": """
+        SELECT CONCAT(s.title, ' - ', COALESCE(a.name, '')) AS item, s.upload_date AS occurred_at
+        FROM Songs s
+        LEFT JOIN Artists a ON s.artist_id = a.artist_id
+        ORDER BY s.upload_date DESC
+        LIMIT %s
+    """,
+    "playlist_created": """
+        SELECT name AS item, created_at AS occurred_at
+        FROM Playlists
+        ORDER BY created_at DESC
+        LIMIT %s
+    """,
+    "song_played": """
+        SELECT COALESCE(CONCAT(s.title, ' - ', a.name), s.title) AS item, lh.played_at AS occurred_at
+        FROM Listening_History lh
+        JOIN Songs s ON lh.song_id = s.song_id
+        LEFT JOIN Artists a ON s.artist_id = a.artist_id
+        ORDER BY lh.played_at DESC
+        LIMIT %s
+    """
+}
 
 # ------------------- Database Setup Functions -------------------
 def connect_db_server():
@@ -39,6 +106,75 @@ def connect_db():
         print(f"Error connecting to database: {err}")
         return None
 
+def column_exists(cursor, table, column):
+    """Whether a column exists in the current database"""
+    cursor.execute("""
+    SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+def index_exists(cursor, table, index):
+    """Whether an index exists in the current database"""
+    cursor.execute("""
+    SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table, index))
+    return cursor.fetchone()[0] > 0
+
+def upgrade_tables(cursor):
+    """Add the columns and indexes an older database is missing"""
+    added = set()
+    for table, column, definition in UPGRADE_COLUMNS:
+        if not column_exists(cursor, table, column):
+            print(f"Adding {table}.{column}...")
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            added.add((table, column))
+    
+    for table, index, columns in UPGRADE_INDEXES:
+        if not index_exists(cursor, table, index):
+            print(f"Adding index {table}.{index}...")
+            cursor.execute(f"ALTER TABLE {table} ADD INDEX {index} ({columns})")
+    
+    # Content hashes are unique, so two imports running at once cannot store the same
+    # file. Hashes stored twice before that stay on the oldest copy only.
+    cursor.execute("""
+    SELECT MIN(NON_UNIQUE) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Songs' AND INDEX_NAME = 'idx_content_hash'
+    """)
+    non_unique = cursor.fetchone()[0]
+    if non_unique is None or non_unique:
+        print("Adding unique index Songs.idx_content_hash...")
+        cursor.execute("""
+        UPDATE Songs s
+        JOIN (
+            SELECT content_hash, MIN(song_id) AS keep_id
+            FROM Songs
+            WHERE content_hash IS NOT NULL
+            GROUP BY content_hash
+            HAVING COUNT(*) > 1
+        ) copies ON s.content_hash = copies.content_hash AND s.song_id <> copies.keep_id
+        SET s.content_hash = NULL
+        """)
+        if non_unique is not None:
+            cursor.execute("ALTER TABLE Songs DROP INDEX idx_content_hash")
+        cursor.execute("ALTER TABLE Songs ADD UNIQUE INDEX idx_content_hash (content_hash)")
+    
+    # Playlists from before the count columns start at 0; count them once from
+    # Playlist_Songs, after which the triggers keep them in step
+    if ("Playlists", "song_count") in added or ("Playlists", "total_duration") in added:
+        print("Counting playlist songs...")
+        cursor.execute("""
+        UPDATE Playlists p
+        JOIN (
+            SELECT ps.playlist_id, COUNT(*) AS songs, COALESCE(SUM(s.duration), 0) AS duration
+            FROM Playlist_Songs ps
+            LEFT JOIN Songs s ON ps.song_id = s.song_id
+            GROUP BY ps.playlist_id
+        ) counts ON p.playlist_id = counts.playlist_id
+        SET p.song_count = counts.songs, p.total_duration = counts.duration
+        """)
+
 def create_database():
     """Create the database and tables"""
     try:
@@ -64,7 +200,10 @@ def create_database():
             email VARCHAR(100) NOT NULL UNIQUE,
             password VARCHAR(64) NOT NULL,
             is_admin BOOLEAN DEFAULT FALSE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_created_at (created_at),
+            INDEX idx_updated_at (updated_at)
         )
         """)
         
@@ -75,7 +214,8 @@ def create_database():
             artist_id INT AUTO_INCREMENT PRIMARY KEY,
             name VARCHAR(100) NOT NULL,
             bio TEXT,
-            image_url VARCHAR(255)
+            image_url VARCHAR(255),
+            INDEX idx_name (name)
         )
         """)
         
@@ -115,6 +255,14 @@ def create_database():
             file_type VARCHAR(10) NOT NULL,
             file_size INT NOT NULL,
             upload_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            content_hash CHAR(64) NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            UNIQUE INDEX idx_content_hash (content_hash),
+            INDEX idx_updated_at (updated_at),
+            INDEX idx_upload_date (upload_date),
+            INDEX idx_title (title),
+            INDEX idx_file_size (file_size),
+            INDEX idx_genre_upload (genre_id, upload_date),
             FOREIGN KEY (artist_id) REFERENCES Artists(artist_id) ON DELETE SET NULL,
             FOREIGN KEY (album_id) REFERENCES Albums(album_id) ON DELETE SET NULL,
             FOREIGN KEY (genre_id) REFERENCES Genres(genre_id) ON DELETE SET NULL
@@ -130,6 +278,12 @@ def create_database():
             name VARCHAR(100) NOT NULL,
             description TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            song_count INT NOT NULL DEFAULT 0,
+            total_duration INT NOT NULL DEFAULT 0,
+            INDEX idx_name (name),
+            INDEX idx_created_at (created_at),
+            INDEX idx_song_count (song_count),
+            INDEX idx_total_duration (total_duration),
             FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
         )
         """)
@@ -148,6 +302,40 @@ def create_database():
         )
         """)
         
+        # Bring tables created by an older version up to date
+        upgrade_tables(cursor)
+        
+        # Keep Playlists.song_count and total_duration in step with Playlist_Songs
+        # (cascaded deletes skip triggers, so song deletes remove Playlist_Songs rows explicitly)
+        print("Creating playlist count triggers...")
+        cursor.execute("DROP TRIGGER IF EXISTS playlist_songs_after_insert")
+        cursor.execute("""
+        CREATE TRIGGER playlist_songs_after_insert AFTER INSERT ON Playlist_Songs
+        FOR EACH ROW
+        UPDATE Playlists
+        SET song_count = song_count + 1,
+            total_duration = total_duration + COALESCE((SELECT duration FROM Songs WHERE song_id = NEW.song_id), 0)
+        WHERE playlist_id = NEW.playlist_id
+        """)
+        cursor.execute("DROP TRIGGER IF EXISTS playlist_songs_after_delete")
+        cursor.execute("""
+        CREATE TRIGGER playlist_songs_after_delete AFTER DELETE ON Playlist_Songs
+        FOR EACH ROW
+        UPDATE Playlists
+        SET song_count = song_count - 1,
+            total_duration = total_duration - COALESCE((SELECT duration FROM Songs WHERE song_id = OLD.song_id), 0)
+        WHERE playlist_id = OLD.playlist_id
+        """)
+        cursor.execute("DROP TRIGGER IF EXISTS songs_after_update_duration")
+        cursor.execute("""
+        CREATE TRIGGER songs_after_update_duration AFTER UPDATE ON Songs
+        FOR EACH ROW
+        UPDATE Playlists p
+        JOIN Playlist_Songs ps ON p.playlist_id = ps.playlist_id
+        SET p.total_duration = p.total_duration + COALESCE(NEW.duration, 0) - COALESCE(OLD.duration, 0)
+        WHERE ps.song_id = NEW.song_id AND NOT (NEW.duration <=> OLD.duration)
+        """)
+        
         # Create User_Favorites table
         print("Creating User_Favorites table...")
         cursor.execute("""
@@ -161,19 +349,413 @@ def create_database():
         )
         """)
         
-        # Create Listening_History table
+        # Create Listening_History table (monthly partitions managed by history_retention.py;
+        # partitioned tables cannot have foreign keys, so history rows are deleted explicitly)
         print("Creating Listening_History table...")
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS Listening_History (
-            history_id INT AUTO_INCREMENT PRIMARY KEY,
+            history_id INT AUTO_INCREMENT,
             user_id INT NOT NULL,
             song_id INT NOT NULL,
-            played_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            played_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (history_id, played_at),
+            INDEX idx_user (user_id),
+            INDEX idx_song (song_id)
+        )
+        PARTITION BY RANGE (UNIX_TIMESTAMP(played_at)) (
+            PARTITION p_future VALUES LESS THAN MAXVALUE
+        )
+        """)
+
+        # Create Daily_User_Song_Plays table (finished days of Listening_History, rolled up)
+        print("Creating Daily_User_Song_Plays table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Daily_User_Song_Plays (
+            play_date DATE NOT NULL,
+            user_id INT NOT NULL,
+            song_id INT NOT NULL,
+            play_count INT NOT NULL,
+            first_played_at TIMESTAMP NOT NULL,
+            last_played_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (user_id, song_id, play_date),
+            INDEX idx_song (song_id),
+            INDEX idx_play_date (play_date),
             FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE,
             FOREIGN KEY (song_id) REFERENCES Songs(song_id) ON DELETE CASCADE
         )
         """)
-        
+
+        # Create User_Song_Plays view (rolled-up days plus the raw plays not rolled up yet;
+        # aggregate readers use this so dropped raw partitions do not change their answers.
+        # play_events.py adds late plays for rolled-up days to Daily_User_Song_Plays directly)
+        print("Creating User_Song_Plays view...")
+        cursor.execute("""
+        CREATE OR REPLACE VIEW User_Song_Plays AS
+        SELECT user_id, song_id, play_date, play_count, first_played_at, last_played_at
+        FROM Daily_User_Song_Plays
+        UNION ALL
+        SELECT user_id, song_id, DATE(played_at), 1, played_at, played_at
+        FROM Listening_History
+        WHERE played_at >= COALESCE(
+            (SELECT MAX(play_date) + INTERVAL 1 DAY FROM Daily_User_Song_Plays),
+            '1970-01-02'
+        )
+        """)
+
+        # Create Song_Stats table (maintained by play_events.py on every play)
+        print("Creating Song_Stats table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Song_Stats (
+            song_id INT PRIMARY KEY,
+            play_count INT NOT NULL DEFAULT 0,
+            unique_listeners INT NOT NULL DEFAULT 0,
+            last_played_at TIMESTAMP NULL,
+            INDEX idx_play_count (play_count),
+            FOREIGN KEY (song_id) REFERENCES Songs(song_id) ON DELETE CASCADE
+        )
+        """)
+
+        # Every song gets a Song_Stats row when it is added, so "Most Played" can page
+        # through idx_play_count alone (unplayed songs sort last with a count of 0)
+        print("Creating song stats trigger...")
+        cursor.execute("""
+        SELECT COUNT(*) FROM INFORMATION_SCHEMA.TRIGGERS
+        WHERE TRIGGER_SCHEMA = DATABASE() AND TRIGGER_NAME = 'songs_after_insert_stats'
+        """)
+        stats_trigger_exists = cursor.fetchone()[0] > 0
+        cursor.execute("DROP TRIGGER IF EXISTS songs_after_insert_stats")
+        cursor.execute("""
+        CREATE TRIGGER songs_after_insert_stats AFTER INSERT ON Songs
+        FOR EACH ROW
+        INSERT IGNORE INTO Song_Stats (song_id) VALUES (NEW.song_id)
+        """)
+        if not stats_trigger_exists:
+            # Songs added before the trigger existed get their row once
+            cursor.execute("""
+            INSERT IGNORE INTO Song_Stats (song_id)
+            SELECT song_id FROM Songs
+            """)
+
+        # Create Song_Listeners table (one row per song and user, for unique listener counts)
+        print("Creating Song_Listeners table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Song_Listeners (
+            song_id INT NOT NULL,
+            user_id INT NOT NULL,
+            first_played_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (song_id, user_id),
+            FOREIGN KEY (song_id) REFERENCES Songs(song_id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
+        )
+        """)
+
+        # Create Song_Listener_Sketches table (HyperLogLog registers, updated on every play)
+        print("Creating Song_Listener_Sketches table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Song_Listener_Sketches (
+            song_id INT PRIMARY KEY,
+            registers BINARY(1024) NOT NULL,
+            listeners INT NOT NULL DEFAULT 0,
+            FOREIGN KEY (song_id) REFERENCES Songs(song_id) ON DELETE CASCADE
+        )
+        """)
+
+        # Create Artist_Listener_Sketches table (HyperLogLog registers, updated on every play)
+        print("Creating Artist_Listener_Sketches table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Artist_Listener_Sketches (
+            artist_id INT PRIMARY KEY,
+            registers BINARY(1024) NOT NULL,
+            listeners INT NOT NULL DEFAULT 0,
+            FOREIGN KEY (artist_id) REFERENCES Artists(artist_id) ON DELETE CASCADE
+        )
+        """)
+
+        # Create Song_Play_Buckets table (hourly play counters behind the trending charts)
+        print("Creating Song_Play_Buckets table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Song_Play_Buckets (
+            bucket_start DATETIME NOT NULL,
+            song_id INT NOT NULL,
+            play_count INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket_start, song_id),
+            FOREIGN KEY (song_id) REFERENCES Songs(song_id) ON DELETE CASCADE
+        )
+        """)
+
+        # Create Trending_Charts table (rolled up by trending.py)
+        print("Creating Trending_Charts table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Trending_Charts (
+            chart_window VARCHAR(10) NOT NULL,
+            rank_pos INT NOT NULL,
+            song_id INT NOT NULL,
+            play_count INT NOT NULL,
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (chart_window, rank_pos),
+            FOREIGN KEY (song_id) REFERENCES Songs(song_id) ON DELETE CASCADE
+        )
+        """)
+
+        # Create Report_Daily_Plays table (summary behind admin_reports.py, filled by report_summaries.py)
+        print("Creating Report_Daily_Plays table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Report_Daily_Plays (
+            report_date DATE PRIMARY KEY,
+            play_count INT NOT NULL,
+            listeners INT NOT NULL
+        )
+        """)
+
+        # Create Report_Top_Items table (most played songs, artists and genres of the last 30 days)
+        print("Creating Report_Top_Items table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Report_Top_Items (
+            item_type VARCHAR(10) NOT NULL,
+            rank_pos INT NOT NULL,
+            item_id INT NOT NULL,
+            name VARCHAR(255) NOT NULL,
+            play_count INT NOT NULL,
+            PRIMARY KEY (item_type, rank_pos)
+        )
+        """)
+
+        # Create Report_Weekly_Users table (sign-ups per week)
+        print("Creating Report_Weekly_Users table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Report_Weekly_Users (
+            week_start DATE PRIMARY KEY,
+            new_users INT NOT NULL
+        )
+        """)
+
+        # Create Report_Daily_Storage table (daily snapshot of song count and storage use)
+        print("Creating Report_Daily_Storage table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Report_Daily_Storage (
+            report_date DATE PRIMARY KEY,
+            song_count INT NOT NULL,
+            total_bytes BIGINT NOT NULL
+        )
+        """)
+
+        # Create User_Recommendations table (filled by recom_batch.py)
+        print("Creating User_Recommendations table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS User_Recommendations (
+            user_id INT NOT NULL,
+            song_id INT NOT NULL,
+            score FLOAT NOT NULL,
+            rank_pos INT NOT NULL,
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, song_id),
+            INDEX idx_user_rank (user_id, rank_pos),
+            FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE,
+            FOREIGN KEY (song_id) REFERENCES Songs(song_id) ON DELETE CASCADE
+        )
+        """)
+
+        # Create Song_Features table (filled by audio_features.py)
+        print("Creating Song_Features table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Song_Features (
+            song_id INT PRIMARY KEY,
+            tempo FLOAT NOT NULL,
+            spectral_centroid FLOAT NOT NULL,
+            spectral_rolloff FLOAT NOT NULL,
+            rms_energy FLOAT NOT NULL,
+            feature_vector BINARY(68) NOT NULL,
+            extracted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (song_id) REFERENCES Songs(song_id) ON DELETE CASCADE
+        )
+        """)
+
+        # Create Job_State table (watermarks of incremental background jobs)
+        print("Creating Job_State table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Job_State (
+            job_name VARCHAR(50) PRIMARY KEY,
+            last_history_id INT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+        """)
+
+        # Create System_Counters table (dashboard totals, kept by triggers and play_events.py;
+        # system_stats.py recounts them exactly in the background)
+        print("Creating System_Counters table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS System_Counters (
+            counter_name VARCHAR(50) PRIMARY KEY,
+            value BIGINT NOT NULL DEFAULT 0
+        )
+        """)
+        cursor.execute("""
+        INSERT IGNORE INTO System_Counters (counter_name, value)
+        VALUES ('users', 0), ('songs', 0), ('playlists', 0), ('plays', 0)
+        """)
+
+        # Count users, songs and playlists as they are added and removed
+        print("Creating system counter triggers...")
+        for table, counter in (("Users", "users"), ("Songs", "songs"), ("Playlists", "playlists")):
+            for event, change in (("INSERT", "+ 1"), ("DELETE", "- 1")):
+                trigger = f"{table.lower()}_after_{event.lower()}_count"
+                cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+                cursor.execute(f"""
+                CREATE TRIGGER {trigger} AFTER {event} ON {table}
+                FOR EACH ROW
+                UPDATE System_Counters SET value = value {change} WHERE counter_name = '{counter}'
+                """)
+
+        # Create Upload_Chunks table (song files sent in pieces by upload_worker.py, then
+        # assembled into Songs in one statement)
+        print("Creating Upload_Chunks table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Upload_Chunks (
+            upload_id CHAR(32) NOT NULL,
+            seq INT NOT NULL,
+            data MEDIUMBLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (upload_id, seq),
+            INDEX idx_created_at (created_at)
+        )
+        """)
+
+        # Create Activity_Log table (admin dashboard feed: sign-ups, uploads and playlists
+        # are logged by triggers, plays by play_events.py; history_retention.py prunes old plays)
+        print("Creating Activity_Log table...")
+        cursor.execute("""
+        SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Activity_Log'
+        """)
+        activity_log_exists = cursor.fetchone()[0] > 0
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Activity_Log (
+            activity_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            activity_type VARCHAR(30) NOT NULL,
+            item VARCHAR(255) NOT NULL,
+            occurred_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_occurred (occurred_at, activity_id)
+        )
+        """)
+
+        if not activity_log_exists:
+            # An existing database starts its feed from the latest rows of each source
+            for activity_type, query in ACTIVITY_BACKFILL_QUERIES.items():
+                cursor.execute(f"""
+                INSERT INTO Activity_Log (activity_type, item, occurred_at)
+                SELECT %s, LEFT(item, 255), occurred_at
+                FROM ({query}) latest
+                WHERE item IS NOT NULL AND occurred_at IS NOT NULL
+                ORDER BY occurred_at
+                """, (activity_type, ACTIVITY_BACKFILL_ROWS))
+
+        print("Creating activity log triggers...")
+        activity_triggers = [
+            ("users_after_insert_activity", "Users", "user_registered",
+             "CONCAT(NEW.first_name, ' ', NEW.last_name)"),
+            ("songs_after_insert_activity", "Songs", "song_uploaded",
+             "CONCAT(NEW.title, ' - ', COALESCE((SELECT name FROM Artists WHERE artist_id = NEW.artist_id), ''))"),
+            ("playlists_after_insert_activity", "Playlists", "playlist_created", "NEW.name")
+        ]
+        for trigger, table, activity_type, item in activity_triggers:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            cursor.execute(f"""
+            CREATE TRIGGER {trigger} AFTER INSERT ON {table}
+            FOR EACH ROW
+            INSERT INTO Activity_Log (activity_type, item) VALUES ('{activity_type}', LEFT({item}, 255))
+            """)
+
+        # Create Deleted_Rows table (tombstones, so the admin lists can sync deletions
+        # without reloading everything; history_retention.py prunes old ones)
+        print("Creating Deleted_Rows table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Deleted_Rows (
+            table_name VARCHAR(50) NOT NULL,
+            row_id INT NOT NULL,
+            deleted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_table_deleted (table_name, deleted_at)
+        )
+        """)
+
+        print("Creating tombstone triggers...")
+        for table, id_column in (("Users", "user_id"), ("Songs", "song_id")):
+            trigger = f"{table.lower()}_after_delete_tombstone"
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            cursor.execute(f"""
+            CREATE TRIGGER {trigger} AFTER DELETE ON {table}
+            FOR EACH ROW
+            INSERT INTO Deleted_Rows (table_name, row_id) VALUES ('{table}', OLD.{id_column})
+            """)
+
+        # Create Song_Transitions table (filled by autoplay.py)
+        print("Creating Song_Transitions table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Song_Transitions (
+            from_song_id INT NOT NULL,
+            to_song_id INT NOT NULL,
+            transition_count INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (from_song_id, to_song_id),
+            FOREIGN KEY (from_song_id) REFERENCES Songs(song_id) ON DELETE CASCADE,
+            FOREIGN KEY (to_song_id) REFERENCES Songs(song_id) ON DELETE CASCADE
+        )
+        """)
+
+        # Create User_Genre_Preferences table (picked at signup)
+        print("Creating User_Genre_Preferences table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS User_Genre_Preferences (
+            user_id INT NOT NULL,
+            genre_id INT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, genre_id),
+            FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE,
+            FOREIGN KEY (genre_id) REFERENCES Genres(genre_id) ON DELETE CASCADE
+        )
+        """)
+
+        # Create User_Artist_Preferences table (picked at signup)
+        print("Creating User_Artist_Preferences table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS User_Artist_Preferences (
+            user_id INT NOT NULL,
+            artist_id INT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, artist_id),
+            FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE,
+            FOREIGN KEY (artist_id) REFERENCES Artists(artist_id) ON DELETE CASCADE
+        )
+        """)
+
+        # Create Genre_Popular_Songs table (filled by recom_batch.py)
+        print("Creating Genre_Popular_Songs table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Genre_Popular_Songs (
+            genre_id INT NOT NULL,
+            song_id INT NOT NULL,
+            play_count INT NOT NULL,
+            rank_pos INT NOT NULL,
+            PRIMARY KEY (genre_id, song_id),
+            INDEX idx_genre_rank (genre_id, rank_pos),
+            FOREIGN KEY (genre_id) REFERENCES Genres(genre_id) ON DELETE CASCADE,
+            FOREIGN KEY (song_id) REFERENCES Songs(song_id) ON DELETE CASCADE
+        )
+        """)
+
+        # Create Artist_Similarity table (filled by artist_graph.py)
+        print("Creating Artist_Similarity table...")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Artist_Similarity (
+            artist_id INT NOT NULL,
+            similar_artist_id INT NOT NULL,
+            score FLOAT NOT NULL,
+            rank_pos INT NOT NULL,
+            PRIMARY KEY (artist_id, similar_artist_id),
+            INDEX idx_artist_rank (artist_id, rank_pos),
+            FOREIGN KEY (artist_id) REFERENCES Artists(artist_id) ON DELETE CASCADE,
+            FOREIGN KEY (similar_artist_id) REFERENCES Artists(artist_id) ON DELETE CASCADE
+        )
+        """)
+
         connection.commit()
         cursor.close()
         connection.close()
@@ -684,6 +1266,34 @@ def create_temp_directory():
         print(f"Error creating temp directory: {e}")
         return False
 
+def is_first_install():
+    """Whether the derived tables have never been built (the last build step records a Job_State row)"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return False
+            
+        cursor = connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM Job_State WHERE job_name = %s", (system_stats.JOB_NAME,))
+        return cursor.fetchone()[0] == 0
+        
+    except mysql.connector.Error as e:
+        print(f"Error checking install state: {e}")
+        return False
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def first_install_only(step_function):
+    """Wrap a full rebuild so it runs on first install only; after that the plays keep
+    the derived tables current and the rebuilds are run from their own scripts"""
+    def run_step():
+        if not is_first_install():
+            return True
+        return step_function()
+    return run_step
+
 # ------------------- Splash Screen -------------------
 def show_splash_screen():
     """Display a splash screen while setting up the database"""
@@ -743,7 +1353,8 @@ def show_splash_screen():
     )
     status_label.pack(pady=5)
     
-    # Setup steps with corresponding progress values
+    # Setup steps with corresponding progress values (the counter recount runs last,
+    # so the full rebuilds all run until it has succeeded once)
     setup_steps = [
         ("Creating database schema...", 0.1, create_database),
         ("Adding default users...", 0.2, add_default_users),
@@ -753,6 +1364,12 @@ def show_splash_screen():
         ("Adding sample songs...", 0.6, add_dummy_songs),
         ("Creating playlists...", 0.8, add_default_playlists),
         ("Adding listening history...", 0.9, add_sample_listening_history),
+        ("Partitioning listening history...", 0.92, first_install_only(history_retention.maintain_partitions)),
+        ("Building song statistics...", 0.93, first_install_only(play_events.rebuild_song_stats)),
+        ("Building trending charts...", 0.94, first_install_only(trending.rebuild_trending)),
+        ("Building listener sketches...", 0.945, first_install_only(listener_sketches.rebuild_listener_sketches)),
+        ("Building report summaries...", 0.948, first_install_only(report_summaries.refresh_summaries)),
+        ("Counting system totals...", 0.949, first_install_only(system_stats.recount_counters)),
         ("Creating temporary directories...", 0.95, create_temp_directory)
     ]
     
@@ -0,0 +1,219 @@
+import mysql.connector
+import time
+import datetime
+import trending
+import listener_sketches
+import system_stats
+from mysql.connector import errorcode
+
+# ------------------- Database Functions -------------------
+def connect_db():
+    """Connect to the MySQL database"""
+    try:
+        connection = mysql.connector.connect(
+            host="localhost",
+            user="root",
+            password="new_password",
+            database="online_music_system"
+        )
+        return connection
+    except mysql.connector.Error as err:
+        print(f"Error connecting to database: {err}")
+        return None
+
+# ------------------- Play Recording -------------------
+def record_plays(plays):
+    """Record (user_id, song_id, played_at) plays and update stats, trending counters and sketches in one transaction
+
+    Returns False only when the batch should be kept and retried (the database is unreachable
+    or busy); a batch that fails for any other reason would fail again, so it is logged and dropped.
+    """
+    if not plays:
+        return True
+
+    try:
+        connection = connect_db()
+        if not connection:
+            return False
+
+        cursor = connection.cursor()
+
+        # Songs' artists and names are looked up once per batch
+        song_ids = sorted({song_id for _, song_id, _ in plays})
+        placeholders = ", ".join(["%s"] * len(song_ids))
+        cursor.execute(f"""
+        SELECT s.song_id, s.artist_id, COALESCE(CONCAT(s.title, ' - ', a.name), s.title)
+        FROM Songs s
+        LEFT JOIN Artists a ON s.artist_id = a.artist_id
+        WHERE s.song_id IN ({placeholders})
+        """, song_ids)
+        songs = {song_id: (artist_id, name) for song_id, artist_id, name in cursor.fetchall()}
+
+        user_ids = sorted({user_id for user_id, _, _ in plays})
+        placeholders = ", ".join(["%s"] * len(user_ids))
+        cursor.execute(f"SELECT user_id FROM Users WHERE user_id IN ({placeholders})", user_ids)
+        users = {row[0] for row in cursor.fetchall()}
+
+        # Plays of songs or users deleted while the plays were buffered are dropped;
+        # the stats and trending tables reference Songs, so they would fail the batch
+        kept = [play for play in plays if play[1] in songs and play[0] in users]
+        if len(kept) < len(plays):
+            print(f"Dropping {len(plays) - len(kept)} plays of deleted songs or users.")
+        plays = kept
+        if not plays:
+            return True
+        song_ids = sorted({song_id for _, song_id, _ in plays})
+
+        # One multi-row INSERT for the whole batch
+        cursor.executemany(
+            "INSERT INTO Listening_History (user_id, song_id, played_at) VALUES (%s, %s, %s)",
+            plays
+        )
+
+        # Late plays (replayed from the spool) can fall on days already rolled up, which
+        # User_Song_Plays no longer reads from the raw history; they are added to those days' rollups
+        cursor.execute("SELECT MAX(play_date) FROM Daily_User_Song_Plays")
+        rolled_up_to = cursor.fetchone()[0]
+        late_plays = {}
+        for user_id, song_id, played_at in plays:
+            if rolled_up_to and played_at.date() <= rolled_up_to:
+                key = (user_id, song_id, played_at.date())
+                count, first_played, last_played = late_plays.get(key, (0, played_at, played_at))
+                late_plays[key] = (count + 1, min(first_played, played_at), max(last_played, played_at))
+        if late_plays:
+            # Joined like the rollup, so plays of deleted users or songs are skipped
+            cursor.executemany("""
+            INSERT INTO Daily_User_Song_Plays
+                (play_date, user_id, song_id, play_count, first_played_at, last_played_at)
+            SELECT %s, u.user_id, s.song_id, %s, %s, %s
+            FROM Users u
+            JOIN Songs s ON s.song_id = %s
+            WHERE u.user_id = %s
+            ON DUPLICATE KEY UPDATE
+                play_count = play_count + VALUES(play_count),
+                first_played_at = LEAST(first_played_at, VALUES(first_played_at)),
+                last_played_at = GREATEST(last_played_at, VALUES(last_played_at))
+            """, [(play_date, count, first_played, last_played, song_id, user_id)
+                  for (user_id, song_id, play_date), (count, first_played, last_played)
+                  in sorted(late_plays.items())])
+
+        # Plays are aggregated per song and per (song, user) before anything is written,
+        # and every table is written in sorted key order so concurrent batches cannot deadlock
+        song_stats = {}
+        first_plays = {}
+        for user_id, song_id, played_at in plays:
+            plays_count, last_played = song_stats.get(song_id, (0, played_at))
+            song_stats[song_id] = (plays_count + 1, max(last_played, played_at))
+            song_first_plays = first_plays.setdefault(song_id, {})
+            song_first_plays[user_id] = min(song_first_plays.get(user_id, played_at), played_at)
+
+        # A new (song, user) pair means one more unique listener; one multi-row
+        # INSERT per song gives that song's count of new listeners
+        new_listeners = {}
+        for song_id in song_ids:
+            cursor.executemany(
+                "INSERT IGNORE INTO Song_Listeners (song_id, user_id, first_played_at) VALUES (%s, %s, %s)",
+                [(song_id, user_id, played_at) for user_id, played_at in sorted(first_plays[song_id].items())]
+            )
+            new_listeners[song_id] = max(cursor.rowcount, 0)
+
+        # HyperLogLog sketches behind the song and artist unique-listener counts
+        listener_sketches.count_listeners(
+            cursor,
+            [(song_id, user_id) for song_id in song_ids for user_id in first_plays[song_id]],
+            {song_id: artist_id for song_id, (artist_id, _) in songs.items()}
+        )
+
+        cursor.executemany("""
+        INSERT INTO Song_Stats (song_id, play_count, unique_listeners, last_played_at)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            play_count = play_count + VALUES(play_count),
+            unique_listeners = unique_listeners + VALUES(unique_listeners),
+            last_played_at = GREATEST(COALESCE(last_played_at, VALUES(last_played_at)), VALUES(last_played_at))
+        """, [(song_id, plays_count, new_listeners[song_id], last_played)
+              for song_id, (plays_count, last_played) in sorted(song_stats.items())])
+
+        # Hourly counters behind the trending charts
+        trending.count_plays(cursor, [(song_id, played_at) for _, song_id, played_at in plays])
+
+        # Dashboard play counter, once per batch
+        system_stats.count_plays(cursor, len(plays))
+
+        # Admin activity feed
+        cursor.executemany(
+            "INSERT INTO Activity_Log (activity_type, item, occurred_at) VALUES ('song_played', %s, %s)",
+            [((songs.get(song_id, (None, None))[1] or f"Song {song_id}")[:255], played_at)
+             for _, song_id, played_at in plays]
+        )
+
+        connection.commit()
+        return True
+
+    except (mysql.connector.InterfaceError, mysql.connector.OperationalError) as e:
+        print(f"Error recording plays: {e}")
+        return False
+    except mysql.connector.Error as e:
+        if e.errno in (errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT):
+            print(f"Error recording plays: {e}")
+            return False
+        print(f"Dropping {len(plays)} plays that cannot be recorded: {e}")
+        return True
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def record_play(user_id, song_id):
+    """Record a single play right away (the player pages go through history_buffer instead)"""
+    return record_plays([(user_id, song_id, datetime.datetime.now())])
+
+# ------------------- Rebuild -------------------
+def rebuild_song_stats():
+    """Recompute Song_Listeners and Song_Stats from the full listening history"""
+    started = time.time()
+    try:
+        connection = connect_db()
+        if not connection:
+            return False
+
+        cursor = connection.cursor()
+
+        cursor.execute("DELETE FROM Song_Listeners")
+        cursor.execute("""
+        INSERT INTO Song_Listeners (song_id, user_id, first_played_at)
+        SELECT song_id, user_id, MIN(first_played_at)
+        FROM User_Song_Plays
+        GROUP BY song_id, user_id
+        """)
+
+        cursor.execute("DELETE FROM Song_Stats")
+        cursor.execute("""
+        INSERT INTO Song_Stats (song_id, play_count, unique_listeners, last_played_at)
+        SELECT song_id, SUM(play_count), COUNT(DISTINCT user_id), MAX(last_played_at)
+        FROM User_Song_Plays
+        GROUP BY song_id
+        """)
+        songs = cursor.rowcount
+
+        # Unplayed songs keep a zero row, so "Most Played" can page through idx_play_count
+        cursor.execute("""
+        INSERT IGNORE INTO Song_Stats (song_id)
+        SELECT song_id FROM Songs
+        """)
+
+        connection.commit()
+        print(f"Rebuilt stats for {songs} songs in {time.time() - started:.1f}s.")
+        return True
+
+    except mysql.connector.Error as e:
+        print(f"Error rebuilding song stats: {e}")
+        return False
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+# ------------------- Main Entry Point -------------------
+if __name__ == "__main__":
+    rebuild_song_stats()
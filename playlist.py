@@ -5,6 +5,9 @@ import subprocess
 import os
 from pygame import mixer
 import io
+import song_index
+import autoplay
+import history_buffer
 
 # Initialize mixer for music playback
 mixer.init()
@@ -18,6 +21,12 @@ current_song = {
     "paused": False
 }
 
+# Autoplay state: the player picks the next song when the current one ends
+autoplay_state = {
+    "enabled": True,
+    "recent": []
+}
+
 # ------------------- Database Functions -------------------
 def connect_db():
     """Connect to the MySQL database"""
@@ -84,12 +93,10 @@ def get_system_playlists():
         # Get playlists where user_id is NULL (system playlists)
         # or with most songs for featured playlists
         query = """
-        SELECT p.playlist_id, p.name, COUNT(ps.song_id) AS song_count
+        SELECT p.playlist_id, p.name, p.song_count
         FROM Playlists p
-        LEFT JOIN Playlist_Songs ps ON p.playlist_id = ps.playlist_id
         WHERE p.user_id = 0
-        GROUP BY p.playlist_id
-        ORDER BY song_count DESC
+        ORDER BY p.song_count DESC
         LIMIT 3
         """
         
@@ -160,11 +167,9 @@ def get_user_playlists():
         cursor = connection.cursor(dictionary=True)
         
         query = """
-        SELECT p.playlist_id, p.name, COUNT(ps.song_id) AS song_count
+        SELECT p.playlist_id, p.name, p.song_count
         FROM Playlists p
-        LEFT JOIN Playlist_Songs ps ON p.playlist_id = ps.playlist_id
         WHERE p.user_id = %s
-        GROUP BY p.playlist_id
         ORDER BY p.created_at DESC
         """
         
@@ -273,30 +278,53 @@ def get_song_data(song_id):
             cursor.close()
             connection.close()
 
-def record_listening_history(song_id):
-    """Record that the current user listened to a song"""
+def get_similar_songs(song_id, limit=8):
+    """Get songs that sound like the given song from the similar-songs index"""
+    similar_ids = song_index.find_similar(song_id, limit)
+    if not similar_ids:
+        return []
+
     try:
-        # Get current user ID
-        with open("current_user.txt", "r") as f:
-            user_id = f.read().strip()
-            
         connection = connect_db()
         if not connection:
-            return
+            return []
             
-        cursor = connection.cursor()
+        cursor = connection.cursor(dictionary=True)
         
-        query = "INSERT INTO Listening_History (user_id, song_id) VALUES (%s, %s)"
-        cursor.execute(query, (user_id, song_id))
-        connection.commit()
+        placeholders = ", ".join(["%s"] * len(similar_ids))
+        query = f"""
+        SELECT s.song_id, s.title, a.name as artist_name
+        FROM Songs s
+        JOIN Artists a ON s.artist_id = a.artist_id
+        WHERE s.song_id IN ({placeholders})
+        """
+        cursor.execute(query, similar_ids)
         
-    except Exception as e:
-        print(f"Error recording listening history: {e}")
+        # Keep the index's similarity order
+        songs = {song["song_id"]: song for song in cursor.fetchall()}
+        return [songs[sid] for sid in similar_ids if sid in songs]
+        
+    except mysql.connector.Error as e:
+        print(f"Error fetching similar songs: {e}")
+        return []
     finally:
         if 'connection' in locals() and connection and connection.is_connected():
             cursor.close()
             connection.close()
 
+def record_listening_history(song_id):
+    """Record that the current user listened to a song"""
+    try:
+        # Get current user ID
+        with open("current_user.txt", "r") as f:
+            user_id = f.read().strip()
+            
+        # Queued and written in batches by a background thread
+        history_buffer.record(user_id, song_id)
+        
+    except Exception as e:
+        print(f"Error recording listening history: {e}")
+
 # ------------------- Music Player Functions -------------------
 def play_song(song_id):
     """Play a song from its binary data in the database"""
@@ -356,6 +384,9 @@ def play_song(song_id):
         # Record in listening history
         record_listening_history(song_id)
         
+        # Remember recent songs so autoplay does not repeat them
+        autoplay_state["recent"] = (autoplay_state["recent"] + [song_id])[-20:]
+        
         return True
         
     except Exception as e:
@@ -384,8 +415,29 @@ def toggle_play_pause():
         play_btn.configure(text="▶️")
 
 def play_next_song():
-    """Placeholder for playing next song"""
-    messagebox.showinfo("Info", "Next song feature will be implemented with playlists")
+    """Play a song listeners often play after the current one"""
+    if current_song["id"] is None:
+        messagebox.showinfo("Info", "Play a song first to start autoplay")
+        return False
+    
+    next_id = autoplay.predict_next(current_song["id"], set(autoplay_state["recent"]))
+    if next_id is None:
+        messagebox.showinfo("Info", "No next song prediction for this song yet")
+        return False
+    return play_song(next_id)
+
+def check_song_finished():
+    """Autoplay the next song when the current one finishes"""
+    if autoplay_state["enabled"] and current_song["playing"] and not mixer.music.get_busy():
+        next_id = autoplay.predict_next(current_song["id"], set(autoplay_state["recent"]))
+        if next_id is None or not play_song(next_id):
+            current_song["playing"] = False
+            play_btn.configure(text="▶️")
+    root.after(1000, check_song_finished)
+
+def toggle_autoplay():
+    """Turn autoplay on or off"""
+    autoplay_state["enabled"] = bool(autoplay_switch.get())
 
 def play_previous_song():
     """Placeholder for playing previous song"""
@@ -525,9 +577,46 @@ def open_playlist_songs(playlist_id, playlist_name):
                                    command=lambda sid=song["song_id"]: play_song(sid))
             play_btn.pack(side="right", padx=10)
             
+            # Similar songs button
+            similar_btn = ctk.CTkButton(song_row, text="🎧", font=("Arial", 14), fg_color="#1A1A2E",
+                                      hover_color="#232342", width=30, height=30, 
+                                      command=lambda sid=song["song_id"]: show_similar_songs(sid))
+            similar_btn.pack(side="right")
+            
             # Make row clickable
             song_row.bind("<Button-1>", lambda e, sid=song["song_id"]: play_song(sid))
 
+def show_similar_songs(song_id):
+    """Show a popup listing songs that sound like the given song"""
+    songs = get_similar_songs(song_id)
+    if not songs:
+        messagebox.showinfo("Similar Songs", "No similar songs found for this song yet.")
+        return
+    
+    similar_dialog = ctk.CTkToplevel(root)
+    similar_dialog.title("Similar Songs")
+    similar_dialog.geometry("420x400")
+    similar_dialog.configure(fg_color="#131B2E")
+    similar_dialog.transient(root)
+    
+    ctk.CTkLabel(similar_dialog, text="🎧 Similar Songs", 
+               font=("Arial", 18, "bold"), text_color="white").pack(pady=(15, 10))
+    
+    similar_list = ctk.CTkScrollableFrame(similar_dialog, fg_color="#131B2E")
+    similar_list.pack(fill="both", expand=True, padx=15, pady=(0, 15))
+    
+    for song in songs:
+        song_row = ctk.CTkFrame(similar_list, fg_color="#1A1A2E", corner_radius=5, height=40)
+        song_row.pack(fill="x", pady=2)
+        
+        ctk.CTkLabel(song_row, text=f"{song['artist_name']} - {song['title']}", font=("Arial", 12),
+                   text_color="white", anchor="w").pack(side="left", padx=10)
+        
+        play_btn = ctk.CTkButton(song_row, text="▶️", font=("Arial", 14), fg_color="#1A1A2E",
+                               hover_color="#232342", width=30, height=30, 
+                               command=lambda sid=song["song_id"]: play_song(sid))
+        play_btn.pack(side="right", padx=10)
+
 def show_create_playlist_dialog():
     """Show dialog to create a new playlist"""
     playlist_name = simpledialog.askstring("New Playlist", "Enter playlist name:")
@@ -758,6 +847,13 @@ try:
                                    wraplength=220)
     now_playing_label.pack(pady=5)
 
+    # Autoplay toggle
+    autoplay_switch = ctk.CTkSwitch(now_playing_frame, text="Autoplay", font=("Arial", 12),
+                                  text_color="#A0A0A0", progress_color="#B146EC",
+                                  command=toggle_autoplay)
+    autoplay_switch.select()
+    autoplay_switch.pack(pady=(0, 5))
+
     # Music player controls at bottom of sidebar
     player_frame = ctk.CTkFrame(sidebar, fg_color="#111827", height=50)
     player_frame.pack(side="bottom", fill="x", pady=10, padx=10)
@@ -786,6 +882,9 @@ try:
     create_playlists_content()
 
     # ---------------- Run Application ----------------
+    # Watch for songs ending so autoplay can continue the session
+    root.after(1000, check_song_finished)
+
     root.mainloop()
     
 except Exception as e:
@@ -4,8 +4,14 @@ import mysql.connector
 import subprocess
 import os
 import random
+import math
 from pygame import mixer
 import io
+import recom_als
+import recom_rerank
+import artist_graph
+import autoplay
+import history_buffer
 
 # Initialize mixer for music playback
 mixer.init()
@@ -19,6 +25,15 @@ current_song = {
     "paused": False
 }
 
+# Autoplay state: the player picks the next song when the current one ends
+autoplay_state = {
+    "enabled": True,
+    "recent": []
+}
+
+# Candidates fetched before diversity reranking narrows them down
+CANDIDATE_POOL = 200
+
 # ------------------- Database Functions -------------------
 def connect_db():
     """Connect to the MySQL database"""
@@ -88,14 +103,14 @@ def get_user_listening_history(limit=5):
         
         query = """
         SELECT s.song_id, s.title, a.name as artist_name, g.genre_id, g.name as genre_name,
-               COUNT(lh.history_id) as play_count
-        FROM Listening_History lh
-        JOIN Songs s ON lh.song_id = s.song_id
+               CAST(SUM(usp.play_count) AS UNSIGNED) as play_count
+        FROM User_Song_Plays usp
+        JOIN Songs s ON usp.song_id = s.song_id
         JOIN Artists a ON s.artist_id = a.artist_id
         LEFT JOIN Genres g ON s.genre_id = g.genre_id
-        WHERE lh.user_id = %s
+        WHERE usp.user_id = %s
         GROUP BY s.song_id
-        ORDER BY lh.played_at DESC
+        ORDER BY MAX(usp.last_played_at) DESC
         LIMIT %s
         """
         
@@ -125,12 +140,13 @@ def get_favorite_genres():
             
         cursor = connection.cursor(dictionary=True)
         
+        # SUM returns DECIMAL; the cast keeps counts as ints, which mix with float similarity scores
         query = """
-        SELECT g.genre_id, g.name as genre_name, COUNT(lh.history_id) as count
-        FROM Listening_History lh
-        JOIN Songs s ON lh.song_id = s.song_id
+        SELECT g.genre_id, g.name as genre_name, CAST(SUM(usp.play_count) AS UNSIGNED) as count
+        FROM User_Song_Plays usp
+        JOIN Songs s ON usp.song_id = s.song_id
         JOIN Genres g ON s.genre_id = g.genre_id
-        WHERE lh.user_id = %s AND g.genre_id IS NOT NULL
+        WHERE usp.user_id = %s AND g.genre_id IS NOT NULL
         GROUP BY g.genre_id
         ORDER BY count DESC
         LIMIT 3
@@ -162,12 +178,13 @@ def get_favorite_artists():
             
         cursor = connection.cursor(dictionary=True)
         
+        # SUM returns DECIMAL; the cast keeps counts as ints, which mix with float similarity scores
         query = """
-        SELECT a.artist_id, a.name as artist_name, COUNT(lh.history_id) as count
-        FROM Listening_History lh
-        JOIN Songs s ON lh.song_id = s.song_id
+        SELECT a.artist_id, a.name as artist_name, CAST(SUM(usp.play_count) AS UNSIGNED) as count
+        FROM User_Song_Plays usp
+        JOIN Songs s ON usp.song_id = s.song_id
         JOIN Artists a ON s.artist_id = a.artist_id
-        WHERE lh.user_id = %s
+        WHERE usp.user_id = %s
         GROUP BY a.artist_id
         ORDER BY count DESC
         LIMIT 3
@@ -186,20 +203,187 @@ def get_favorite_artists():
             cursor.close()
             connection.close()
 
+def get_precomputed_recommendations(user_id, limit=8):
+    """Get recommendations stored by the batch scorer (recom_batch.py)"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return []
+
+        cursor = connection.cursor(dictionary=True)
+
+        query = """
+        SELECT s.song_id, s.title, a.name as artist_name, g.name as genre_name, ur.score
+        FROM User_Recommendations ur
+        JOIN Songs s ON ur.song_id = s.song_id
+        JOIN Artists a ON s.artist_id = a.artist_id
+        LEFT JOIN Genres g ON s.genre_id = g.genre_id
+        WHERE ur.user_id = %s
+        ORDER BY ur.rank_pos
+        LIMIT %s
+        """
+
+        cursor.execute(query, (user_id, limit))
+        return cursor.fetchall()
+
+    except mysql.connector.Error as e:
+        print(f"Error getting precomputed recommendations: {e}")
+        return []
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def get_als_recommendations(user_id, limit=8):
+    """Get recommendations scored online by the offline-trained ALS model (recom_als.py)"""
+    try:
+        if not recom_als.load_model():
+            return []
+
+        connection = connect_db()
+        if not connection:
+            return []
+
+        cursor = connection.cursor(dictionary=True)
+
+        # Songs the user already knows are excluded before ranking
+        cursor.execute(
+            "SELECT DISTINCT song_id FROM User_Song_Plays WHERE user_id = %s",
+            (user_id,)
+        )
+        listened_songs = [row['song_id'] for row in cursor.fetchall()]
+
+        song_ids, scores = recom_als.recommend_for_user(user_id, limit, listened_songs)
+        if not song_ids:
+            return []
+
+        # Fetch display details for the ranked songs in one query
+        placeholders = ", ".join(["%s"] * len(song_ids))
+        query = f"""
+        SELECT s.song_id, s.title, a.name as artist_name, g.name as genre_name
+        FROM Songs s
+        JOIN Artists a ON s.artist_id = a.artist_id
+        LEFT JOIN Genres g ON s.genre_id = g.genre_id
+        WHERE s.song_id IN ({placeholders})
+        """
+        cursor.execute(query, song_ids)
+        songs_by_id = {song['song_id']: song for song in cursor.fetchall()}
+
+        recommendations = []
+        for song_id, score in zip(song_ids, scores):
+            if song_id in songs_by_id:
+                songs_by_id[song_id]['score'] = score
+                recommendations.append(songs_by_id[song_id])
+        return recommendations
+
+    except mysql.connector.Error as e:
+        print(f"Error getting ALS recommendations: {e}")
+        return []
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def get_cold_start_recommendations(user_id, limit=8):
+    """Recommend popular songs from the genres and artists a new user picked at signup"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return []
+
+        cursor = connection.cursor(dictionary=True)
+
+        # Precomputed per-genre popularity lists (recom_batch.py) for the picked genres
+        query = """
+        SELECT s.song_id, s.title, a.name as artist_name, g.name as genre_name, gps.play_count
+        FROM User_Genre_Preferences ugp
+        JOIN Genre_Popular_Songs gps ON gps.genre_id = ugp.genre_id
+        JOIN Songs s ON gps.song_id = s.song_id
+        JOIN Artists a ON s.artist_id = a.artist_id
+        JOIN Genres g ON s.genre_id = g.genre_id
+        WHERE ugp.user_id = %s
+        ORDER BY gps.rank_pos
+        LIMIT %s
+        """
+        cursor.execute(query, (user_id, CANDIDATE_POOL))
+        candidates = {song['song_id']: song for song in cursor.fetchall()}
+
+        # Songs by the picked artists, ranked by the same popularity counts
+        query = """
+        SELECT s.song_id, s.title, a.name as artist_name, g.name as genre_name,
+               COALESCE(gps.play_count, 0) as play_count
+        FROM User_Artist_Preferences uap
+        JOIN Songs s ON s.artist_id = uap.artist_id
+        JOIN Artists a ON s.artist_id = a.artist_id
+        LEFT JOIN Genres g ON s.genre_id = g.genre_id
+        LEFT JOIN Genre_Popular_Songs gps ON gps.song_id = s.song_id AND gps.genre_id = s.genre_id
+        WHERE uap.user_id = %s
+        ORDER BY play_count DESC
+        LIMIT %s
+        """
+        cursor.execute(query, (user_id, CANDIDATE_POOL))
+        artist_songs = set()
+        for song in cursor.fetchall():
+            artist_songs.add(song['song_id'])
+            candidates.setdefault(song['song_id'], song)
+
+        if not candidates:
+            return []
+
+        # Popularity, with a boost for songs by an artist the user picked explicitly
+        recommendations = list(candidates.values())
+        for song in recommendations:
+            song['score'] = math.log1p(song['play_count']) + (1.0 if song['song_id'] in artist_songs else 0.0)
+        recommendations.sort(key=lambda song: song['score'], reverse=True)
+
+        return recom_rerank.rerank_songs(recommendations, limit)
+
+    except mysql.connector.Error as e:
+        print(f"Error getting cold-start recommendations: {e}")
+        return []
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def get_fans_also_like(limit=4):
+    """Get the user's top artist and the artists their fans also like"""
+    favorite_artists = get_favorite_artists()
+    if not favorite_artists:
+        return None, []
+    
+    top_artist = favorite_artists[0]
+    similar = artist_graph.get_similar_artists(top_artist['artist_id'], limit)
+    return top_artist['artist_name'], [name for _, name, _ in similar]
+
 def get_recommended_songs(limit=8):
     """Get songs recommended based on user's listening history"""
     try:
         # Get current user ID
         with open("current_user.txt", "r") as f:
             user_id = f.read().strip()
-        
+
+        # Prefer the ALS model, then batch-computed recommendations, when available.
+        # A larger candidate pool is fetched and reranked for artist and genre diversity.
+        recommendations = get_als_recommendations(user_id, CANDIDATE_POOL)
+        if len(recommendations) >= limit:
+            return recom_rerank.rerank_songs(recommendations, limit)
+
+        recommendations = get_precomputed_recommendations(user_id, CANDIDATE_POOL)
+        if len(recommendations) >= limit:
+            return recom_rerank.rerank_songs(recommendations, limit)
+
         # Get favorite genres and artists
         favorite_genres = get_favorite_genres()
         favorite_artists = get_favorite_artists()
         
-        # No history yet, return random songs
+        # No history yet: use the genres and artists picked at signup, then random songs
         if not favorite_genres and not favorite_artists:
-            return get_random_songs(limit)
+            recommendations = get_cold_start_recommendations(user_id, limit)
+            if len(recommendations) < limit:
+                exclude_ids = [song['song_id'] for song in recommendations]
+                recommendations.extend(get_random_songs(limit - len(recommendations), exclude_ids))
+            return recommendations
             
         connection = connect_db()
         if not connection:
@@ -209,7 +393,7 @@ def get_recommended_songs(limit=8):
         
         # Get songs the user has already listened to
         cursor.execute(
-            "SELECT song_id FROM Listening_History WHERE user_id = %s",
+            "SELECT DISTINCT song_id FROM User_Song_Plays WHERE user_id = %s",
             (user_id,)
         )
         listened_songs = [row['song_id'] for row in cursor.fetchall()]
@@ -223,11 +407,18 @@ def get_recommended_songs(limit=8):
             genre_filter = f"OR s.genre_id IN ({placeholders})"
             genre_params = genre_ids
         
+        # Plays of favorite artists, plus artists their fans also like weighted by similarity
+        artist_plays = {a['artist_id']: a['count'] for a in favorite_artists}
+        for artist in favorite_artists:
+            for similar_id, _, score in artist_graph.get_similar_artists(artist['artist_id']):
+                if similar_id not in artist_plays or artist_plays[similar_id] < artist['count'] * score:
+                    artist_plays[similar_id] = artist['count'] * score
+        
         # Build artist filter
         artist_filter = ""
         artist_params = []
-        if favorite_artists:
-            artist_ids = [a['artist_id'] for a in favorite_artists]
+        if artist_plays:
+            artist_ids = list(artist_plays)
             placeholders = ", ".join(["%s"] * len(artist_ids))
             artist_filter = f"OR s.artist_id IN ({placeholders})"
             artist_params = artist_ids
@@ -247,7 +438,7 @@ def get_recommended_songs(limit=8):
         
         # Query for recommendations based on genres and artists
         query = f"""
-        SELECT s.song_id, s.title, a.name as artist_name, g.name as genre_name
+        SELECT s.song_id, s.title, a.name as artist_name, g.name as genre_name, s.artist_id
         FROM Songs s
         JOIN Artists a ON s.artist_id = a.artist_id
         LEFT JOIN Genres g ON s.genre_id = g.genre_id
@@ -256,10 +447,16 @@ def get_recommended_songs(limit=8):
         LIMIT %s
         """
         
-        all_params = genre_params + artist_params + exclusion_params + [limit]
+        all_params = genre_params + artist_params + exclusion_params + [CANDIDATE_POOL]
         cursor.execute(query, all_params)
         recommendations = cursor.fetchall()
         
+        # Score candidates by how much the user plays their genre and artist, then diversify
+        genre_plays = {g['genre_name']: g['count'] for g in favorite_genres}
+        for song in recommendations:
+            song['score'] = genre_plays.get(song['genre_name'], 0) + artist_plays.get(song['artist_id'], 0)
+        recommendations = recom_rerank.rerank_songs(recommendations, limit)
+        
         # If we don't have enough recommendations, fill with random songs
         if len(recommendations) < limit:
             remaining = limit - len(recommendations)
@@ -372,22 +569,11 @@ def record_listening_history(song_id):
         with open("current_user.txt", "r") as f:
             user_id = f.read().strip()
             
-        connection = connect_db()
-        if not connection:
-            return
-            
-        cursor = connection.cursor()
-        
-        query = "INSERT INTO Listening_History (user_id, song_id) VALUES (%s, %s)"
-        cursor.execute(query, (user_id, song_id))
-        connection.commit()
+        # Queued and written in batches by a background thread
+        history_buffer.record(user_id, song_id)
         
     except Exception as e:
         print(f"Error recording listening history: {e}")
-    finally:
-        if 'connection' in locals() and connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 # ------------------- Music Player Functions -------------------
 def play_song(song_id):
@@ -448,6 +634,9 @@ def play_song(song_id):
         # Record in listening history
         record_listening_history(song_id)
         
+        # Remember recent songs so autoplay does not repeat them
+        autoplay_state["recent"] = (autoplay_state["recent"] + [song_id])[-20:]
+        
         return True
         
     except Exception as e:
@@ -476,8 +665,29 @@ def toggle_play_pause():
         play_btn.configure(text="▶️")
 
 def play_next_song():
-    """Placeholder for playing next song"""
-    messagebox.showinfo("Info", "Next song feature will be implemented with playlists")
+    """Play a song listeners often play after the current one"""
+    if current_song["id"] is None:
+        messagebox.showinfo("Info", "Play a song first to start autoplay")
+        return False
+    
+    next_id = autoplay.predict_next(current_song["id"], set(autoplay_state["recent"]))
+    if next_id is None:
+        messagebox.showinfo("Info", "No next song prediction for this song yet")
+        return False
+    return play_song(next_id)
+
+def check_song_finished():
+    """Autoplay the next song when the current one finishes"""
+    if autoplay_state["enabled"] and current_song["playing"] and not mixer.music.get_busy():
+        next_id = autoplay.predict_next(current_song["id"], set(autoplay_state["recent"]))
+        if next_id is None or not play_song(next_id):
+            current_song["playing"] = False
+            play_btn.configure(text="▶️")
+    root.after(1000, check_song_finished)
+
+def toggle_autoplay():
+    """Turn autoplay on or off"""
+    autoplay_state["enabled"] = bool(autoplay_switch.get())
 
 def play_previous_song():
     """Placeholder for playing previous song"""
@@ -550,6 +760,14 @@ def display_recommendations():
     # Get recommended songs
     recommended_songs = get_recommended_songs(8)
     
+    # Fans also like line for the user's top artist
+    top_artist, similar_artists = get_fans_also_like()
+    if similar_artists:
+        fans_label = ctk.CTkLabel(songs_frame, 
+                                text=f"Fans of {top_artist} also like: {', '.join(similar_artists)}", 
+                                font=("Arial", 13), text_color="#A0A0A0")
+        fans_label.pack(pady=(0, 10))
+    
     # Display songs
     for song in recommended_songs:
         # Create song row
@@ -652,6 +870,13 @@ try:
                                    wraplength=220)
     now_playing_label.pack(pady=5)
 
+    # Autoplay toggle
+    autoplay_switch = ctk.CTkSwitch(now_playing_frame, text="Autoplay", font=("Arial", 12),
+                                  text_color="#A0A0A0", progress_color="#B146EC",
+                                  command=toggle_autoplay)
+    autoplay_switch.select()
+    autoplay_switch.pack(pady=(0, 5))
+
     # Music player controls at bottom of sidebar
     player_frame = ctk.CTkFrame(sidebar, fg_color="#111827", height=50)
     player_frame.pack(side="bottom", fill="x", pady=10, padx=10)
@@ -722,6 +947,9 @@ try:
     refresh_button.pack()
 
     # ---------------- Run Application ----------------
+    # Watch for songs ending so autoplay can continue the session
+    root.after(1000, check_song_finished)
+
     root.mainloop()
     
 except Exception as e:
@@ -0,0 +1,165 @@
+import os
+import time
+import argparse
+import numpy as np
+from recom_batch import MODEL_DIR, load_play_counts, build_csr
+
+# Files holding the trained model
+USER_FACTORS_FILE = "als_user_factors.npy"
+SONG_FACTORS_FILE = "als_song_factors.npy"
+USER_IDS_FILE = "als_user_ids.npy"
+SONG_IDS_FILE = "als_song_ids.npy"
+
+# Trained model, read from disk on first use
+als_model = {
+    "loaded": False,
+    "user_factors": None,
+    "song_factors": None,
+    "user_ids": None,
+    "song_ids": None
+}
+
+# ------------------- Training Functions -------------------
+def solve_factors(fixed, indptr, indices, confidence, regularization, max_block_bytes=64 * 1024 * 1024):
+    """Solve the implicit-feedback least squares problem for every row in one pass
+
+    For row u: (Y^T Y + Y^T (C_u - I) Y + reg * I) x_u = Y^T C_u p_u
+    The per-row systems are assembled and solved in vectorised blocks.
+    """
+    n_rows = len(indptr) - 1
+    n_factors = fixed.shape[1]
+
+    base = fixed.T @ fixed + regularization * np.eye(n_factors, dtype=fixed.dtype)
+    solved = np.zeros((n_rows, n_factors), dtype=fixed.dtype)
+
+    # Keep each block's stack of outer products within the memory budget
+    max_nnz = max(1, max_block_bytes // (n_factors * n_factors * fixed.itemsize))
+
+    start = 0
+    while start < n_rows:
+        end = start + 1
+        while end < n_rows and indptr[end + 1] - indptr[start] <= max_nnz:
+            end += 1
+
+        lo, hi = indptr[start], indptr[end]
+        vectors = fixed[indices[lo:hi]]
+        weights = confidence[lo:hi]
+
+        # Sum the per-item terms of each row with reduceat over the row offsets
+        offsets = indptr[start:end] - lo
+        non_empty = indptr[start + 1:end + 1] > indptr[start:end]
+
+        outer = (weights - 1.0)[:, None, None] * vectors[:, :, None] * vectors[:, None, :]
+        rhs = weights[:, None] * vectors
+
+        A = np.repeat(base[None], end - start, axis=0)
+        b = np.zeros((end - start, n_factors), dtype=fixed.dtype)
+        if hi > lo:
+            # Only non-empty rows start a segment; each runs to the next one, and the empty
+            # rows between them add nothing
+            A[non_empty] += np.add.reduceat(outer, offsets[non_empty], axis=0)
+            b[non_empty] = np.add.reduceat(rhs, offsets[non_empty], axis=0)
+
+        solved[start:end] = np.linalg.solve(A, b[:, :, None])[:, :, 0]
+        start = end
+
+    return solved
+
+def train_als(data, factors=32, regularization=0.1, alpha=40.0, iterations=10, seed=0):
+    """Train implicit ALS user and song factors from play counts"""
+    n_users = len(data["user_ids"])
+    n_songs = len(data["song_ids"])
+
+    # Confidence grows with the number of plays
+    confidence = (1.0 + alpha * np.log1p(data["counts"])).astype(np.float32)
+
+    user_csr = build_csr(data["user_index"], data["song_index"], confidence, n_users)
+    song_csr = build_csr(data["song_index"], data["user_index"], confidence, n_songs)
+
+    rng = np.random.default_rng(seed)
+    user_factors = (rng.standard_normal((n_users, factors)) * 0.01).astype(np.float32)
+    song_factors = (rng.standard_normal((n_songs, factors)) * 0.01).astype(np.float32)
+
+    for iteration in range(iterations):
+        user_factors = solve_factors(song_factors, *user_csr, regularization)
+        song_factors = solve_factors(user_factors, *song_csr, regularization)
+        print(f"ALS iteration {iteration + 1}/{iterations} done.")
+
+    return user_factors, song_factors
+
+def save_model(data, user_factors, song_factors, model_dir=MODEL_DIR):
+    """Persist factor matrices and their ID mappings as .npy files"""
+    os.makedirs(model_dir, exist_ok=True)
+
+    for name, array in ((USER_IDS_FILE, data["user_ids"].astype(np.int64)),
+                        (SONG_IDS_FILE, data["song_ids"].astype(np.int64)),
+                        (USER_FACTORS_FILE, user_factors),
+                        (SONG_FACTORS_FILE, song_factors)):
+        path = os.path.join(model_dir, name)
+        temp_path = path + ".tmp.npy"
+        np.save(temp_path, array)
+        os.replace(temp_path, path)
+
+# ------------------- Scoring Functions -------------------
+def load_model(model_dir=MODEL_DIR):
+    """Load the trained model, once per process (read into memory, so retraining can replace the files)"""
+    if als_model["loaded"]:
+        return als_model if als_model["user_factors"] is not None else None
+
+    als_model["loaded"] = True
+    try:
+        als_model["user_factors"] = np.load(os.path.join(model_dir, USER_FACTORS_FILE))
+        als_model["song_factors"] = np.load(os.path.join(model_dir, SONG_FACTORS_FILE))
+        als_model["user_ids"] = np.load(os.path.join(model_dir, USER_IDS_FILE))
+        als_model["song_ids"] = np.load(os.path.join(model_dir, SONG_IDS_FILE))
+    except (OSError, ValueError):
+        # No trained model yet
+        als_model["user_factors"] = None
+        return None
+
+    return als_model
+
+def recommend_for_user(user_id, top_k=8, exclude_song_ids=None, model=None):
+    """Return (song_ids, scores) of the best songs for a user, best first"""
+    model = model or load_model()
+    if not model:
+        return [], []
+
+    user_ids = model["user_ids"]
+    row = np.searchsorted(user_ids, int(user_id))
+    if row >= len(user_ids) or user_ids[row] != int(user_id):
+        return [], []
+
+    # One matrix-vector product scores the whole catalogue
+    scores = model["song_factors"] @ model["user_factors"][row]
+
+    if exclude_song_ids:
+        scores[np.isin(model["song_ids"], list(exclude_song_ids))] = -np.inf
+
+    top_k = min(top_k, int(np.isfinite(scores).sum()))
+    if top_k <= 0:
+        return [], []
+
+    top = np.argpartition(-scores, top_k - 1)[:top_k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+
+    return [int(song_id) for song_id in model["song_ids"][top]], [float(score) for score in scores[top]]
+
+# ------------------- Main Entry Point -------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the ALS recommendation model from listening history")
+    parser.add_argument("--factors", type=int, default=32, help="Latent factors per user and song")
+    parser.add_argument("--iterations", type=int, default=10, help="Alternating solve iterations")
+    parser.add_argument("--regularization", type=float, default=0.1, help="L2 regularization strength")
+    parser.add_argument("--alpha", type=float, default=40.0, help="Confidence scaling for play counts")
+    args = parser.parse_args()
+
+    started = time.time()
+    data = load_play_counts()
+    if not data:
+        print("No listening history found. Nothing to train.")
+    else:
+        user_factors, song_factors = train_als(data, args.factors, args.regularization, args.alpha, args.iterations)
+        save_model(data, user_factors, song_factors)
+        print(f"Trained ALS model for {len(data['user_ids'])} users and {len(data['song_ids'])} songs "
+              f"in {time.time() - started:.1f}s.")
@@ -0,0 +1,349 @@
+import mysql.connector
+import os
+import time
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+# Directory holding precomputed recommendation data
+MODEL_DIR = "models"
+
+# Item-similarity files shared read-only with the scoring workers
+NEIGHBORS_FILE = "item_neighbors.npy"
+NEIGHBOR_SCORES_FILE = "item_neighbor_scores.npy"
+SONG_IDS_FILE = "item_song_ids.npy"
+
+# Read-only similarity data, memory-mapped once per worker process
+worker_data = {
+    "neighbors": None,
+    "scores": None,
+    "song_ids": None
+}
+
+# ------------------- Database Functions -------------------
+def connect_db():
+    """Connect to the MySQL database"""
+    try:
+        connection = mysql.connector.connect(
+            host="localhost",
+            user="root",
+            password="new_password",
+            database="online_music_system"
+        )
+        return connection
+    except mysql.connector.Error as err:
+        print(f"Error connecting to database: {err}")
+        return None
+
+def load_play_counts():
+    """Load per-user play counts from the listening history as index arrays"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return None
+
+        cursor = connection.cursor()
+
+        query = """
+        SELECT user_id, song_id, CAST(SUM(play_count) AS UNSIGNED) as play_count
+        FROM User_Song_Plays
+        GROUP BY user_id, song_id
+        ORDER BY user_id
+        """
+
+        cursor.execute(query)
+        rows = cursor.fetchall()
+
+        if not rows:
+            return None
+
+        data = np.array(rows, dtype=np.int64)
+
+        # Map database IDs to dense matrix indices
+        user_ids, user_index = np.unique(data[:, 0], return_inverse=True)
+        song_ids, song_index = np.unique(data[:, 1], return_inverse=True)
+
+        return {
+            "user_ids": user_ids,
+            "song_ids": song_ids,
+            "user_index": user_index,
+            "song_index": song_index,
+            "counts": data[:, 2].astype(np.float32)
+        }
+
+    except mysql.connector.Error as e:
+        print(f"Error loading play counts: {e}")
+        return None
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+# ------------------- Item Similarity -------------------
+def build_csr(rows, cols, values, n_rows):
+    """Group (row, col, value) triples by row into CSR-style arrays"""
+    order = np.argsort(rows, kind="stable")
+    indptr = np.searchsorted(rows[order], np.arange(n_rows + 1))
+    return indptr, cols[order], values[order]
+
+def compute_item_neighbors(data, n_neighbors=50, block_size=256, max_pairs=16 * 1024 * 1024):
+    """Compute the top-N most similar songs for every song (cosine over listeners)"""
+    n_users = len(data["user_ids"])
+    n_songs = len(data["song_ids"])
+    n_neighbors = min(n_neighbors, max(n_songs - 1, 1))
+
+    # Damped play counts, normalised so each song's listener vector has unit length
+    values = np.log1p(data["counts"]).astype(np.float32)
+    norms = np.sqrt(np.bincount(data["song_index"], weights=values.astype(np.float64) ** 2, minlength=n_songs))
+    norms[norms == 0] = 1.0
+    values = (values / norms[data["song_index"]]).astype(np.float32)
+
+    # Sparse song -> listeners and listener -> songs matrices; only plays are stored
+    song_indptr, song_users, song_values = build_csr(data["song_index"], data["user_index"], values, n_songs)
+    user_indptr, user_songs, user_values = build_csr(data["user_index"], data["song_index"], values, n_users)
+    user_degree = np.diff(user_indptr)
+
+    # Co-occurrence pairs each song expands to (one per play of each of its listeners),
+    # as a running total so blocks can be cut to at most max_pairs
+    entry_pairs = np.concatenate([[0], np.cumsum(user_degree[song_users])])
+    song_pairs = entry_pairs[song_indptr]
+
+    neighbors = np.zeros((n_songs, n_neighbors), dtype=np.int32)
+    scores = np.zeros((n_songs, n_neighbors), dtype=np.float32)
+
+    # Work through the songs in blocks so only block_size x n_songs is dense in memory
+    start = 0
+    while start < n_songs:
+        end = min(start + block_size, n_songs,
+                  max(np.searchsorted(song_pairs, song_pairs[start] + max_pairs, side="right") - 1, start + 1))
+        lo, hi = song_indptr[start], song_indptr[end]
+
+        # Expand each (song, listener) entry to every song that listener played
+        users = song_users[lo:hi]
+        degrees = user_degree[users]
+        offsets = np.cumsum(degrees) - degrees
+        positions = np.repeat(user_indptr[users] - offsets, degrees) + np.arange(degrees.sum())
+        rows = np.repeat(np.repeat(np.arange(end - start), np.diff(song_indptr[start:end + 1])), degrees)
+        weights = np.repeat(song_values[lo:hi], degrees) * user_values[positions]
+
+        # Summing the products per (song, other song) gives the cosine similarity
+        similarity = np.bincount(rows * n_songs + user_songs[positions], weights=weights,
+                                 minlength=(end - start) * n_songs)
+        similarity = similarity.reshape(end - start, n_songs).astype(np.float32)
+
+        # A song is not its own neighbour
+        similarity[np.arange(end - start), np.arange(start, end)] = -1.0
+
+        if n_neighbors < n_songs:
+            top = np.argpartition(similarity, -n_neighbors, axis=1)[:, -n_neighbors:]
+        else:
+            top = np.tile(np.arange(n_songs), (end - start, 1))
+        top_scores = np.take_along_axis(similarity, top, axis=1)
+
+        neighbors[start:end] = top
+        scores[start:end] = np.maximum(top_scores, 0.0)
+        start = end
+
+    return neighbors, scores
+
+def save_item_neighbors(song_ids, neighbors, scores, model_dir=MODEL_DIR):
+    """Persist the item-similarity data so workers can memory-map it"""
+    os.makedirs(model_dir, exist_ok=True)
+
+    # Write to temporary files first so readers never see a half-written model
+    for name, array in ((SONG_IDS_FILE, song_ids.astype(np.int64)),
+                        (NEIGHBORS_FILE, neighbors),
+                        (NEIGHBOR_SCORES_FILE, scores)):
+        path = os.path.join(model_dir, name)
+        temp_path = path + ".tmp.npy"
+        np.save(temp_path, array)
+        os.replace(temp_path, path)
+
+def load_item_neighbors(model_dir=MODEL_DIR):
+    """Memory-map the persisted item-similarity data (read-only)"""
+    try:
+        return {
+            "neighbors": np.load(os.path.join(model_dir, NEIGHBORS_FILE), mmap_mode="r"),
+            "scores": np.load(os.path.join(model_dir, NEIGHBOR_SCORES_FILE), mmap_mode="r"),
+            "song_ids": np.load(os.path.join(model_dir, SONG_IDS_FILE), mmap_mode="r")
+        }
+    except (OSError, ValueError) as e:
+        print(f"Error loading item neighbors: {e}")
+        return None
+
+def score_user(song_index, weights, neighbors, scores, top_k=50):
+    """Score every song for one user from their history and return the top-k indices"""
+    n_songs = neighbors.shape[0]
+
+    # Each listened song votes for its neighbours, weighted by similarity and plays
+    votes = scores[song_index] * weights[:, None]
+    totals = np.bincount(neighbors[song_index].ravel(), weights=votes.ravel(), minlength=n_songs)
+
+    # Never recommend something the user already listens to
+    totals[song_index] = 0.0
+
+    candidates = np.flatnonzero(totals > 0)
+    if len(candidates) > top_k:
+        best = np.argpartition(totals[candidates], -top_k)[-top_k:]
+        candidates = candidates[best]
+
+    order = np.argsort(-totals[candidates], kind="stable")
+    return candidates[order], totals[candidates[order]]
+
+# ------------------- Worker Functions -------------------
+def init_worker(model_dir):
+    """Memory-map the shared similarity data once in each worker process"""
+    loaded = load_item_neighbors(model_dir)
+    if loaded:
+        worker_data.update(loaded)
+
+def write_recommendations(connection, user_ids, rows, write_batch=1000):
+    """Replace the stored recommendations for a set of users using chunked bulk inserts"""
+    cursor = connection.cursor()
+    try:
+        # Clear old results for these users in one statement
+        placeholders = ", ".join(["%s"] * len(user_ids))
+        cursor.execute(f"DELETE FROM User_Recommendations WHERE user_id IN ({placeholders})", list(user_ids))
+
+        query = """
+        INSERT INTO User_Recommendations (user_id, song_id, score, rank_pos)
+        VALUES (%s, %s, %s, %s)
+        """
+        for start in range(0, len(rows), write_batch):
+            cursor.executemany(query, rows[start:start + write_batch])
+
+        connection.commit()
+    finally:
+        cursor.close()
+
+def score_user_chunk(task):
+    """Score one partition of users and bulk-write their recommendations"""
+    user_ids, indptr, song_index, weights, top_k = task
+
+    neighbors = worker_data["neighbors"]
+    scores = worker_data["scores"]
+    song_ids = worker_data["song_ids"]
+    if neighbors is None:
+        return 0
+
+    rows = []
+    for i, user_id in enumerate(user_ids):
+        start, end = indptr[i], indptr[i + 1]
+        best, best_scores = score_user(song_index[start:end], weights[start:end], neighbors, scores, top_k)
+
+        for rank, (index, score) in enumerate(zip(best, best_scores), 1):
+            rows.append((int(user_id), int(song_ids[index]), float(score), rank))
+
+    connection = connect_db()
+    if not connection:
+        return 0
+
+    try:
+        write_recommendations(connection, [int(u) for u in user_ids], rows)
+    except mysql.connector.Error as e:
+        print(f"Error writing recommendations: {e}")
+        return 0
+    finally:
+        connection.close()
+
+    return len(user_ids)
+
+def partition_users(data, chunk_size):
+    """Split the play counts into contiguous per-user chunks for the worker pool"""
+    # Rows are grouped by user, so each user's history is a contiguous slice
+    order = np.argsort(data["user_index"], kind="stable")
+    user_index = data["user_index"][order]
+    song_index = data["song_index"][order].astype(np.int32)
+    weights = np.log1p(data["counts"][order]).astype(np.float32)
+
+    n_users = len(data["user_ids"])
+    indptr = np.searchsorted(user_index, np.arange(n_users + 1))
+
+    for start in range(0, n_users, chunk_size):
+        end = min(start + chunk_size, n_users)
+        lo, hi = indptr[start], indptr[end]
+        yield (
+            data["user_ids"][start:end],
+            indptr[start:end + 1] - lo,
+            song_index[lo:hi],
+            weights[lo:hi]
+        )
+
+# ------------------- Batch Job -------------------
+def recompute_recommendations(workers=None, top_k=50, chunk_size=500, n_neighbors=50, model_dir=MODEL_DIR):
+    """Recompute stored recommendations for every user with listening history"""
+    started = time.time()
+
+    data = load_play_counts()
+    if not data:
+        print("No listening history found. Nothing to recompute.")
+        return 0
+
+    print(f"Loaded history for {len(data['user_ids'])} users and {len(data['song_ids'])} songs.")
+
+    # Build the shared similarity data once, in the parent process
+    neighbors, scores = compute_item_neighbors(data, n_neighbors)
+    save_item_neighbors(data["song_ids"], neighbors, scores, model_dir)
+    print(f"Item similarity computed in {time.time() - started:.1f}s.")
+
+    tasks = [chunk + (top_k,) for chunk in partition_users(data, chunk_size)]
+
+    # Workers memory-map the same files, so the similarity data is shared via the page cache
+    scored = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(model_dir,)) as pool:
+        for count in pool.map(score_user_chunk, tasks):
+            scored += count
+            print(f"Scored {scored}/{len(data['user_ids'])} users...")
+
+    print(f"Recomputed recommendations for {scored} users in {time.time() - started:.1f}s.")
+    return scored
+
+def refresh_genre_popular_songs(per_genre=50):
+    """Rebuild the most played songs of each genre, used for cold-start recommendations"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return 0
+
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM Genre_Popular_Songs")
+        cursor.execute("""
+        INSERT INTO Genre_Popular_Songs (genre_id, song_id, play_count, rank_pos)
+        SELECT genre_id, song_id, play_count, rank_pos
+        FROM (
+            SELECT s.genre_id, s.song_id, COALESCE(SUM(usp.play_count), 0) AS play_count,
+                   ROW_NUMBER() OVER (PARTITION BY s.genre_id
+                                      ORDER BY COALESCE(SUM(usp.play_count), 0) DESC, s.song_id) AS rank_pos
+            FROM Songs s
+            LEFT JOIN User_Song_Plays usp ON usp.song_id = s.song_id
+            WHERE s.genre_id IS NOT NULL
+            GROUP BY s.genre_id, s.song_id
+        ) ranked
+        WHERE rank_pos <= %s
+        """, (per_genre,))
+        stored = cursor.rowcount
+        connection.commit()
+
+        print(f"Stored {stored} popular songs across genres.")
+        return stored
+
+    except mysql.connector.Error as e:
+        print(f"Error refreshing genre popularity: {e}")
+        return 0
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+# ------------------- Main Entry Point -------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute song recommendations for all users")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--top-k", type=int, default=50, help="Recommendations stored per user")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Users per worker task")
+    parser.add_argument("--neighbors", type=int, default=50, help="Similar songs kept per song")
+    parser.add_argument("--per-genre", type=int, default=50, help="Popular songs kept per genre for new users")
+    args = parser.parse_args()
+
+    refresh_genre_popular_songs(args.per_genre)
+    recompute_recommendations(args.workers, args.top_k, args.chunk_size, args.neighbors)
@@ -0,0 +1,281 @@
+import time
+import random
+import argparse
+import numpy as np
+import recom_batch
+import recom_als
+
+# ------------------- Synthetic Data -------------------
+def generate_synthetic_data(n_users=1000, n_songs=2000, n_artists=200, n_genres=20,
+                            min_plays=5, max_plays=150, days=90, seed=0):
+    """Generate a synthetic catalogue and listening history at scale
+
+    Follows main.py:add_sample_listening_history() (each user gets a random
+    number of plays of random songs), but gives users genre and artist tastes
+    and songs a skewed popularity so recommenders have signal to find.
+    """
+    rng = np.random.default_rng(seed)
+
+    song_ids = np.arange(1, n_songs + 1)
+    song_artist = rng.integers(1, n_artists + 1, n_songs)
+    artist_genre = rng.integers(1, n_genres + 1, n_artists + 1)
+    song_genre = artist_genre[song_artist]
+
+    # Zipf-like popularity so a few songs get most of the plays
+    popularity = 1.0 / np.arange(1, n_songs + 1) ** 0.8
+    popularity = rng.permutation(popularity)
+
+    user_ids = np.arange(1, n_users + 1)
+    play_users, play_songs, play_times = [], [], []
+    end_time = time.time()
+    start_time = end_time - days * 86400
+
+    for user_id in user_ids:
+        # Each user prefers two genres and a handful of artists
+        liked_genres = rng.choice(np.arange(1, n_genres + 1), 2, replace=False)
+        liked_artists = rng.choice(np.arange(1, n_artists + 1), 5, replace=False)
+
+        weights = popularity.copy()
+        weights[np.isin(song_genre, liked_genres)] *= 8.0
+        weights[np.isin(song_artist, liked_artists)] *= 20.0
+        weights /= weights.sum()
+
+        num_plays = rng.integers(min_plays, max_plays + 1)
+        play_users.append(np.full(num_plays, user_id))
+        play_songs.append(rng.choice(song_ids, num_plays, p=weights))
+        play_times.append(rng.uniform(start_time, end_time, num_plays))
+
+    return {
+        "song_ids": song_ids,
+        "song_artist": song_artist,
+        "song_genre": song_genre,
+        "play_users": np.concatenate(play_users),
+        "play_songs": np.concatenate(play_songs),
+        "play_times": np.concatenate(play_times)
+    }
+
+def time_split(data, train_fraction=0.8):
+    """Split plays at a global time cutoff and build the per-user test sets"""
+    cutoff = np.quantile(data["play_times"], train_fraction)
+    is_train = data["play_times"] < cutoff
+
+    train = {
+        "play_users": data["play_users"][is_train],
+        "play_songs": data["play_songs"][is_train]
+    }
+
+    # A test item is a song first played after the cutoff by a user with training history
+    train_pairs = set(zip(train["play_users"].tolist(), train["play_songs"].tolist()))
+    train_users = set(train["play_users"].tolist())
+
+    test = {}
+    for user_id, song_id in zip(data["play_users"][~is_train].tolist(), data["play_songs"][~is_train].tolist()):
+        if user_id in train_users and (user_id, song_id) not in train_pairs:
+            test.setdefault(user_id, set()).add(song_id)
+
+    return train, test
+
+def to_play_counts(train):
+    """Convert training plays into the format returned by recom_batch.load_play_counts()"""
+    pairs, counts = np.unique(np.stack([train["play_users"], train["play_songs"]], axis=1),
+                              axis=0, return_counts=True)
+    user_ids, user_index = np.unique(pairs[:, 0], return_inverse=True)
+    song_ids, song_index = np.unique(pairs[:, 1], return_inverse=True)
+
+    return {
+        "user_ids": user_ids,
+        "song_ids": song_ids,
+        "user_index": user_index,
+        "song_index": song_index,
+        "counts": counts.astype(np.float32)
+    }
+
+# ------------------- Engines -------------------
+def user_histories(counts):
+    """Map each user ID to the set of song IDs they played in training"""
+    histories = {}
+    for user, song in zip(counts["user_ids"][counts["user_index"]].tolist(),
+                          counts["song_ids"][counts["song_index"]].tolist()):
+        histories.setdefault(user, set()).add(song)
+    return histories
+
+def fit_random(counts, catalog):
+    """Mirror of recom.py:get_recommended_songs(): random picks from top genres/artists"""
+    histories = user_histories(counts)
+    genre_of = dict(zip(catalog["song_ids"].tolist(), catalog["song_genre"].tolist()))
+    artist_of = dict(zip(catalog["song_ids"].tolist(), catalog["song_artist"].tolist()))
+    all_songs = catalog["song_ids"].tolist()
+
+    songs_by_genre, songs_by_artist = {}, {}
+    for song_id in all_songs:
+        songs_by_genre.setdefault(genre_of[song_id], []).append(song_id)
+        songs_by_artist.setdefault(artist_of[song_id], []).append(song_id)
+
+    # Play counts per (user, genre) and (user, artist), as the SQL GROUP BYs compute them
+    plays = {}
+    for user, song, count in zip(counts["user_ids"][counts["user_index"]].tolist(),
+                                 counts["song_ids"][counts["song_index"]].tolist(),
+                                 counts["counts"].tolist()):
+        user_plays = plays.setdefault(user, ({}, {}))
+        user_plays[0][genre_of[song]] = user_plays[0].get(genre_of[song], 0) + count
+        user_plays[1][artist_of[song]] = user_plays[1].get(artist_of[song], 0) + count
+
+    def recommend(user_id, k):
+        listened = histories.get(user_id, set())
+        genre_plays, artist_plays = plays.get(user_id, ({}, {}))
+        top_genres = sorted(genre_plays, key=genre_plays.get, reverse=True)[:3]
+        top_artists = sorted(artist_plays, key=artist_plays.get, reverse=True)[:3]
+
+        candidates = set()
+        for genre in top_genres:
+            candidates.update(songs_by_genre[genre])
+        for artist in top_artists:
+            candidates.update(songs_by_artist[artist])
+        candidates = list(candidates - listened)
+
+        picks = random.sample(candidates, min(k, len(candidates)))
+
+        # Fill with random songs, like get_random_songs(remaining, excluded)
+        excluded = listened | set(picks)
+        while len(picks) < k and len(excluded) < len(all_songs):
+            song_id = random.choice(all_songs)
+            if song_id not in excluded:
+                picks.append(song_id)
+                excluded.add(song_id)
+        return picks
+
+    return recommend
+
+def fit_popular(counts, catalog):
+    """Baseline: most played songs the user has not heard"""
+    histories = user_histories(counts)
+    totals = np.bincount(counts["song_index"], weights=counts["counts"])
+    ranked = counts["song_ids"][np.argsort(-totals, kind="stable")].tolist()
+
+    def recommend(user_id, k):
+        listened = histories.get(user_id, set())
+        return [song_id for song_id in ranked if song_id not in listened][:k]
+
+    return recommend
+
+def fit_itemknn(counts, catalog):
+    """Item-neighbour scorer used by recom_batch.py"""
+    neighbors, scores = recom_batch.compute_item_neighbors(counts)
+    song_ids = counts["song_ids"]
+
+    user_rows = {}
+    weights = np.log1p(counts["counts"]).astype(np.float32)
+    order = np.argsort(counts["user_index"], kind="stable")
+    indptr = np.searchsorted(counts["user_index"][order], np.arange(len(counts["user_ids"]) + 1))
+    for row, user_id in enumerate(counts["user_ids"].tolist()):
+        selected = order[indptr[row]:indptr[row + 1]]
+        user_rows[user_id] = (counts["song_index"][selected], weights[selected])
+
+    def recommend(user_id, k):
+        if user_id not in user_rows:
+            return []
+        best, _ = recom_batch.score_user(*user_rows[user_id], neighbors, scores, k)
+        return song_ids[best].tolist()
+
+    return recommend
+
+def fit_als(counts, catalog):
+    """Implicit ALS model served by recom_als.recommend_for_user()"""
+    user_factors, song_factors = recom_als.train_als(counts, iterations=8)
+    model = {
+        "user_factors": user_factors,
+        "song_factors": song_factors,
+        "user_ids": counts["user_ids"],
+        "song_ids": counts["song_ids"]
+    }
+    histories = user_histories(counts)
+
+    def recommend(user_id, k):
+        song_ids, _ = recom_als.recommend_for_user(user_id, k, histories.get(user_id), model=model)
+        return song_ids
+
+    return recommend
+
+# Engines that can be evaluated side by side
+ENGINES = {
+    "random": fit_random,
+    "popular": fit_popular,
+    "itemknn": fit_itemknn,
+    "als": fit_als
+}
+
+# ------------------- Evaluation -------------------
+def evaluate_engine(recommend, test, catalog_size, k=10):
+    """Compute precision@k, recall@k, catalogue coverage and latency percentiles"""
+    precisions, recalls, latencies = [], [], []
+    recommended = set()
+
+    for user_id, relevant in test.items():
+        started = time.perf_counter()
+        picks = recommend(user_id, k)
+        latencies.append((time.perf_counter() - started) * 1000.0)
+
+        hits = len(set(picks[:k]) & relevant)
+        precisions.append(hits / k)
+        recalls.append(hits / len(relevant))
+        recommended.update(picks[:k])
+
+    latencies = np.array(latencies) if latencies else np.zeros(1)
+    return {
+        "precision": float(np.mean(precisions)) if precisions else 0.0,
+        "recall": float(np.mean(recalls)) if recalls else 0.0,
+        "coverage": len(recommended) / catalog_size,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99))
+    }
+
+def run_evaluation(engine_names, k=10, **data_options):
+    """Generate data, split it by time and evaluate each engine on the same split"""
+    catalog = generate_synthetic_data(**data_options)
+    train, test = time_split(catalog)
+    counts = to_play_counts(train)
+
+    print(f"Synthetic data: {len(catalog['song_ids'])} songs, {len(catalog['play_users'])} plays, "
+          f"{len(test)} test users")
+    print(f"{'engine':<10} {'fit_s':>7} {'P@' + str(k):>7} {'R@' + str(k):>7} {'cover':>7} "
+          f"{'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8}")
+
+    results = {}
+    for name in engine_names:
+        started = time.time()
+        recommend = ENGINES[name](counts, catalog)
+        fit_seconds = time.time() - started
+
+        result = evaluate_engine(recommend, test, len(catalog["song_ids"]), k)
+        result["fit_s"] = fit_seconds
+        results[name] = result
+
+        print(f"{name:<10} {fit_seconds:>7.2f} {result['precision']:>7.4f} {result['recall']:>7.4f} "
+              f"{result['coverage']:>7.3f} {result['p50_ms']:>8.3f} {result['p95_ms']:>8.3f} "
+              f"{result['p99_ms']:>8.3f}")
+
+    return results
+
+# ------------------- Main Entry Point -------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline accuracy and latency evaluation of recommenders")
+    parser.add_argument("--engines", default=",".join(ENGINES), help="Comma-separated engines to compare")
+    parser.add_argument("--users", type=int, default=1000, help="Synthetic users")
+    parser.add_argument("--songs", type=int, default=2000, help="Synthetic songs")
+    parser.add_argument("--artists", type=int, default=200, help="Synthetic artists")
+    parser.add_argument("--genres", type=int, default=20, help="Synthetic genres")
+    parser.add_argument("--k", type=int, default=10, help="Recommendation list length")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    run_evaluation(
+        [name.strip() for name in args.engines.split(",") if name.strip()],
+        k=args.k,
+        n_users=args.users,
+        n_songs=args.songs,
+        n_artists=args.artists,
+        n_genres=args.genres,
+        seed=args.seed
+    )
@@ -0,0 +1,144 @@
+import mysql.connector
+import time
+import argparse
+
+# Job_State row whose updated_at records when the summaries were last computed
+JOB_NAME = "report_summaries"
+
+# Top songs, artists and genres are ranked over this many recent days
+TOP_DAYS = 30
+TOP_N = 20
+
+# Top-item queries: the item column and the name column for each item type
+TOP_ITEM_QUERIES = {
+    "song": ("s.song_id", "s.title", ""),
+    "artist": ("a.artist_id", "a.name", "JOIN Artists a ON s.artist_id = a.artist_id"),
+    "genre": ("g.genre_id", "g.name", "JOIN Genres g ON s.genre_id = g.genre_id")
+}
+
+# ------------------- Database Functions -------------------
+def connect_db():
+    """Connect to the MySQL database"""
+    try:
+        connection = mysql.connector.connect(
+            host="localhost",
+            user="root",
+            password="new_password",
+            database="online_music_system"
+        )
+        return connection
+    except mysql.connector.Error as err:
+        print(f"Error connecting to database: {err}")
+        return None
+
+# ------------------- Summaries -------------------
+def summarize_daily_plays(cursor):
+    """Recompute plays per day from the last summarized day onwards"""
+    # The last day may have been summarized while it was still going, so it is redone
+    cursor.execute("SELECT COALESCE(MAX(report_date), '1970-01-01') FROM Report_Daily_Plays")
+    start = cursor.fetchone()[0]
+
+    cursor.execute("""
+    REPLACE INTO Report_Daily_Plays (report_date, play_count, listeners)
+    SELECT play_date, SUM(play_count), COUNT(DISTINCT user_id)
+    FROM User_Song_Plays
+    WHERE play_date >= %s
+    GROUP BY play_date
+    """, (start,))
+
+def summarize_top_items(cursor, days=TOP_DAYS, top_n=TOP_N):
+    """Rank the most played songs, artists and genres of the last days"""
+    cursor.execute("DELETE FROM Report_Top_Items")
+    for item_type, (item_column, name_column, join) in TOP_ITEM_QUERIES.items():
+        cursor.execute(f"""
+        INSERT INTO Report_Top_Items (item_type, rank_pos, item_id, name, play_count)
+        SELECT %s, ROW_NUMBER() OVER (ORDER BY plays DESC, item_id), item_id, name, plays
+        FROM (
+            SELECT {item_column} AS item_id, {name_column} AS name, SUM(usp.play_count) AS plays
+            FROM User_Song_Plays usp
+            JOIN Songs s ON usp.song_id = s.song_id
+            {join}
+            WHERE usp.play_date >= CURDATE() - INTERVAL %s DAY
+            GROUP BY {item_column}, {name_column}
+            ORDER BY plays DESC, item_id
+            LIMIT %s
+        ) top_items
+        """, (item_type, days, top_n))
+
+def summarize_weekly_users(cursor):
+    """Recompute sign-ups per week (Users is small, so it is redone in full)"""
+    cursor.execute("DELETE FROM Report_Weekly_Users")
+    cursor.execute("""
+    INSERT INTO Report_Weekly_Users (week_start, new_users)
+    SELECT DATE(created_at) - INTERVAL WEEKDAY(created_at) DAY AS week_start, COUNT(*)
+    FROM Users
+    GROUP BY week_start
+    """)
+
+def summarize_storage(cursor):
+    """Snapshot today's song count and storage use"""
+    cursor.execute("SELECT COUNT(*) FROM Report_Daily_Storage")
+    if cursor.fetchone()[0] == 0:
+        # First run: reconstruct past growth from upload dates (deleted songs are not known)
+        cursor.execute("""
+        INSERT INTO Report_Daily_Storage (report_date, song_count, total_bytes)
+        SELECT upload_day,
+               SUM(songs) OVER (ORDER BY upload_day),
+               SUM(bytes) OVER (ORDER BY upload_day)
+        FROM (
+            SELECT DATE(upload_date) AS upload_day, COUNT(*) AS songs, SUM(file_size) AS bytes
+            FROM Songs
+            GROUP BY upload_day
+        ) uploads
+        """)
+
+    cursor.execute("""
+    REPLACE INTO Report_Daily_Storage (report_date, song_count, total_bytes)
+    SELECT CURDATE(), COUNT(*), COALESCE(SUM(file_size), 0)
+    FROM Songs
+    """)
+
+def refresh_summaries():
+    """Nightly job: bring every report summary table up to date"""
+    started = time.time()
+    try:
+        connection = connect_db()
+        if not connection:
+            return False
+
+        cursor = connection.cursor()
+
+        summarize_daily_plays(cursor)
+        summarize_top_items(cursor)
+        summarize_weekly_users(cursor)
+        summarize_storage(cursor)
+
+        cursor.execute("""
+        INSERT INTO Job_State (job_name, last_history_id) VALUES (%s, 0)
+        ON DUPLICATE KEY UPDATE updated_at = CURRENT_TIMESTAMP
+        """, (JOB_NAME,))
+
+        # Reports see either the old summaries or the new ones, never a mix
+        connection.commit()
+        print(f"Report summaries refreshed in {time.time() - started:.1f}s.")
+        return True
+
+    except mysql.connector.Error as e:
+        print(f"Error refreshing report summaries: {e}")
+        return False
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+# ------------------- Main Entry Point -------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the pre-aggregated tables behind admin_reports.py")
+    parser.add_argument("--interval", type=int, default=0, help="Keep running, refreshing every N seconds")
+    args = parser.parse_args()
+
+    while True:
+        refresh_summaries()
+        if not args.interval:
+            break
+        time.sleep(args.interval)
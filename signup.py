@@ -37,6 +37,142 @@ def validate_password(password):
     """Password validation - at least 8 characters"""
     return len(password) >= 8
 
+# ------------------- Taste Preference Functions -------------------
+def get_genres():
+    """Get all genres for the preference picker"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return []
+            
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("SELECT genre_id, name FROM Genres ORDER BY name")
+        return cursor.fetchall()
+        
+    except mysql.connector.Error as err:
+        print(f"Error fetching genres: {err}")
+        return []
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def get_popular_artists(limit=20):
+    """Get the most played artists for the preference picker"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return []
+            
+        cursor = connection.cursor(dictionary=True)
+        query = """
+        SELECT a.artist_id, a.name, COALESCE(SUM(ss.play_count), 0) as play_count
+        FROM Artists a
+        JOIN Songs s ON s.artist_id = a.artist_id
+        LEFT JOIN Song_Stats ss ON ss.song_id = s.song_id
+        GROUP BY a.artist_id
+        ORDER BY play_count DESC, a.name
+        LIMIT %s
+        """
+        cursor.execute(query, (limit,))
+        return cursor.fetchall()
+        
+    except mysql.connector.Error as err:
+        print(f"Error fetching artists: {err}")
+        return []
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def save_preferences(user_id, genre_ids, artist_ids):
+    """Store the genres and artists a new user picked"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return False
+            
+        cursor = connection.cursor()
+        if genre_ids:
+            cursor.executemany(
+                "INSERT IGNORE INTO User_Genre_Preferences (user_id, genre_id) VALUES (%s, %s)",
+                [(user_id, genre_id) for genre_id in genre_ids]
+            )
+        if artist_ids:
+            cursor.executemany(
+                "INSERT IGNORE INTO User_Artist_Preferences (user_id, artist_id) VALUES (%s, %s)",
+                [(user_id, artist_id) for artist_id in artist_ids]
+            )
+        connection.commit()
+        return True
+        
+    except mysql.connector.Error as err:
+        print(f"Error saving preferences: {err}")
+        return False
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def show_preferences_dialog(user_id):
+    """Ask a new user for favorite genres and artists to seed their recommendations"""
+    genres = get_genres()
+    artists = get_popular_artists()
+    if not genres and not artists:
+        return
+    
+    pref_dialog = ctk.CTkToplevel(root)
+    pref_dialog.title("Your Music Taste")
+    pref_dialog.geometry("420x520")
+    pref_dialog.configure(fg_color="white")
+    pref_dialog.transient(root)
+    pref_dialog.grab_set()
+    
+    ctk.CTkLabel(pref_dialog, text="What do you like to listen to?", 
+               font=("Arial", 18, "bold"), text_color="#B146EC").pack(pady=(20, 5))
+    ctk.CTkLabel(pref_dialog, text="Pick a few genres and artists to get recommendations right away.", 
+               font=("Arial", 12), text_color="gray", wraplength=360).pack(pady=(0, 10))
+    
+    options_frame = ctk.CTkScrollableFrame(pref_dialog, fg_color="white")
+    options_frame.pack(fill="both", expand=True, padx=20)
+    
+    genre_vars = {}
+    if genres:
+        ctk.CTkLabel(options_frame, text="Genres", font=("Arial", 14, "bold"), 
+                   text_color="#333333").pack(anchor="w", pady=(5, 5))
+        for genre in genres:
+            genre_vars[genre['genre_id']] = ctk.BooleanVar()
+            ctk.CTkCheckBox(options_frame, text=genre['name'], variable=genre_vars[genre['genre_id']],
+                          text_color="#333333", fg_color="#B146EC", hover_color="#9333EA").pack(anchor="w", pady=2)
+    
+    artist_vars = {}
+    if artists:
+        ctk.CTkLabel(options_frame, text="Artists", font=("Arial", 14, "bold"), 
+                   text_color="#333333").pack(anchor="w", pady=(15, 5))
+        for artist in artists:
+            artist_vars[artist['artist_id']] = ctk.BooleanVar()
+            ctk.CTkCheckBox(options_frame, text=artist['name'], variable=artist_vars[artist['artist_id']],
+                          text_color="#333333", fg_color="#B146EC", hover_color="#9333EA").pack(anchor="w", pady=2)
+    
+    def save_and_close():
+        genre_ids = [genre_id for genre_id, var in genre_vars.items() if var.get()]
+        artist_ids = [artist_id for artist_id, var in artist_vars.items() if var.get()]
+        if genre_ids or artist_ids:
+            save_preferences(user_id, genre_ids, artist_ids)
+        pref_dialog.destroy()
+    
+    buttons_frame = ctk.CTkFrame(pref_dialog, fg_color="white")
+    buttons_frame.pack(fill="x", padx=20, pady=15)
+    
+    ctk.CTkButton(buttons_frame, text="Skip", font=("Arial", 14), fg_color="#DDDDDD", 
+                text_color="#333333", hover_color="#CCCCCC", corner_radius=8,
+                command=pref_dialog.destroy).pack(side="left", expand=True, fill="x", padx=(0, 5))
+    ctk.CTkButton(buttons_frame, text="Save", font=("Arial", 14, "bold"), fg_color="#B146EC", 
+                hover_color="#9333EA", corner_radius=8,
+                command=save_and_close).pack(side="right", expand=True, fill="x", padx=(5, 0))
+    
+    root.wait_window(pref_dialog)
+
 # ------------------- Sign Up Function -------------------
 def signup_user():
     """Register a new user in the database"""
@@ -72,6 +208,7 @@ def signup_user():
 
     # Hash the password
     hashed_password = hash_password(password)
+    new_user_id = None
 
     try:
         connection = connect_db()
@@ -103,9 +240,7 @@ def signup_user():
 
         connection.commit()
         messagebox.showinfo("Success", "User registered successfully!")
-        
-        # After successful registration, redirect to login page
-        open_login_page()
+        new_user_id = user_id
 
     except mysql.connector.Error as err:
         messagebox.showerror("Database Error", str(err))
@@ -114,6 +249,11 @@ def signup_user():
             cursor.close()
             connection.close()
 
+    if new_user_id:
+        # Seed the new user's taste profile, then redirect to login page
+        show_preferences_dialog(new_user_id)
+        open_login_page()
+
 # ------------------- Open Login Page -------------------
 def open_login_page():
     """Open the login page and close the signup page"""
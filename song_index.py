@@ -0,0 +1,360 @@
+import mysql.connector
+import os
+import time
+import argparse
+import threading
+import contextlib
+import numpy as np
+from recom_batch import MODEL_DIR
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+# Random-projection LSH settings
+NUM_TABLES = 8
+NUM_BITS = 12
+SEED = 42
+
+# Below this many songs an exact scan is faster than probing buckets
+EXACT_SCAN_LIMIT = 2000
+
+# Index files
+IDS_FILE = "song_index_ids.npy"
+VECTORS_FILE = "song_index_vectors.npy"
+CODES_FILE = "song_index_codes.npy"
+PLANES_FILE = "song_index_planes.npy"
+STATS_FILE = "song_index_stats.npy"
+
+# Delta segment: songs added since the last full write, on top of (and overriding) the index files
+DELTA_IDS_FILE = "song_index_delta_ids.npy"
+DELTA_VECTORS_FILE = "song_index_delta_vectors.npy"
+DELTA_CODES_FILE = "song_index_delta_codes.npy"
+
+# Held while the index files are read, changed and written back, by every process that updates them
+LOCK_FILE = "song_index.lock"
+
+# The delta segment is merged into the index files once it holds this many songs
+DELTA_MERGE_SIZE = 256
+
+# In-memory index state (index files and delta segment combined), read from disk when they change.
+# The files are read into memory rather than memory-mapped, so they can be replaced while loaded.
+song_index = {
+    "loaded_at": 0.0,
+    "ids": None,
+    "vectors": None,
+    "codes": None,
+    "planes": None,
+    "stats": None,
+    "delta_size": 0,
+    "row_of": {},
+    "buckets": []
+}
+
+# Serialises updates from the upload worker threads (LOCK_FILE serialises processes)
+index_lock = threading.Lock()
+
+# ------------------- Database Functions -------------------
+def connect_db():
+    """Connect to the MySQL database"""
+    try:
+        connection = mysql.connector.connect(
+            host="localhost",
+            user="root",
+            password="new_password",
+            database="online_music_system"
+        )
+        return connection
+    except mysql.connector.Error as err:
+        print(f"Error connecting to database: {err}")
+        return None
+
+def load_song_vectors():
+    """Load the raw audio feature vectors of all songs from Song_Features"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return None, None
+
+        cursor = connection.cursor()
+        cursor.execute("SELECT song_id, feature_vector FROM Song_Features ORDER BY song_id")
+        rows = cursor.fetchall()
+        if not rows:
+            return None, None
+
+        song_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        matrix = np.frombuffer(b"".join(bytes(row[1]) for row in rows), dtype="<f4")
+        return song_ids, matrix.reshape(len(rows), -1).astype(np.float32)
+
+    except mysql.connector.Error as e:
+        print(f"Error loading song vectors: {e}")
+        return None, None
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+# ------------------- Hashing -------------------
+def normalize(vectors, stats):
+    """Standardise raw feature vectors with the index statistics and scale to unit length"""
+    scaled = (vectors - stats[0]) / stats[1]
+    norms = np.linalg.norm(scaled, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (scaled / norms).astype(np.float32)
+
+def hash_vectors(vectors, planes):
+    """Compute one NUM_BITS code per table for each vector (N x NUM_TABLES)"""
+    bits = np.einsum("nd,tbd->ntb", vectors, planes) > 0
+    weights = (1 << np.arange(planes.shape[1], dtype=np.uint32))
+    return (bits * weights).sum(axis=2).astype(np.uint32)
+
+def build_buckets(codes):
+    """Group row numbers by code for every hash table"""
+    buckets = []
+    for table in range(codes.shape[1]):
+        order = np.argsort(codes[:, table], kind="stable")
+        values, starts = np.unique(codes[order, table], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        buckets.append({int(v): order[s:e].tolist() for v, s, e in zip(values, starts, ends)})
+    return buckets
+
+# ------------------- Persistence -------------------
+def index_path(name, model_dir=MODEL_DIR):
+    """Full path of an index file"""
+    return os.path.join(model_dir, name)
+
+def save_arrays(arrays, model_dir=MODEL_DIR):
+    """Write (file name, array) pairs atomically, in order"""
+    os.makedirs(model_dir, exist_ok=True)
+    for name, array in arrays:
+        temp_path = index_path(name, model_dir) + ".tmp.npy"
+        np.save(temp_path, array)
+        os.replace(temp_path, index_path(name, model_dir))
+
+def save_index(ids, vectors, codes, planes, stats, model_dir=MODEL_DIR):
+    """Write the index files atomically and drop the delta segment they now include"""
+    # The IDs file is replaced last; readers use its timestamp to detect changes
+    save_arrays(((VECTORS_FILE, vectors), (CODES_FILE, codes), (PLANES_FILE, planes),
+                 (STATS_FILE, stats), (IDS_FILE, ids)), model_dir)
+
+    # The delta IDs file goes first, so readers never see part of a delta segment
+    for name in (DELTA_IDS_FILE, DELTA_VECTORS_FILE, DELTA_CODES_FILE):
+        try:
+            os.remove(index_path(name, model_dir))
+        except FileNotFoundError:
+            pass
+
+def save_delta(ids, vectors, codes, model_dir=MODEL_DIR):
+    """Write the delta segment atomically (a few rows, not the whole index)"""
+    save_arrays(((DELTA_VECTORS_FILE, vectors), (DELTA_CODES_FILE, codes), (DELTA_IDS_FILE, ids)), model_dir)
+
+def modified_time(model_dir=MODEL_DIR):
+    """Latest change to the index files or the delta segment, or None if there is no index"""
+    try:
+        modified = os.path.getmtime(index_path(IDS_FILE, model_dir))
+    except OSError:
+        return None
+    try:
+        return max(modified, os.path.getmtime(index_path(DELTA_IDS_FILE, model_dir)))
+    except OSError:
+        return modified
+
+@contextlib.contextmanager
+def locked_index(model_dir=MODEL_DIR):
+    """Hold the index for a read-modify-write, against other threads and other processes"""
+    with index_lock:
+        os.makedirs(model_dir, exist_ok=True)
+        with open(index_path(LOCK_FILE, model_dir), "a+b") as lock:
+            if fcntl:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            else:
+                # LK_LOCK gives up after about ten seconds, so keep waiting
+                lock.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock.seek(0)
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+def load_index(model_dir=MODEL_DIR, force=False):
+    """Read the index and its delta segment from disk, reloading only when they have changed
+
+    Updates pass force, since another process may have written within the same timestamp tick.
+    """
+    modified = modified_time(model_dir)
+    if modified is None:
+        return None
+
+    if not force and song_index["ids"] is not None and modified <= song_index["loaded_at"]:
+        return song_index
+
+    try:
+        ids = np.load(index_path(IDS_FILE, model_dir))
+        vectors = np.load(index_path(VECTORS_FILE, model_dir))
+        codes = np.load(index_path(CODES_FILE, model_dir))
+        planes = np.load(index_path(PLANES_FILE, model_dir))
+        stats = np.load(index_path(STATS_FILE, model_dir))
+        if os.path.exists(index_path(DELTA_IDS_FILE, model_dir)):
+            delta_ids = np.load(index_path(DELTA_IDS_FILE, model_dir))
+            delta_vectors = np.load(index_path(DELTA_VECTORS_FILE, model_dir))
+            delta_codes = np.load(index_path(DELTA_CODES_FILE, model_dir))
+        else:
+            delta_ids, delta_vectors, delta_codes = ids[:0], vectors[:0], codes[:0]
+    except (OSError, ValueError) as e:
+        print(f"Error loading song index: {e}")
+        return None
+
+    # Another process may be halfway through rewriting the files
+    if not (len(ids) == len(vectors) == len(codes) and len(delta_ids) == len(delta_vectors) == len(delta_codes)):
+        return song_index if song_index["ids"] is not None else None
+
+    # Songs in the delta segment replace their rows in the index files
+    keep = ~np.isin(ids, delta_ids)
+    ids = np.concatenate([ids[keep], delta_ids])
+    vectors = np.vstack([vectors[keep], delta_vectors])
+    codes = np.vstack([codes[keep], delta_codes])
+
+    song_index.update({
+        "loaded_at": modified,
+        "ids": ids,
+        "vectors": vectors,
+        "codes": codes,
+        "planes": planes,
+        "stats": stats,
+        "delta_size": len(delta_ids),
+        "row_of": {int(song_id): row for row, song_id in enumerate(ids.tolist())},
+        "buckets": build_buckets(codes)
+    })
+    return song_index
+
+def build_index(model_dir=MODEL_DIR):
+    """Build the index from scratch from every stored feature vector"""
+    song_ids, matrix = load_song_vectors()
+    if song_ids is None:
+        print("No song features found. Run audio_features.py first.")
+        return False
+
+    # Freeze the scaling so later incremental adds hash consistently
+    std = matrix.std(axis=0)
+    std[std == 0] = 1.0
+    stats = np.stack([matrix.mean(axis=0), std]).astype(np.float32)
+
+    rng = np.random.default_rng(SEED)
+    planes = rng.standard_normal((NUM_TABLES, NUM_BITS, matrix.shape[1])).astype(np.float32)
+
+    vectors = normalize(matrix, stats)
+    codes = hash_vectors(vectors, planes)
+
+    with locked_index(model_dir):
+        save_index(song_ids, vectors, codes, planes, stats, model_dir)
+    print(f"Indexed {len(song_ids)} songs.")
+    return True
+
+def add_song(song_id, features, model_dir=MODEL_DIR):
+    """Insert or replace one song in the index (called after feature extraction)"""
+    with locked_index(model_dir):
+        index = load_index(model_dir, force=True)
+        if index is not None:
+            vector = normalize(np.asarray(features, dtype=np.float32)[None, :], index["stats"])
+            code = hash_vectors(vector, index["planes"])
+
+            # The delta segment is the last delta_size rows of the combined index
+            start = len(index["ids"]) - index["delta_size"]
+            delta_ids = index["ids"][start:]
+            keep = delta_ids != np.int64(song_id)
+            delta_ids = np.append(delta_ids[keep], np.int64(song_id))
+            delta_vectors = np.vstack([index["vectors"][start:][keep], vector])
+            delta_codes = np.vstack([index["codes"][start:][keep], code])
+
+            if len(delta_ids) < DELTA_MERGE_SIZE:
+                # Only the small delta segment is rewritten
+                save_delta(delta_ids, delta_vectors, delta_codes, model_dir)
+            else:
+                # Merge: rewrite the index files with every song, then drop the delta segment
+                keep = ~np.isin(index["ids"][:start], delta_ids)
+                save_index(np.concatenate([index["ids"][:start][keep], delta_ids]),
+                           np.vstack([index["vectors"][:start][keep], delta_vectors]),
+                           np.vstack([index["codes"][:start][keep], delta_codes]),
+                           index["planes"], index["stats"], model_dir)
+            return True
+
+    # First song with features: build the whole index instead
+    return build_index(model_dir)
+
+def remove_songs(song_ids, model_dir=MODEL_DIR):
+    """Drop deleted songs from the index"""
+    with locked_index(model_dir):
+        index = load_index(model_dir, force=True)
+        if index is None:
+            return False
+
+        keep = ~np.isin(index["ids"], np.asarray(list(song_ids), dtype=np.int64))
+        if keep.all():
+            return True
+
+        # The delta segment is merged in the same write
+        save_index(index["ids"][keep], index["vectors"][keep],
+                   index["codes"][keep], index["planes"], index["stats"], model_dir)
+        return True
+
+# ------------------- Queries -------------------
+def find_similar(song_id, k=8, model_dir=MODEL_DIR):
+    """Return up to k song IDs that sound most like the given song"""
+    index = load_index(model_dir)
+    if index is None:
+        return []
+
+    row = index["row_of"].get(int(song_id))
+    if row is None:
+        return []
+
+    vectors = index["vectors"]
+    query = np.asarray(vectors[row])
+
+    if len(vectors) <= EXACT_SCAN_LIMIT:
+        candidates = np.arange(len(vectors))
+    else:
+        # Collect rows sharing a bucket, or a bucket one bit away, in any table
+        rows = set()
+        for table, code in enumerate(index["codes"][row].tolist()):
+            buckets = index["buckets"][table]
+            rows.update(buckets.get(code, []))
+            for bit in range(NUM_BITS):
+                rows.update(buckets.get(code ^ (1 << bit), []))
+        candidates = np.fromiter(rows, dtype=np.int64)
+
+    candidates = candidates[candidates != row]
+    if len(candidates) == 0:
+        return []
+
+    # Exact cosine re-ranking of the candidates
+    similarity = vectors[candidates] @ query
+    k = min(k, len(candidates))
+    top = np.argpartition(-similarity, k - 1)[:k]
+    top = top[np.argsort(-similarity[top], kind="stable")]
+    return [int(index["ids"][candidates[i]]) for i in top]
+
+# ------------------- Main Entry Point -------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the similar-songs index")
+    parser.add_argument("--query", type=int, help="Print songs similar to this song ID instead of rebuilding")
+    args = parser.parse_args()
+
+    if args.query:
+        started = time.perf_counter()
+        similar = find_similar(args.query)
+        print(f"{similar} ({(time.perf_counter() - started) * 1000:.2f} ms)")
+    else:
+        build_index()
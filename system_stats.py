@@ -0,0 +1,200 @@
+import mysql.connector
+import time
+import argparse
+import threading
+
+# Dashboard reads are served from memory for this many seconds
+CACHE_SECONDS = 30
+
+# The counters are recounted exactly in the background once they are this old
+RECOUNT_SECONDS = 60 * 60
+
+# Job_State row whose updated_at records the last exact recount
+JOB_NAME = "system_counters"
+
+# Counter name -> exact recount query
+COUNTER_QUERIES = {
+    "users": "SELECT COUNT(*) FROM Users",
+    "songs": "SELECT COUNT(*) FROM Songs",
+    "playlists": "SELECT COUNT(*) FROM Playlists",
+    "plays": "SELECT COALESCE(SUM(play_count), 0) FROM User_Song_Plays"
+}
+
+# Approximate row counts used until the first recount has run
+APPROXIMATE_TABLES = {
+    "users": "Users",
+    "songs": "Songs",
+    "playlists": "Playlists",
+    "plays": "Listening_History"
+}
+
+# In-memory cache of the last read
+stats_cache = {"loaded_at": 0.0, "stats": None}
+
+# Only one background recount per process
+recount_state = {"running": False}
+
+# ------------------- Database Functions -------------------
+def connect_db():
+    """Connect to the MySQL database"""
+    try:
+        connection = mysql.connector.connect(
+            host="localhost",
+            user="root",
+            password="new_password",
+            database="online_music_system"
+        )
+        return connection
+    except mysql.connector.Error as err:
+        print(f"Error connecting to database: {err}")
+        return None
+
+def count_plays(cursor, plays):
+    """Add plays to the plays counter (caller commits)"""
+    cursor.execute(
+        "UPDATE System_Counters SET value = value + %s WHERE counter_name = 'plays'",
+        (plays,)
+    )
+
+# ------------------- Recount -------------------
+def recount_counters():
+    """Recompute every counter exactly"""
+    started = time.time()
+    try:
+        connection = connect_db()
+        if not connection:
+            return False
+
+        cursor = connection.cursor()
+
+        # Count without locks: the counters and the counts are read from one consistent
+        # snapshot, so writers keep committing while the scans run
+        cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+        cursor.execute("SELECT counter_name, value FROM System_Counters")
+        snapshot = dict(cursor.fetchall())
+
+        counted = {}
+        for counter, query in COUNTER_QUERIES.items():
+            cursor.execute(query)
+            counted[counter] = cursor.fetchone()[0]
+        connection.commit()
+
+        # Then correct each counter by its drift at the snapshot in one short write.
+        # Increments made since the snapshot are kept, so none are counted twice or lost.
+        for counter, value in counted.items():
+            cursor.execute("""
+            INSERT INTO System_Counters (counter_name, value) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE value = value + %s
+            """, (counter, value, value - snapshot.get(counter, 0)))
+
+        cursor.execute("""
+        INSERT INTO Job_State (job_name, last_history_id) VALUES (%s, 0)
+        ON DUPLICATE KEY UPDATE updated_at = CURRENT_TIMESTAMP
+        """, (JOB_NAME,))
+
+        connection.commit()
+        stats_cache["loaded_at"] = 0.0
+        print(f"System counters recounted in {time.time() - started:.1f}s.")
+        return True
+
+    except mysql.connector.Error as e:
+        print(f"Error recounting system counters: {e}")
+        return False
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def recount_in_background():
+    """Run recount_counters() in a background thread unless one is already running"""
+    if recount_state["running"]:
+        return
+
+    def run():
+        try:
+            recount_counters()
+        finally:
+            recount_state["running"] = False
+
+    recount_state["running"] = True
+    threading.Thread(target=run, daemon=True).start()
+
+# ------------------- Reads -------------------
+def load_counters():
+    """Read the counters, falling back to approximate table statistics before the first recount"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return None
+
+        cursor = connection.cursor()
+
+        cursor.execute("SELECT counter_name, value FROM System_Counters")
+        counters = dict(cursor.fetchall())
+
+        cursor.execute(
+            "SELECT TIMESTAMPDIFF(SECOND, updated_at, NOW()) FROM Job_State WHERE job_name = %s",
+            (JOB_NAME,)
+        )
+        row = cursor.fetchone()
+        age = row[0] if row else None
+
+        if age is None:
+            # Never recounted: InnoDB's estimated row counts are close enough for a first look
+            cursor.execute("""
+            SELECT TABLE_NAME, TABLE_ROWS
+            FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = DATABASE()
+            """)
+            estimates = {name.lower(): rows or 0 for name, rows in cursor.fetchall()}
+            counters = {counter: estimates.get(table.lower(), 0)
+                        for counter, table in APPROXIMATE_TABLES.items()}
+
+        if age is None or age > RECOUNT_SECONDS:
+            recount_in_background()
+
+        return counters
+
+    except mysql.connector.Error as e:
+        print(f"Error loading system counters: {e}")
+        return None
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def get_system_stats():
+    """Get the dashboard statistics from the counters, cached for CACHE_SECONDS"""
+    if stats_cache["stats"] and time.time() - stats_cache["loaded_at"] < CACHE_SECONDS:
+        return stats_cache["stats"]
+
+    counters = load_counters()
+    if counters is None:
+        # Keep showing the last good numbers if the database is briefly unreachable
+        return stats_cache["stats"] or {
+            "total_users": 0,
+            "total_songs": 0,
+            "total_playlists": 0,
+            "total_downloads": 0
+        }
+
+    stats_cache["stats"] = {
+        "total_users": counters.get("users", 0),
+        "total_songs": counters.get("songs", 0),
+        "total_playlists": counters.get("playlists", 0),
+        "total_downloads": counters.get("plays", 0)
+    }
+    stats_cache["loaded_at"] = time.time()
+    return stats_cache["stats"]
+
+# ------------------- Main Entry Point -------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recount the dashboard's system counters exactly")
+    parser.add_argument("--interval", type=int, default=0, help="Keep running, recounting every N seconds")
+    args = parser.parse_args()
+
+    while True:
+        recount_counters()
+        if not args.interval:
+            break
+        time.sleep(args.interval)
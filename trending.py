@@ -0,0 +1,235 @@
+import mysql.connector
+import time
+import argparse
+import threading
+
+# Chart windows in hours
+CHART_WINDOWS = {
+    "1h": 1,
+    "24h": 24,
+    "7d": 24 * 7
+}
+
+# Songs stored per chart
+CHART_SIZE = 50
+
+# Charts older than this are refreshed in the background when read
+ROLLUP_SECONDS = 5 * 60
+
+# Buckets are kept one hour past the longest window, then expired
+RETENTION_HOURS = max(CHART_WINDOWS.values()) + 1
+
+# Expired buckets deleted per statement
+EXPIRE_BATCH = 10000
+
+# Only one background rollup per process
+rollup_state = {"running": False}
+
+# ------------------- Database Functions -------------------
+def connect_db():
+    """Connect to the MySQL database"""
+    try:
+        connection = mysql.connector.connect(
+            host="localhost",
+            user="root",
+            password="new_password",
+            database="online_music_system"
+        )
+        return connection
+    except mysql.connector.Error as err:
+        print(f"Error connecting to database: {err}")
+        return None
+
+def count_plays(cursor, plays):
+    """Add (song_id, played_at) plays to their songs' hourly counters (caller commits)"""
+    buckets = {}
+    for song_id, played_at in plays:
+        key = (played_at.replace(minute=0, second=0, microsecond=0), song_id)
+        buckets[key] = buckets.get(key, 0) + 1
+
+    # Sorted so concurrent writers lock the counters in the same order
+    cursor.executemany("""
+    INSERT INTO Song_Play_Buckets (bucket_start, song_id, play_count)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE play_count = play_count + VALUES(play_count)
+    """, [key + (count,) for key, count in sorted(buckets.items())])
+
+# ------------------- Rollup -------------------
+def rollup_charts(chart_size=CHART_SIZE):
+    """Recompute every chart from the hourly buckets inside its window"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return False
+
+        cursor = connection.cursor()
+
+        for window, hours in CHART_WINDOWS.items():
+            # Reads only the buckets in the window, however long the history is.
+            # Whole hours are summed, so a window covers between N and N+1 hours.
+            cursor.execute("DELETE FROM Trending_Charts WHERE chart_window = %s", (window,))
+            cursor.execute("""
+            INSERT INTO Trending_Charts (chart_window, rank_pos, song_id, play_count)
+            SELECT %s, ROW_NUMBER() OVER (ORDER BY plays DESC, song_id), song_id, plays
+            FROM (
+                SELECT song_id, SUM(play_count) AS plays
+                FROM Song_Play_Buckets
+                WHERE bucket_start >= DATE_FORMAT(NOW() - INTERVAL %s HOUR, '%%Y-%%m-%%d %%H:00:00')
+                GROUP BY song_id
+                ORDER BY plays DESC, song_id
+                LIMIT %s
+            ) window_plays
+            """, (window, hours, chart_size))
+            connection.commit()
+
+        return True
+
+    except mysql.connector.Error as e:
+        print(f"Error rolling up trending charts: {e}")
+        return False
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def expire_buckets():
+    """Delete hourly buckets that have fallen out of every window"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return 0
+
+        cursor = connection.cursor()
+
+        # Small batches keep each delete short so plays are not blocked
+        deleted = 0
+        while True:
+            cursor.execute("""
+            DELETE FROM Song_Play_Buckets
+            WHERE bucket_start < NOW() - INTERVAL %s HOUR
+            LIMIT %s
+            """, (RETENTION_HOURS, EXPIRE_BATCH))
+            connection.commit()
+            deleted += cursor.rowcount
+            if cursor.rowcount < EXPIRE_BATCH:
+                break
+
+        return deleted
+
+    except mysql.connector.Error as e:
+        print(f"Error expiring play buckets: {e}")
+        return 0
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def rebuild_buckets():
+    """Refill the hourly buckets from the listening history inside the retention window"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return False
+
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM Song_Play_Buckets")
+        cursor.execute("""
+        INSERT INTO Song_Play_Buckets (bucket_start, song_id, play_count)
+        SELECT DATE_FORMAT(played_at, '%%Y-%%m-%%d %%H:00:00'), song_id, COUNT(*)
+        FROM Listening_History
+        WHERE played_at >= NOW() - INTERVAL %s HOUR
+        GROUP BY DATE_FORMAT(played_at, '%%Y-%%m-%%d %%H:00:00'), song_id
+        """, (RETENTION_HOURS,))
+        connection.commit()
+        return True
+
+    except mysql.connector.Error as e:
+        print(f"Error rebuilding play buckets: {e}")
+        return False
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def rebuild_trending():
+    """Rebuild the buckets from history and roll up the charts (used at setup)"""
+    return rebuild_buckets() and rollup_charts()
+
+def refresh_charts():
+    """Scheduled job: expire old buckets and roll up the charts"""
+    started = time.time()
+    expired = expire_buckets()
+    rollup_charts()
+    print(f"Trending charts refreshed in {time.time() - started:.2f}s ({expired} buckets expired).")
+
+def refresh_in_background():
+    """Run refresh_charts() in a background thread unless one is already running"""
+    if rollup_state["running"]:
+        return
+
+    def run():
+        try:
+            refresh_charts()
+        finally:
+            rollup_state["running"] = False
+
+    rollup_state["running"] = True
+    threading.Thread(target=run, daemon=True).start()
+
+# ------------------- Chart Reads -------------------
+def get_trending_songs(window="24h", limit=10):
+    """Get the top songs of a chart window, refreshing a stale chart in the background"""
+    try:
+        connection = connect_db()
+        if not connection:
+            return []
+
+        cursor = connection.cursor(dictionary=True)
+
+        query = """
+        SELECT tc.rank_pos, tc.play_count, tc.computed_at, s.song_id, s.title, a.name as artist_name,
+               COALESCE(sls.listeners, 0) as listeners
+        FROM Trending_Charts tc
+        JOIN Songs s ON tc.song_id = s.song_id
+        JOIN Artists a ON s.artist_id = a.artist_id
+        LEFT JOIN Song_Listener_Sketches sls ON tc.song_id = sls.song_id
+        WHERE tc.chart_window = %s
+        ORDER BY tc.rank_pos
+        LIMIT %s
+        """
+        cursor.execute(query, (window, limit))
+        songs = cursor.fetchall()
+
+        # Serve what is stored now; a background rollup updates it for the next read
+        cursor.execute(
+            "SELECT TIMESTAMPDIFF(SECOND, MAX(computed_at), NOW()) AS age FROM Trending_Charts"
+        )
+        age = cursor.fetchone()['age']
+        if age is None or age > ROLLUP_SECONDS:
+            refresh_in_background()
+
+        return songs
+
+    except mysql.connector.Error as e:
+        print(f"Error fetching trending songs: {e}")
+        return []
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+# ------------------- Main Entry Point -------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Roll up trending charts from hourly play buckets")
+    parser.add_argument("--interval", type=int, default=0, help="Keep running, refreshing every N seconds")
+    parser.add_argument("--rebuild", action="store_true", help="Refill the buckets from listening history first")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild_buckets()
+
+    while True:
+        refresh_charts()
+        if not args.interval:
+            break
+        time.sleep(args.interval)
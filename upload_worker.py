@@ -0,0 +1,201 @@
+import mysql.connector
+import os
+import uuid
+import queue
+import hashlib
+import itertools
+import threading
+import mutagen
+import audio_features
+from mysql.connector import errorcode
+
+# Song files are sent to Upload_Chunks in pieces of this size, so progress can be
+# shown and an upload can be cancelled between pieces
+CHUNK_BYTES = 4 * 1024 * 1024
+
+# Chunks of uploads that never finished (the app was killed) are removed after this many hours
+STALE_CHUNK_HOURS = 24
+
+# Uploads that run at the same time; the rest wait in the queue
+UPLOAD_WORKERS = 2
+
+# Idle workers exit after this many seconds, so the process can end once the queue is empty
+WORKER_IDLE_SECONDS = 2
+
+# Uploads waiting for a worker
+upload_queue = queue.Queue()
+
+# Finished uploads (done, failed or cancelled) waiting for the UI thread to collect them
+finished_uploads = queue.Queue()
+
+# Worker threads are started as uploads are queued and exit when the queue is empty
+worker_state = {"running": 0}
+worker_lock = threading.Lock()
+
+job_ids = itertools.count(1)
+
+# ------------------- Database Functions -------------------
+def connect_db():
+    """Connect to the MySQL database"""
+    try:
+        connection = mysql.connector.connect(
+            host="localhost",
+            user="root",
+            password="new_password",
+            database="online_music_system"
+        )
+        return connection
+    except mysql.connector.Error as err:
+        print(f"Error connecting to database: {err}")
+        return None
+
+def read_duration(file_path):
+    """Song duration in whole seconds, or 0 if the file cannot be parsed"""
+    try:
+        audio = mutagen.File(file_path)
+        return int(audio.info.length) if audio is not None else 0
+    except Exception as e:
+        print(f"Error getting audio duration: {e}")
+        return 0
+
+# ------------------- Uploads -------------------
+def clear_chunks(cursor, upload_id):
+    """Remove the staged chunks of one upload"""
+    cursor.execute("DELETE FROM Upload_Chunks WHERE upload_id = %s", (upload_id,))
+
+def upload(job):
+    """Send one song file to the database in chunks (tracking progress and its hash), then
+    assemble the chunks into Songs in one INSERT"""
+    upload_id = uuid.uuid4().hex
+    try:
+        if job["cancel"].is_set():
+            job["status"] = "cancelled"
+            return
+
+        connection = connect_db()
+        if not connection:
+            job["status"] = "failed"
+            job["error"] = "Could not connect to the database"
+            return
+
+        cursor = connection.cursor()
+        cursor.execute(
+            "DELETE FROM Upload_Chunks WHERE created_at < NOW() - INTERVAL %s HOUR", (STALE_CHUNK_HOURS,)
+        )
+        connection.commit()
+
+        job["status"] = "uploading"
+        file_type = os.path.splitext(job["file_path"])[1][1:].lower()  # Get extension without dot
+        duration = read_duration(job["file_path"])
+
+        # Each chunk is its own short transaction, so progress follows the bytes MySQL has taken
+        digest = hashlib.sha256()
+        with open(job["file_path"], "rb") as f:
+            for seq, chunk in enumerate(iter(lambda: f.read(CHUNK_BYTES), b"")):
+                if job["cancel"].is_set():
+                    clear_chunks(cursor, upload_id)
+                    connection.commit()
+                    job["status"] = "cancelled"
+                    return
+                cursor.execute(
+                    "INSERT INTO Upload_Chunks (upload_id, seq, data) VALUES (%s, %s, %s)",
+                    (upload_id, seq, chunk)
+                )
+                connection.commit()
+                digest.update(chunk)
+                job["sent"] += len(chunk)
+
+        # Past this point the upload can no longer be cancelled. The file is joined inside
+        # MySQL, so the INSERT (and the counter and activity triggers' locks) is short.
+        # The content hash lets bulk_import.py skip files that are already uploaded.
+        job["status"] = "storing"
+        cursor.execute("SET SESSION group_concat_max_len = %s", (max(job["size"], 1024),))
+        cursor.execute("""
+        INSERT INTO Songs (title, artist_id, genre_id, duration, file_data, file_type, file_size, content_hash)
+        SELECT %s, %s, %s, %s, COALESCE(GROUP_CONCAT(data ORDER BY seq SEPARATOR ''), ''), %s, %s, %s
+        FROM Upload_Chunks
+        WHERE upload_id = %s
+        """, (job["title"], job["artist_id"], job["genre_id"], duration,
+              file_type, job["size"], digest.hexdigest(), upload_id))
+        job["song_id"] = cursor.lastrowid
+        clear_chunks(cursor, upload_id)
+        connection.commit()
+
+        job["status"] = "done"
+
+        # Decode and analyse the audio in the background
+        audio_features.queue_feature_extraction(job["song_id"], job["file_path"])
+
+    except mysql.connector.IntegrityError as e:
+        # The content hash is unique, so a file that is already stored is refused
+        print(f"Error uploading song: {e}")
+        job["status"] = "failed"
+        job["error"] = "This file is already uploaded" if e.errno == errorcode.ER_DUP_ENTRY else str(e)
+    except (mysql.connector.Error, OSError) as e:
+        print(f"Error uploading song: {e}")
+        job["status"] = "failed"
+        job["error"] = str(e)
+    finally:
+        if 'connection' in locals() and connection and connection.is_connected():
+            if job["status"] == "failed":
+                # Staged chunks of a failed upload are not needed
+                try:
+                    connection.rollback()
+                    clear_chunks(cursor, upload_id)
+                    connection.commit()
+                except mysql.connector.Error as e:
+                    print(f"Error clearing upload chunks: {e}")
+            cursor.close()
+            connection.close()
+        finished_uploads.put(job)
+
+def run_worker():
+    """Upload queued songs one after another, exiting once the queue stays empty"""
+    while True:
+        try:
+            job = upload_queue.get(timeout=WORKER_IDLE_SECONDS)
+        except queue.Empty:
+            with worker_lock:
+                if upload_queue.empty():
+                    worker_state["running"] -= 1
+                    return
+            continue
+        upload(job)
+
+def submit(file_path, title, artist_id, genre_id=None):
+    """Queue a song upload and return its job; progress is read from job["sent"] / job["size"]"""
+    job = {
+        "job_id": next(job_ids),
+        "file_path": file_path,
+        "title": title,
+        "artist_id": artist_id,
+        "genre_id": genre_id,
+        "size": os.path.getsize(file_path),
+        "sent": 0,
+        "status": "queued",
+        "song_id": None,
+        "error": None,
+        "cancel": threading.Event()
+    }
+    upload_queue.put(job)
+
+    # Workers are not daemon threads: if the window is closed or the app moves to
+    # another page, the process stays alive until every queued upload is stored
+    with worker_lock:
+        while worker_state["running"] < UPLOAD_WORKERS:
+            threading.Thread(target=run_worker).start()
+            worker_state["running"] += 1
+    return job
+
+def cancel(job):
+    """Stop an upload while its file is still being sent; nothing is stored"""
+    job["cancel"].set()
+
+def collect_finished():
+    """Finished jobs since the last call (called from the UI thread)"""
+    jobs = []
+    while True:
+        try:
+            jobs.append(finished_uploads.get_nowait())
+        except queue.Empty:
+            return jobs